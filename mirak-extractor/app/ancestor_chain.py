@@ -0,0 +1,97 @@
+# ####################################################
+
+# This code is part of the "Mirak-extractor" software and, consequently, is
+# part of the "Mirak" project. It is expressly forbidden to copy, reproduce,
+# distribute or make available this code or parts thereof in isolation, except
+# under the terms expressly authorized by the rights holder.
+
+# The provision of the complete software must strictly follow the guidelines
+# established in the applicable license, as detailed in the license file
+# included in this repository. Any unauthorized use may result in sanctions
+# provided for in Brazilian law, including, but not limited to,
+# Law No. 9.610/1998 (Copyright Law).
+
+# For more information or specific requests, please contact the holder through
+# the contact details present in the license file.
+
+# ####################################################
+
+"""
+This module contains the "AncestorChain" class, which finds the weakest
+directory above a path: a file that only its owner can write is still at
+risk if one of its parent directories can be written by others.
+"""
+
+import os
+import stat
+from typing import Dict, List, Tuple
+
+
+class AncestorChain:
+    """Checks the directories above a path, up to "/", and keeps the result
+    of each directory in a cache shared by every path. The result of a
+    directory is the weakest link of its own chain, so auditing many files
+    under the same tree costs one stat per distinct directory."""
+
+    # From the least to the most severe. A sticky directory (e.g. /tmp)
+    # lets others create entries but not rename or remove theirs.
+    RANKS = ("group-writable-sticky", "world-writable-sticky",
+             "group-writable", "world-writable")
+
+    NONE = {"path": None, "mode": None, "issue": None}
+
+    def __init__(self) -> None:
+        # Directory -> rank + 1 of the weakest link of its chain (0 when
+        # there is none) and that link in the MIRAK format, shared by every
+        # path below the directory
+        self.__cache: "Dict[str, Tuple[int, dict]]" = {}
+
+    def __len__(self) -> int:
+        return len(self.__cache)
+
+    @classmethod
+    def rank(cls, mode: int) -> int:
+        """Returns the severity of a directory mode, 0 if others cannot
+        write to it"""
+        if mode & stat.S_IWOTH:
+            issue = "world-writable"
+        elif mode & stat.S_IWGRP:
+            issue = "group-writable"
+        else:
+            return 0
+        if mode & stat.S_ISVTX:
+            issue += "-sticky"
+        return cls.RANKS.index(issue) + 1
+
+    def __resolve(self, directory: str) -> "Tuple[int, dict]":
+        """Returns the weakest link of a directory chain, checking only the
+        directories that are not in the cache yet"""
+        pending: "List[str]" = []
+        while directory not in self.__cache:
+            pending.append(directory)
+            parent = os.path.dirname(directory)
+            if parent == directory:
+                break
+            directory = parent
+        result = self.__cache.get(directory, (0, self.NONE))
+        for directory in reversed(pending):
+            try:
+                mode = os.stat(directory).st_mode
+            except OSError:
+                # An unreadable directory adds nothing to the chain
+                mode = 0
+            own = self.rank(mode)
+            # On a tie the link closer to "/" is kept, as it governs more
+            if own > result[0]:
+                result = (own, {"path": directory,
+                                "mode": oct(stat.S_IMODE(mode))[2:].zfill(4),
+                                "issue": self.RANKS[own - 1]})
+            self.__cache[directory] = result
+        return result
+
+    def weakest_link(self, path: str) -> dict:
+        """Returns the weakest directory above a path, in the MIRAK format.
+        "path" is None when no directory above it can be written by
+        others. The dictionary is shared and must not be changed."""
+        parent = os.path.dirname(os.path.abspath(path).rstrip(os.sep))
+        return self.__resolve(parent or os.sep)[1]
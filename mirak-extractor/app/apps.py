@@ -22,6 +22,8 @@ tuples containing the most relevant information to describe a software and
 generate a CPE String for each one.
 """
 
+from app.inventory import Inventory
+
 
 class Apps:
     """Its purpose is to store a list of tuples containing the most
@@ -29,7 +31,7 @@ class Apps:
     for each one."""
 
     def __init__(self) -> None:
-        self.__apps_list: "list[dict[str, str]]" = []
+        self.__apps_list: Inventory = Inventory(cpe_key="cpe_name")
 
     @staticmethod
     def parse_cpe(part: str, software: "list[str]") -> str:
@@ -41,23 +43,33 @@ class Apps:
 :*:*:*:{software[3] if len(software)>=4  else '*' }:*:*:*"
         return ""
 
-    def add_app(self, software: "list[str]") -> None:
-        """This method adds a dictionary-type object with the application data
-        to the list. It also evaluates whether it meets the
+    @staticmethod
+    def build_app(software: "list[str]") -> "dict[str, str]":
+        """This method creates a dictionary-type object with the application
+        data, without storing it. It also evaluates whether it meets the
         MIRAK Schema requirements."""
 
         if len(software) not in (3, 4):
             raise TypeError("The parameter content is not valid!" +
                             " Lack or excess of required information")
 
+        return {
+            "type": "a",
+            "vendor": software[1],
+            "product": software[0],
+            "version": software[2],
+            "cpe_name": Apps.parse_cpe("a", software),
+        }
+
+    def add_app(self, software: "list[str]") -> None:
+        """This method adds a dictionary-type object with the application data
+        to the list. It also evaluates whether it meets the
+        MIRAK Schema requirements."""
+
+        app = self.build_app(software)
         self.__apps_list.append(
-            {
-                "type": "a",
-                "vendor": software[1],
-                "product": software[0],
-                "version": software[2],
-                "cpe_name": self.parse_cpe("a", software),
-            }
+            app["type"], app["vendor"], app["product"], app["version"],
+            app["cpe_name"]
         )
 
     def show(self):
@@ -71,6 +83,7 @@ class Apps:
     \nCPE: {app.get('cpe_name')}\n"
                 )
 
-    def get_apps_list(self) -> "list[dict[str, str]]":
-        """Returns the list of applications added so far"""
+    def get_apps_list(self) -> Inventory:
+        """Returns the list of applications added so far. Its items behave
+        like dictionaries."""
         return self.__apps_list
@@ -23,50 +23,116 @@ whether Ubuntu, RHEL or Debian.
 """
 
 import re
+import sqlite3
 import subprocess
+from typing import Iterator, Optional
+from app.dpkg_status_reader import DpkgStatusReader
+from app.inventory_cache import InventoryCache
+from app.rpm_db_reader import RpmDbReader
 
 
 class AppsFound:
     """Responsible for providing the functionality to query information
     about software installed on systems, whether Ubuntu, RHEL or Debian."""
 
+    # Version of the parsing and sanitization rules, stored with the
+    # cached inventory; it must be increased whenever "sanitize_app" or the
+    # readers of the package databases change what they produce
+    RULES_VERSION = 1
+
+    def __init__(
+        self,
+        dpkg_status_path: str = DpkgStatusReader.DEFAULT_PATH,
+        rpm_db_dirs: "tuple[str, ...]" = RpmDbReader.DEFAULT_DIRS,
+        cache: Optional[InventoryCache] = None
+    ) -> None:
+        self.dpkg_reader = DpkgStatusReader(dpkg_status_path)
+        self.rpm_reader = RpmDbReader(rpm_db_dirs)
+        self.cache = cache
+
+    def cache_tag(self, os: str) -> str:
+        """Returns the tag of the cached inventory of an operating system,
+        which changes with the rules used to parse it"""
+        return f"{os}:{self.RULES_VERSION}:{InventoryCache.VERSION}"
+
     # For Debian/Ubuntu
-    def __get_installed_apps_debian(self) -> "list[list[str]]":
-        """This method uses the "dpkg-query" package manager to locate
-        the applications installed on the host. It returns the
-        manufacturer/distributor name, version and architecture
-        for each software found."""
-        app: "list[str]" = ["", "", "", ""]
-        apps: "list[list[str]]" = []
-
-        result = subprocess.run(
+    def __get_installed_apps_debian(
+        self, os: str, rebuild: bool
+    ) -> "Iterator[list[str]]":
+        """This method reads the dpkg status database directly to locate
+        the applications installed on the host. If the database cannot be
+        read, the "dpkg-query" package manager is used instead. It yields
+        the sanitized product name, vendor, version and architecture
+        for each software found, as soon as it is read."""
+        if self.dpkg_reader.is_available():
+            reader = self.dpkg_reader
+            if self.cache is not None:
+                yield from self.cache.iter_rows(
+                    reader.path,
+                    self.cache_tag(os),
+                    reader.iter_stanzas,
+                    lambda stanza: self.sanitize_app(
+                        reader.parse_stanza(stanza), os
+                    ),
+                    rebuild,
+                )
+                return
+            for app in reader.read_installed():
+                yield self.sanitize_app(app, os)
+            return
+
+        for line in self.__stream_command(
             [
                 "dpkg-query",
                 "-W",
                 "-f=${binary:Package}\
 |${Maintainer}|${Version}\
 |${Architecture}\n",
-            ],
-            check=False,
-            capture_output=True,
-            text=True,
-        )
-        for line in result.stdout.splitlines():
+            ]
+        ):
             app = line.split("|")
             if ":" in app[0]:
                 app[0] = app[0].split(":")[0]
-            apps.append(app)
-            app = ["", "", "", ""]
-        return apps
+            yield self.sanitize_app(app, os)
 
     # For RHEL
-    def __get_installed_apps_rhel(self) -> "list[list[str]]":
-        """This method uses the "rpm" package manager to locate
-        the applications installed on the host. It returns the
-        manufacturer/distributor name, version and architecture
-        for each software found."""
-        apps: "list[list[str]]" = []
-        result = subprocess.run(
+    def __get_installed_apps_rhel(
+        self, os: str, rebuild: bool
+    ) -> "Iterator[list[str]]":
+        """This method reads the RPM database directly to locate
+        the applications installed on the host. If the database cannot be
+        read, the "rpm" package manager is used instead. It yields the
+        sanitized product name, vendor, version and architecture
+        for each software found, as soon as it is read."""
+        database = self.rpm_reader.locate_database()
+        # Applications already yielded when the database fails midway are
+        # not yielded again by "rpm"
+        found: "set[tuple[str, ...]]" = set()
+        if database is not None:
+            reader = self.rpm_reader
+            if self.cache is not None:
+                apps = self.cache.iter_rows(
+                    database[1],
+                    self.cache_tag(os),
+                    reader.iter_headers,
+                    lambda header: self.sanitize_app(
+                        reader.parse_header(header), os
+                    ),
+                    rebuild,
+                )
+            else:
+                apps = (self.sanitize_app(app, os)
+                        for app in reader.read_installed())
+            try:
+                for app in apps:
+                    found.add(tuple(app))
+                    yield app
+                return
+            except sqlite3.Error as ex:
+                print(f"Error: unable to read the RPM database ({ex}), "
+                      "using rpm instead")
+
+        for line in self.__stream_command(
             [
                 "rpm",
                 "-qa",
@@ -74,36 +140,56 @@ class AppsFound:
                 "%{NAME}\
     |%{VENDOR}|%{VERSION}\
     |%{ARCH}\n",
-            ],
-            check=False,
-            capture_output=True,
-            text=True,
-        )
-        for line in result.stdout.splitlines():
+            ]
+        ):
             info = line.split("|")
             list_info: "list[str]" = []
             for data in info:
                 list_info.append(data.strip(" "))
-            apps.append(list_info)
-        return apps
+            app = self.sanitize_app(list_info, os)
+            if tuple(app) not in found:
+                yield app
+
+    def __stream_command(self, command: "list[str]") -> "Iterator[str]":
+        """Runs a package manager command and yields each line of its
+        output as soon as it is written, without waiting for the command
+        to finish."""
+        with subprocess.Popen(
+            command,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            text=True,
+        ) as process:
+            for line in process.stdout:
+                yield line.rstrip("\n")
+
+    def iter_apps(self, os: str, rebuild: bool = False
+                  ) -> "Iterator[list[str]]":
+        """This method uses the package manager of the operating system
+        to enumerate the installed applications, yielding each one as soon
+        as it is read and sanitized. When an inventory cache is configured,
+        an unchanged package database is served from it, unless "rebuild"
+        is requested."""
+        if os == "enterprise":
+            yield from self.__get_installed_apps_rhel(os, rebuild)
+        elif os == "ubuntu" or os == "debian":
+            yield from self.__get_installed_apps_debian(os, rebuild)
 
-    def locate_apps(self, os: str):
+    def locate_apps(self, os: str, rebuild: bool = False):
         """This method uses the package manager of the operating system
         to obtain a list of installed applications and separates the name
         and version. Only software installed by the package managers of each
         operating system is detected, while other manually installed or
         third-party software is not detected in this version of the software.
         """
-
-        apps: "list[list[str]]" = []
-
-        if os == "enterprise":
-            apps = self.__get_installed_apps_rhel()
-        elif os == "ubuntu" or os == "debian":
-            apps = self.__get_installed_apps_debian()
-
-        # Exclude vendor information and sanitize version
-        for app in apps:
+        return list(self.iter_apps(os, rebuild))
+
+    def sanitize_app(
+        self, app: "Optional[list[str]]", os: str
+    ) -> "Optional[list[str]]":
+        """Excludes the vendor information and sanitizes the product name
+        and version of a software found by the package manager."""
+        if app is not None:
             # Cleaning unwanted characters for WEB URL in version part in CPE
             app[2] = self.sanitize_cpe_chunk(app[2])
             # Cleaning unwanted characters for WEB URL in product part in CPE
@@ -118,7 +204,7 @@ class AppsFound:
             else:
                 app[1] = f"{os}-tag_rec-app"
 
-        return apps
+        return app
 
     def sanitize_cpe_chunk(self, chunk: str) -> str:
         """
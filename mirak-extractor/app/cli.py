@@ -21,6 +21,7 @@ This file contains the functions that allow initializing the CLI interface and
 the main flow of the artifacts.
 """
 
+from typing import Optional
 import typer
 from app.main_process import Process
 
@@ -29,15 +30,104 @@ app = typer.Typer()
 
 @app.command()
 def cli_start(
-    output: str = typer.Option("./mirak.json", envvar="MIRAK_OUTPUT_REPORT")
+    output: str = typer.Option("./mirak.json", envvar="MIRAK_OUTPUT_REPORT"),
+    rebuild_inventory: bool = typer.Option(
+        False, "--rebuild-inventory", envvar="MIRAK_REBUILD_INVENTORY"
+    ),
+    cache_dir: Optional[str] = typer.Option(None, envvar="MIRAK_CACHE_DIR"),
+    metrics_textfile: Optional[str] = typer.Option(
+        None, envvar="MIRAK_METRICS_TEXTFILE"
+    ),
+    telemetry_window: float = typer.Option(
+        0.0, envvar="MIRAK_TELEMETRY_WINDOW"
+    ),
+    telemetry_interval: float = typer.Option(
+        1.0, envvar="MIRAK_TELEMETRY_INTERVAL", min=0.001
+    ),
+    listener_window: float = typer.Option(
+        0.0, envvar="MIRAK_LISTENER_WINDOW"
+    ),
+    listener_interval: float = typer.Option(
+        0.1, envvar="MIRAK_LISTENER_INTERVAL", min=0.001
+    ),
+    probe_services: bool = typer.Option(
+        False, "--probe-services", envvar="MIRAK_PROBE_SERVICES"
+    ),
+    probe_timeout: float = typer.Option(1.0, envvar="MIRAK_PROBE_TIMEOUT"),
+    probe_concurrency: int = typer.Option(
+        64, envvar="MIRAK_PROBE_CONCURRENCY"
+    ),
+    probe_rtr: bool = typer.Option(
+        False, "--probe-rtr", envvar="MIRAK_PROBE_RTR"
+    ),
+    rtr_timeout: float = typer.Option(10.0, envvar="MIRAK_RTR_TIMEOUT"),
+    analyze_vrps: bool = typer.Option(
+        False, "--analyze-vrps", envvar="MIRAK_ANALYZE_VRPS"
+    ),
+    vrp_format: str = typer.Option("csv", envvar="MIRAK_VRP_FORMAT"),
+    http_timeout: float = typer.Option(10.0, envvar="MIRAK_HTTP_TIMEOUT"),
+    scrape_metrics: bool = typer.Option(
+        False, "--scrape-metrics", envvar="MIRAK_SCRAPE_METRICS"
+    ),
+    audit_trees: bool = typer.Option(
+        False, "--audit-trees", envvar="MIRAK_AUDIT_TREES"
+    ),
+    audit_workers: Optional[int] = typer.Option(
+        None, envvar="MIRAK_AUDIT_WORKERS"
+    ),
+    repository_stats: bool = typer.Option(
+        False, "--repository-stats", envvar="MIRAK_REPOSITORY_STATS"
+    ),
+    repository_workers: Optional[int] = typer.Option(
+        None, envvar="MIRAK_REPOSITORY_WORKERS"
+    ),
+    extra_collectors: bool = typer.Option(
+        False, "--extra-collectors", envvar="MIRAK_EXTRA_COLLECTORS"
+    ),
 ):
     """
     This function loads the information received from the user to start the
     main process. If there is no information, the directory where the function
     starts and the file named mirak will be used. It also receives the
-    information through environment variables.
+    information through environment variables. The package inventory is
+    cached between executions and "--rebuild-inventory" discards the cache.
+    The cost of each stage can also be written, in the OpenMetrics format,
+    to a node_exporter textfile given by "--metrics-textfile". The
+    resources used by Routinator are sampled for "--telemetry-window"
+    seconds, one sample every "--telemetry-interval" seconds, and the
+    accept queue and clients of the listening sockets are sampled in the
+    same way with "--listener-window" and "--listener-interval". With
+    "--probe-services", the listening ports are probed to identify the
+    service behind each one, and "--probe-rtr" measures how fast the
+    "rtr-listen" endpoints of Routinator deliver the VRPs. The VRPs
+    exported by its "http-listen" endpoint ("--vrp-format" csv or json)
+    are analysed with "--analyze-vrps", and its Prometheus metrics are
+    summarized with "--scrape-metrics". "--audit-trees" audits the
+    permissions of every entry of the trees used by Routinator, and
+    "--repository-stats" counts the objects of each repository it keeps.
+    The software installed with snap, flatpak, pip and cargo is added to
+    the applications with "--extra-collectors".
     """
-    core = Process()
+    core = Process(rebuild_inventory, cache_dir,
+                   metrics_textfile=metrics_textfile,
+                   telemetry_window=telemetry_window,
+                   telemetry_interval=telemetry_interval,
+                   listener_window=listener_window,
+                   listener_interval=listener_interval,
+                   probe_services=probe_services,
+                   probe_timeout=probe_timeout,
+                   probe_concurrency=probe_concurrency,
+                   probe_rtr=probe_rtr,
+                   rtr_timeout=rtr_timeout,
+                   analyze_vrps=analyze_vrps,
+                   vrp_format=vrp_format,
+                   http_timeout=http_timeout,
+                   scrape_metrics=scrape_metrics,
+                   audit_trees=audit_trees,
+                   audit_workers=audit_workers,
+                   repository_stats=repository_stats,
+                   repository_workers=repository_workers,
+                   extra_collectors=extra_collectors)
     core.start(output)
 
 
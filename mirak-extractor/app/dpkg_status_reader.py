@@ -0,0 +1,104 @@
+# ####################################################
+
+# This code is part of the "Mirak-extractor" software and, consequently, is
+# part of the "Mirak" project. It is expressly forbidden to copy, reproduce,
+# distribute or make available this code or parts thereof in isolation, except
+# under the terms expressly authorized by the rights holder.
+
+# The provision of the complete software must strictly follow the guidelines
+# established in the applicable license, as detailed in the license file
+# included in this repository. Any unauthorized use may result in sanctions
+# provided for in Brazilian law, including, but not limited to,
+# Law No. 9.610/1998 (Copyright Law).
+
+# For more information or specific requests, please contact the holder through
+# the contact details present in the license file.
+
+# ####################################################
+
+"""
+This module contains the "DpkgStatusReader" class, which reads the dpkg
+status database of Debian and Ubuntu hosts directly, without depending on
+the "dpkg-query" tool.
+"""
+
+import mmap
+import os
+from typing import Iterator, Optional, Tuple
+
+
+class DpkgStatusReader:
+    """Reads the dpkg status database ("/var/lib/dpkg/status") in process.
+    The file is memory-mapped and traversed stanza by stanza, and only the
+    fields required by the extractor are decoded."""
+
+    DEFAULT_PATH = "/var/lib/dpkg/status"
+    # End of the status of an installed package, whatever its selection
+    # ("install", "hold", "deinstall" or "purge")
+    INSTALLED = b"ok installed"
+    __FIELDS = {
+        b"Package": 0,
+        b"Maintainer": 1,
+        b"Version": 2,
+        b"Architecture": 3,
+        b"Status": 4,
+    }
+
+    def __init__(self, path: str = DEFAULT_PATH) -> None:
+        self.path = path
+
+    def is_available(self) -> bool:
+        """Checks whether the status database exists and can be read"""
+        return os.access(self.path, os.R_OK)
+
+    def iter_stanzas(self) -> "Iterator[Tuple[int, bytes]]":
+        """Yields the byte offset and the raw content of each stanza of
+        the status database. Stanzas are separated by blank lines."""
+        with open(self.path, "rb") as file:
+            if os.fstat(file.fileno()).st_size == 0:
+                return
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                size = len(data)
+                start = 0
+                while start < size:
+                    # Skips the blank lines between stanzas
+                    while start < size and data[start] == 0x0A:
+                        start += 1
+                    if start >= size:
+                        break
+                    end = data.find(b"\n\n", start)
+                    if end == -1:
+                        end = size
+                    yield start, data[start:end]
+                    start = end + 2
+
+    def parse_stanza(self, stanza: bytes) -> "Optional[list[str]]":
+        """Extracts the package name, maintainer, version and architecture
+        of a stanza. Returns None if the package is not installed (its
+        status does not end in "ok installed")."""
+        values: "list[Optional[bytes]]" = [None, None, None, None, None]
+        for line in stanza.split(b"\n"):
+            # Continuation lines of multi-line fields are not needed
+            if not line or line[0] in (0x20, 0x09):
+                continue
+            name, _, value = line.partition(b":")
+            index = self.__FIELDS.get(name)
+            if index is not None:
+                values[index] = value.strip()
+
+        status = values[4] or b""
+        if status.split(b" ", 1)[-1] != self.INSTALLED or not values[0]:
+            return None
+        return [
+            (value or b"").decode("utf-8", errors="replace")
+            for value in values[:4]
+        ]
+
+    def read_installed(self) -> "Iterator[list[str]]":
+        """Yields the package name, maintainer, version and architecture of
+        every installed package, in the same format produced by
+        "dpkg-query -W"."""
+        for _, stanza in self.iter_stanzas():
+            app = self.parse_stanza(stanza)
+            if app is not None:
+                yield app
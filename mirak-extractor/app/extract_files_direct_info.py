@@ -1,7 +1,8 @@
 import os
 import stat
-import pwd
-import grp
+from typing import Optional
+from app.ancestor_chain import AncestorChain
+from app.identity_resolver import IdentityResolver
 
 
 class ExtractFilesDirectoriesInfo:
@@ -47,6 +48,14 @@ class ExtractFilesDirectoriesInfo:
         ]
     """
 
+    def __init__(self, chain: Optional[AncestorChain] = None,
+                 identities: Optional[IdentityResolver] = None) -> None:
+        # The parent directories are shared by most paths, so their
+        # permissions are checked once
+        self.chain = chain or AncestorChain()
+        # The same for the names of the owners
+        self.identities = identities or IdentityResolver()
+
     def __get_file_info(self, path: str) -> "dict":
         """
         Collects information about a file or directory.
@@ -63,6 +72,7 @@ class ExtractFilesDirectoriesInfo:
               - 'fileName' (str): The file or directory name
               - 'permission' (dict): Permission details
               - 'owner' (dict): Contains 'user' and 'group'
+              - 'ancestors' (dict): The weakest directory above the path
 
     Raises:
         FileNotFoundError: If the provided path does not exist.
@@ -81,10 +91,10 @@ class ExtractFilesDirectoriesInfo:
             permissions = str(oct(stat.S_IMODE(file_stat.st_mode))[-3:])
 
             # User of the file/directory owner.
-            user_owner_name = pwd.getpwuid(file_stat.st_uid).pw_name
+            user_owner_name = self.identities.user(file_stat.st_uid)
             
             # Group of the file/directory owner.
-            group_owner_name = grp.getgrgid(file_stat.st_gid).gr_name
+            group_owner_name = self.identities.group(file_stat.st_gid)
             
             dict_owner = {
                 "user": user_owner_name,
@@ -95,7 +105,9 @@ class ExtractFilesDirectoriesInfo:
                 "owner": int(permissions[0]),
                 "others": int(permissions[2]),
             }
-            return {"type": tipo, "fileName": path, "permission": dict_perm, "owner": dict_owner}
+            return {"type": tipo, "fileName": path,
+                    "permission": dict_perm, "owner": dict_owner,
+                    "ancestors": self.chain.weakest_link(path)}
 
         except FileNotFoundError:
             print(f"O caminho {path} não foi encontrado.")
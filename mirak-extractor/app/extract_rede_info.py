@@ -21,35 +21,259 @@
 """
 
 
+import math
 import socket
+import time
+from typing import Dict, List, Optional, Tuple
 import psutil
+from app.file_owner_index import FileOwnerIndex
+from app.proc_net_reader import Listener, ProcNetReader, SocketKey
+from app.process_snapshot import ProcessSnapshot
+from app.sock_diag import SockDiagReader
 
 
 class ExtractRedeInfo:
     """The class implements methods that extract relevant information from the
     host about network communication."""
 
+    def __init__(
+        self,
+        proc_root: str = ProcNetReader.DEFAULT_ROOT,
+        include_udp: bool = False,
+        use_netlink: bool = True,
+        snapshot: Optional[ProcessSnapshot] = None
+    ) -> None:
+        self.proc_net = ProcNetReader(proc_root)
+        # Process table shared with the other stages of the extraction
+        self.snapshot = snapshot or ProcessSnapshot(proc_root)
+        self.sock_diag = SockDiagReader() if use_netlink else None
+        # UDP sockets are not reported by default, as with psutil
+        self.include_udp = include_udp
+        # Process of each port found by "extract_ports"
+        self.pids_by_port: "dict[int, Optional[int]]" = {}
+
+    def __find_listeners(self) -> "Optional[list[Listener]]":
+        """Returns the listening sockets of the host. The TCP sockets are
+        requested to the kernel through netlink and, if it is not
+        available, read from "/proc/net". Returns None if neither can be
+        used."""
+        listeners: "Optional[list[Listener]]" = None
+        if self.sock_diag is not None:
+            try:
+                listeners = list(self.sock_diag.iter_listeners())
+            except OSError:
+                listeners = None
+        if listeners is None:
+            if not self.proc_net.is_available():
+                return None
+            listeners = list(
+                self.proc_net.iter_listeners(ProcNetReader.TCP_PROTOCOLS)
+            )
+        if self.include_udp:
+            listeners.extend(
+                self.proc_net.iter_listeners(ProcNetReader.UDP_PROTOCOLS)
+            )
+        return listeners
+
     def extract_ports(self) -> "tuple":
         """This method returns information about all ports in listening state.
         This information includes a list of ports and a dictionary that
-        describes the port and process relationship."""
+        describes the port and process relationship. Only the listening
+        sockets are read, through netlink or "/proc/net", and their owners
+        are found in the process snapshot; psutil is used when neither is
+        available."""
+        listeners = self.__find_listeners()
+        if listeners is None:
+            return self.__extract_ports_psutil()
         open_ports: "list[int]" = []
         ports_by_porcess_name: "dict[int, str]" = {}
+        for listener in listeners:
+            pid = self.snapshot.socket_owner(listener.inode) \
+                if listener.inode else None
+            self.pids_by_port[listener.port] = pid
+            open_ports.append(listener.port)
+            ports_by_porcess_name[listener.port] = \
+                self.snapshot.process_name(pid)
+        return tuple([open_ports, ports_by_porcess_name])
+
+    def __extract_ports_psutil(self) -> "tuple":
+        """Returns the ports in listening state and their processes using
+        "psutil", which lists every connection of the host. The name of
+        each process is looked up once."""
+        open_ports: "list[int]" = []
+        ports_by_porcess_name: "dict[int, str]" = {}
+        names: "dict[int, str]" = {}
         # Get all connections
         connections = psutil.net_connections()
         # Filter connections in 'LISTEN' state
         for conn in connections:
             if conn.status == "LISTEN":
                 pid = conn.pid  # Get the process identifier
-                process_name = psutil.Process(pid).name() if pid else "N/A"
+                if pid and pid not in names:
+                    names[pid] = psutil.Process(pid).name()
+                process_name = names[pid] if pid else "N/A"
                 if isinstance(conn.laddr, tuple):
                     port = conn.laddr[1]  # type: ignore
                 else:
                     port = conn.laddr.port
                 open_ports.append(port)
                 ports_by_porcess_name[int(port)] = process_name
+                self.pids_by_port[int(port)] = pid
         return tuple([open_ports, ports_by_porcess_name])
 
+    def listening_endpoints(self) -> "List[Tuple[str, int]]":
+        """Returns the address and port of the listening TCP sockets, one
+        per port (IPv4 first), to be probed. Empty if the listeners can
+        not be read."""
+        endpoints: "Dict[int, str]" = {}
+        for listener in self.__find_listeners() or []:
+            if listener.protocol in ProcNetReader.TCP_PROTOCOLS:
+                endpoints.setdefault(listener.port, listener.address)
+        return [(address, port) for port, address in endpoints.items()]
+
+    def extract_ports_owned_by(
+        self, index: Optional[FileOwnerIndex]
+    ) -> "dict[int, dict]":
+        """Returns, for each port found by "extract_ports", the process that
+        listens on it, its executable and the package that installed the
+        executable. "packaged" is False for a binary that no package owns,
+        such as a Routinator built by hand, and None when the executable of
+        the process can not be read."""
+        ports_owned_by: "dict[int, dict]" = {}
+        for port, pid in self.pids_by_port.items():
+            info = self.snapshot.process(pid) if pid else None
+            executable = info.exe if info is not None and info.exe else None
+            package = index.owner(executable) \
+                if executable and index is not None else None
+            ports_owned_by[port] = {
+                "process": self.snapshot.process_name(pid),
+                "executable": executable,
+                "package": package,
+                "packaged": package is not None if executable else None,
+            }
+        return ports_owned_by
+
+    @staticmethod
+    def parse_endpoint(endpoint: str) -> "Optional[Tuple[str, int]]":
+        """Splits a listen address of the Routinator configuration, such as
+        "127.0.0.1:3323" or "[::1]:3323", into its address and port"""
+        address, _, port = endpoint.rpartition(":")
+        if not address or not port.isdigit():
+            return None
+        return address.strip("[]"), int(port)
+
+    @staticmethod
+    def percentiles(values: "List[int]") -> "Dict[str, int]":
+        """Summarizes samples with nearest-rank percentiles"""
+        ordered = sorted(values)
+        summary = {}
+        for name, percent in (("p50", 50), ("p90", 90), ("p99", 99)):
+            rank = max(1, math.ceil(percent / 100 * len(ordered)))
+            summary[name] = ordered[rank - 1]
+        summary["max"] = ordered[-1]
+        return summary
+
+    @staticmethod
+    def __role(listener: Listener,
+               endpoints: "Dict[str, List[Tuple[str, int]]]"
+               ) -> "Optional[str]":
+        """Returns the role ("rtr", "http") of a listener whose address is
+        in the Routinator configuration. A wildcard address, on either
+        side, matches every address of the port."""
+        wildcards = ("0.0.0.0", "::")
+        for role, addresses in endpoints.items():
+            for address, port in addresses:
+                if port == listener.port and (
+                        address == listener.address or
+                        address in wildcards or
+                        listener.address in wildcards):
+                    return role
+        return None
+
+    def __read_backlogs(self) -> "Dict[SocketKey, int]":
+        """Returns the backlog of each listening socket. Only netlink
+        reports it, so it is empty when netlink is not available."""
+        queues: "Dict[SocketKey, Tuple[int, int]]" = {}
+        if self.sock_diag is not None:
+            try:
+                for _ in self.sock_diag.iter_listeners(queues):
+                    pass
+            except OSError:
+                return {}
+        return {key: backlog for key, (_, backlog) in queues.items()}
+
+    def sample_listener_load(
+        self,
+        endpoints: "Optional[Dict[str, List[str]]]" = None,
+        window: float = 1.0,
+        interval: float = 0.1
+    ) -> "List[dict]":
+        """Samples, during the window, the accept queue of each listening
+        TCP socket and the number of clients connected to it, and returns
+        their percentiles. A growing accept queue shows a listener that
+        does not accept its clients fast enough. The listeners given in
+        "endpoints" (e.g. {"rtr": ["127.0.0.1:3323"]}) are tagged with
+        their role. A client is counted for the listener of its address
+        or, if there is none, for the wildcard listener of its port. The
+        interval must be positive."""
+        if interval <= 0:
+            raise ValueError(f"invalid sampling interval {interval}")
+        if not self.proc_net.is_available():
+            return []
+        listeners = [
+            listener for listener in self.__find_listeners() or []
+            if listener.protocol in ProcNetReader.TCP_PROTOCOLS
+        ]
+        if not listeners:
+            return []
+        keys = {(listener.protocol, listener.address, listener.port)
+                for listener in listeners}
+        ports = {listener.port for listener in listeners}
+        queues: "Dict[SocketKey, List[int]]" = {key: [] for key in keys}
+        clients: "Dict[SocketKey, List[int]]" = {key: [] for key in keys}
+        deadline = time.monotonic() + window
+        next_sample = time.monotonic()
+        while True:
+            accept_queues, connected = self.proc_net.read_listener_load(ports)
+            counts = dict.fromkeys(keys, 0)
+            for key, count in connected.items():
+                if key not in counts:
+                    protocol, _, port = key
+                    key = (protocol,
+                           "0.0.0.0" if protocol == "tcp" else "::", port)
+                if key in counts:
+                    counts[key] += count
+            for key in keys:
+                queues[key].append(accept_queues.get(key, 0))
+                clients[key].append(counts[key])
+            next_sample += interval
+            if next_sample > deadline:
+                break
+            time.sleep(max(0.0, next_sample - time.monotonic()))
+
+        configured = {
+            role: [parsed for parsed in map(self.parse_endpoint, addresses)
+                   if parsed is not None]
+            for role, addresses in (endpoints or {}).items()
+        }
+        backlogs = self.__read_backlogs()
+        load = []
+        for listener in sorted(listeners,
+                               key=lambda item: (item.port, item.protocol,
+                                                 item.address)):
+            key = (listener.protocol, listener.address, listener.port)
+            load.append({
+                "protocol": listener.protocol,
+                "address": listener.address,
+                "port": listener.port,
+                "role": self.__role(listener, configured),
+                "backlog": backlogs.get(key),
+                "samples": len(queues[key]),
+                "acceptQueue": self.percentiles(queues[key]),
+                "clients": self.percentiles(clients[key]),
+            })
+        return load
+
     def extract_ip(self) -> str:
         """
         Returns the first valid IPv4 address of the host machine.
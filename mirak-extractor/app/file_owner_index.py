@@ -0,0 +1,265 @@
+# ####################################################
+
+# This code is part of the "Mirak-extractor" software and, consequently, is
+# part of the "Mirak" project. It is expressly forbidden to copy, reproduce,
+# distribute or make available this code or parts thereof in isolation, except
+# under the terms expressly authorized by the rights holder.
+
+# The provision of the complete software must strictly follow the guidelines
+# established in the applicable license, as detailed in the license file
+# included in this repository. Any unauthorized use may result in sanctions
+# provided for in Brazilian law, including, but not limited to,
+# Law No. 9.610/1998 (Copyright Law).
+
+# For more information or specific requests, please contact the holder through
+# the contact details present in the license file.
+
+# ####################################################
+
+"""
+This module contains the "FileOwnerIndex" class, which maps the files of
+the host to the dpkg or rpm package that installed them, so that the
+binaries of the running processes can be attributed to a package.
+"""
+
+import glob
+import json
+import mmap
+import os
+import struct
+from typing import Iterator, List, Optional, Tuple, Union
+from app.dpkg_status_reader import DpkgStatusReader
+from app.inventory_cache import InventoryCache
+from app.rpm_db_reader import RpmDbReader
+
+
+class FileOwnerIndex:
+    """Sorted index of the files owned by each package, stored in the cache
+    directory and memory-mapped. The file holds a header, the signature of
+    the package database it was built from, a table of fixed-size entries
+    (path offset, path length and package number) sorted by path, the
+    table of package names and the strings themselves, so that a lookup is
+    a binary search over the mapped file. The index is rebuilt only when
+    the signature of the package database changes."""
+
+    DPKG_INFO_DIR = "/var/lib/dpkg/info"
+    FILE_NAME = "file-owners.idx"
+    MAGIC = b"MKFO"
+    VERSION = 1
+    # magic, version, signature length, number of entries and of packages
+    __HEADER = struct.Struct("<4sIIII")
+    __ENTRY = struct.Struct("<III")
+    __PACKAGE = struct.Struct("<II")
+    # Directories that "usr-merge" turns into links to "/usr"
+    __MERGED = ("/bin/", "/sbin/", "/lib/", "/lib32/", "/lib64/",
+                "/libx32/")
+
+    def __init__(
+        self,
+        cache_dir: Optional[str] = None,
+        dpkg_info_dir: str = DPKG_INFO_DIR,
+        dpkg_status_path: str = DpkgStatusReader.DEFAULT_PATH,
+        rpm_db_dirs: "Tuple[str, ...]" = RpmDbReader.DEFAULT_DIRS,
+    ) -> None:
+        directory = cache_dir or os.environ.get(
+            "MIRAK_CACHE_DIR", InventoryCache.DEFAULT_DIR
+        )
+        self.path = os.path.join(directory, self.FILE_NAME)
+        self.dpkg_info_dir = dpkg_info_dir
+        self.dpkg_status_path = dpkg_status_path
+        self.rpm_reader = RpmDbReader(rpm_db_dirs)
+        self.rebuilt = False
+        self.__data: "Optional[Union[bytes, mmap.mmap]]" = None
+        self.__entries = 0
+        self.__entries_at = 0
+        self.__packages_at = 0
+
+    def __signature(self) -> "Optional[bytes]":
+        """Returns the identity of the package database, or None if there
+        is no database. For dpkg, the "info" directory changes whenever a
+        package is installed or removed."""
+        if os.path.isdir(self.dpkg_info_dir):
+            identity: list = ["dpkg", os.stat(self.dpkg_info_dir).st_mtime_ns]
+            if os.path.isfile(self.dpkg_status_path):
+                identity.append(
+                    InventoryCache.file_identity(self.dpkg_status_path)
+                )
+        else:
+            database = self.rpm_reader.locate_database()
+            if database is None:
+                return None
+            identity = ["rpm", database[1],
+                        InventoryCache.source_identity(database[1])]
+        return json.dumps(identity).encode("utf8")
+
+    def __iter_dpkg_files(self) -> "Iterator[Tuple[str, bytes]]":
+        """Yields the package and path of each file listed in the dpkg
+        "<package>[:<arch>].list" files"""
+        for path in sorted(glob.glob(os.path.join(self.dpkg_info_dir,
+                                                  "*.list"))):
+            package = os.path.basename(path)[:-5].split(":", 1)[0]
+            try:
+                with open(path, "rb") as file:
+                    for line in file:
+                        line = line.rstrip(b"\n")
+                        if line and line != b"/.":
+                            yield package, line
+            except OSError:
+                continue
+
+    def __iter_rpm_files(self) -> "Iterator[Tuple[str, bytes]]":
+        """Yields the package and path of each file of the RPM headers"""
+        for _, blob in self.rpm_reader.iter_headers():
+            files = self.rpm_reader.parse_files(blob)
+            if files is None:
+                continue
+            package, paths = files
+            for path in paths:
+                yield package, path.encode("utf8", errors="surrogateescape")
+
+    def build(self, signature: bytes) -> bytes:
+        """Builds the index of the package database. A path owned by more
+        than one package (usually a directory) keeps its first owner."""
+        files = self.__iter_dpkg_files() if signature.startswith(b'["dpkg"') \
+            else self.__iter_rpm_files()
+        packages: "dict[str, int]" = {}
+        owners: "dict[bytes, int]" = {}
+        for package, path in files:
+            number = packages.setdefault(package, len(packages))
+            owners.setdefault(path, number)
+
+        strings = bytearray()
+        names: "List[Tuple[int, int]]" = []
+        for package in packages:
+            encoded = package.encode("utf8")
+            names.append((len(strings), len(encoded)))
+            strings += encoded
+        entries: "List[Tuple[int, int, int]]" = []
+        for path in sorted(owners):
+            entries.append((len(strings), len(path), owners[path]))
+            strings += path
+
+        strings_at = self.__HEADER.size + len(signature) + \
+            len(entries) * self.__ENTRY.size + len(names) * self.__PACKAGE.size
+        output = bytearray(self.__HEADER.pack(
+            self.MAGIC, self.VERSION, len(signature), len(entries),
+            len(names)
+        ))
+        output += signature
+        for offset, length, number in entries:
+            output += self.__ENTRY.pack(strings_at + offset, length, number)
+        for offset, length in names:
+            output += self.__PACKAGE.pack(strings_at + offset, length)
+        output += strings
+        return bytes(output)
+
+    def __load(self, data: "Union[bytes, mmap.mmap]",
+               signature: bytes) -> bool:
+        """Uses an index if it was built from the given signature"""
+        if len(data) < self.__HEADER.size:
+            return False
+        magic, version, length, entries, _ = self.__HEADER.unpack_from(data)
+        start = self.__HEADER.size
+        if magic != self.MAGIC or version != self.VERSION or \
+                data[start:start + length] != signature:
+            return False
+        self.__data = data
+        self.__entries = entries
+        self.__entries_at = start + length
+        self.__packages_at = self.__entries_at + entries * self.__ENTRY.size
+        return True
+
+    def __map(self, signature: bytes) -> bool:
+        """Memory-maps the stored index, if it is up to date"""
+        try:
+            with open(self.path, "rb") as file:
+                if os.fstat(file.fileno()).st_size == 0:
+                    return False
+                data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        except OSError:
+            return False
+        if self.__load(data, signature):
+            return True
+        data.close()
+        return False
+
+    def open(self, rebuild: bool = False) -> bool:
+        """Prepares the index, building it again if the package database
+        changed or if "rebuild" is set. Returns False if there is no
+        package database. When the cache directory can not be written,
+        the index is kept in memory."""
+        self.close()
+        signature = self.__signature()
+        if signature is None:
+            return False
+        if not rebuild and self.__map(signature):
+            return True
+        data = self.build(signature)
+        self.rebuilt = True
+        temporary = f"{self.path}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with open(temporary, "wb") as file:
+                file.write(data)
+            os.replace(temporary, self.path)
+        except OSError:
+            return self.__load(data, signature)
+        return self.__map(signature) or self.__load(data, signature)
+
+    def close(self) -> None:
+        """Releases the mapped index"""
+        if isinstance(self.__data, mmap.mmap):
+            self.__data.close()
+        self.__data = None
+        self.__entries = 0
+
+    def __len__(self) -> int:
+        return self.__entries
+
+    def __path(self, position: int) -> bytes:
+        offset, length, _ = self.__ENTRY.unpack_from(
+            self.__data, self.__entries_at + position * self.__ENTRY.size
+        )
+        return self.__data[offset:offset + length]  # type: ignore
+
+    def lookup(self, path: str) -> "Optional[str]":
+        """Returns the package that owns a path, with a binary search"""
+        if self.__data is None:
+            return None
+        wanted = path.encode("utf8", errors="surrogateescape")
+        low, high = 0, self.__entries
+        while low < high:
+            middle = (low + high) // 2
+            if self.__path(middle) < wanted:
+                low = middle + 1
+            else:
+                high = middle
+        if low == self.__entries or self.__path(low) != wanted:
+            return None
+        _, _, number = self.__ENTRY.unpack_from(
+            self.__data, self.__entries_at + low * self.__ENTRY.size
+        )
+        offset, length = self.__PACKAGE.unpack_from(
+            self.__data, self.__packages_at + number * self.__PACKAGE.size
+        )
+        name = self.__data[offset:offset + length]  # type: ignore
+        return name.decode("utf8")
+
+    def owner(self, executable: str) -> "Optional[str]":
+        """Returns the package that owns an executable. The path reported
+        by the kernel is resolved, while the package lists may use the
+        directories merged into "/usr", so both spellings are tried. A
+        binary replaced by an upgrade is reported with " (deleted)"."""
+        if executable.endswith(" (deleted)"):
+            executable = executable[:-10]
+        candidates = [executable]
+        if executable.startswith("/usr/") and \
+                executable[4:].startswith(self.__MERGED):
+            candidates.append(executable[4:])
+        elif executable.startswith(self.__MERGED):
+            candidates.append("/usr" + executable)
+        for candidate in candidates:
+            package = self.lookup(candidate)
+            if package is not None:
+                return package
+        return None
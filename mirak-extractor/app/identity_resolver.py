@@ -0,0 +1,102 @@
+# ####################################################
+
+# This code is part of the "Mirak-extractor" software and, consequently, is
+# part of the "Mirak" project. It is expressly forbidden to copy, reproduce,
+# distribute or make available this code or parts thereof in isolation, except
+# under the terms expressly authorized by the rights holder.
+
+# The provision of the complete software must strictly follow the guidelines
+# established in the applicable license, as detailed in the license file
+# included in this repository. Any unauthorized use may result in sanctions
+# provided for in Brazilian law, including, but not limited to,
+# Law No. 9.610/1998 (Copyright Law).
+
+# For more information or specific requests, please contact the holder through
+# the contact details present in the license file.
+
+# ####################################################
+
+"""
+This module contains the "IdentityResolver" class, which gives the names of
+the users and groups that own the audited files.
+"""
+
+import grp
+import os
+import pwd
+import threading
+from typing import Callable, Dict, Optional
+
+
+class IdentityResolver:
+    """Resolves uids and gids to names. The local databases (/etc/passwd
+    and /etc/group) are read once, on the first lookup; only the ids they
+    do not know go through NSS (LDAP, SSSD), once each, and the ids NSS does
+    not know either are cached as well. An unknown id is reported as
+    "N/A" instead of raising KeyError."""
+
+    UNKNOWN = "N/A"
+
+    def __init__(self, root: str = "/") -> None:
+        self.root = root
+        self.__users: "Optional[Dict[int, str]]" = None
+        self.__groups: "Optional[Dict[int, str]]" = None
+        self.__lock = threading.Lock()
+        # Ids that needed NSS, for the stage metrics
+        self.lookups = 0
+
+    @staticmethod
+    def parse(path: str) -> "Dict[int, str]":
+        """Reads a database in the format of /etc/passwd or /etc/group
+        ("name:password:id:..."); the first name of an id wins, as with
+        NSS. A missing file gives an empty database."""
+        names: "Dict[int, str]" = {}
+        try:
+            with open(path, "r", encoding="utf8", errors="replace") as file:
+                for line in file:
+                    fields = line.split(":", 3)
+                    if len(fields) < 3 or line.startswith("#") or \
+                            not fields[2].isdigit():
+                        continue
+                    names.setdefault(int(fields[2]), fields[0])
+        except OSError:
+            pass
+        return names
+
+    def __load(self) -> None:
+        with self.__lock:
+            if self.__users is None:
+                self.__users = self.parse(
+                    os.path.join(self.root, "etc", "passwd"))
+                self.__groups = self.parse(
+                    os.path.join(self.root, "etc", "group"))
+
+    def __resolve(self, names: "Dict[int, str]", number: int,
+                  lookup: "Callable[[int], str]") -> str:
+        name = names.get(number)
+        if name is not None:
+            return name
+        with self.__lock:
+            name = names.get(number)
+            if name is None:
+                self.lookups += 1
+                try:
+                    name = lookup(number)
+                except (KeyError, OverflowError, OSError):
+                    name = self.UNKNOWN
+                names[number] = name
+        return name
+
+    def user(self, uid: int) -> str:
+        """Returns the name of a user, or "N/A" if it is unknown"""
+        if self.__users is None:
+            self.__load()
+        return self.__resolve(self.__users, uid,  # type: ignore
+                              lambda number: pwd.getpwuid(number).pw_name)
+
+    def group(self, gid: int) -> str:
+        """Returns the name of a group, or "N/A" if it is unknown"""
+        if self.__groups is None:
+            self.__load()
+        return self.__resolve(self.__groups, gid,  # type: ignore
+                              lambda number: grp.getgrgid(number).gr_name)
@@ -0,0 +1,229 @@
+# ####################################################
+
+# This code is part of the "Mirak-extractor" software and, consequently, is
+# part of the "Mirak" project. It is expressly forbidden to copy, reproduce,
+# distribute or make available this code or parts thereof in isolation, except
+# under the terms expressly authorized by the rights holder.
+
+# The provision of the complete software must strictly follow the guidelines
+# established in the applicable license, as detailed in the license file
+# included in this repository. Any unauthorized use may result in sanctions
+# provided for in Brazilian law, including, but not limited to,
+# Law No. 9.610/1998 (Copyright Law).
+
+# For more information or specific requests, please contact the holder through
+# the contact details present in the license file.
+
+# ####################################################
+
+"""
+This module contains the "Inventory" class, a compact columnar
+representation of the software found on the host, shared by the "Apps" and
+"Report" classes.
+"""
+
+import json
+import threading
+from array import array
+from collections.abc import Mapping, Sequence
+from typing import Any, Iterator, Optional
+
+
+def _encode(value: Any) -> str:
+    """Encodes a single value in JSON, as "json.dump" does"""
+    if isinstance(value, str):
+        return json.encoder.encode_basestring(value)  # type: ignore
+    return json.dumps(value, ensure_ascii=False)
+
+
+class StringTable:
+    """Stores each distinct value once and maps it to an integer code. The
+    JSON encoding of each value is also kept, so that it is computed once."""
+
+    def __init__(self) -> None:
+        self.__codes: "dict[Any, int]" = {}
+        self.__values: "list[Any]" = []
+        self.__encoded: "list[Optional[str]]" = []
+        self.__lock = threading.Lock()
+
+    def code(self, value: Any) -> int:
+        """Returns the code of a value, adding it to the table if needed"""
+        code = self.__codes.get(value)
+        if code is None:
+            with self.__lock:
+                code = self.__codes.get(value)
+                if code is None:
+                    code = len(self.__values)
+                    self.__values.append(value)
+                    self.__encoded.append(None)
+                    self.__codes[value] = code
+        return code
+
+    def value(self, code: int) -> Any:
+        """Returns the value of a code"""
+        return self.__values[code]
+
+    def encoded(self, code: int) -> str:
+        """Returns the JSON encoding of the value of a code"""
+        encoded = self.__encoded[code]
+        if encoded is None:
+            encoded = _encode(self.__values[code])
+            self.__encoded[code] = encoded
+        return encoded
+
+
+# Table shared by every inventory, so that repeated values such as
+# "debian-tag_rec-app" are stored only once in the whole process
+SHARED_STRINGS = StringTable()
+
+
+class InventoryRow(Mapping):
+    """Read-only view of one software of an inventory. It behaves like the
+    dictionary that used to represent the software, without storing it."""
+
+    __slots__ = ("__inventory", "__index")
+
+    def __init__(self, inventory: "Inventory", index: int) -> None:
+        self.__inventory = inventory
+        self.__index = index
+
+    def __getitem__(self, key: str) -> Any:
+        return self.__inventory.field(self.__index, key)
+
+    def __iter__(self) -> "Iterator[str]":
+        return iter(self.__inventory.keys)
+
+    def __len__(self) -> int:
+        return len(self.__inventory.keys)
+
+    def __repr__(self) -> str:
+        return repr(dict(self))
+
+
+class Inventory(Sequence):
+    """Columnar list of software. The type, vendor and architecture are
+    stored as codes of a shared string table, and the CPE name is only
+    stored when it can not be rebuilt from the other columns."""
+
+    KEYS = ("type", "vendor", "product", "version", "cpeName")
+    # Marks a CPE name that is stored as it was received
+    __VERBATIM = 0xFFFFFFFF
+
+    def __init__(
+        self, cpe_key: str = "cpeName", strings: StringTable = SHARED_STRINGS
+    ) -> None:
+        self.keys = self.KEYS[:4] + (cpe_key,)
+        self.strings = strings
+        self.__types = array("I")
+        self.__vendors = array("I")
+        self.__products: "list[Any]" = []
+        self.__versions: "list[Any]" = []
+        self.__archs = array("I")
+        self.__cpe_names: "dict[int, Any]" = {}
+
+    @staticmethod
+    def compose_cpe(part: Any, vendor: Any, product: Any, version: Any,
+                    arch: str) -> str:
+        """Builds the CPE 2.3 name of a software, as "Apps.parse_cpe" does"""
+        return f"cpe:2.3:{part}:{vendor}:{product}:{version}\
+:*:*:*:{arch}:*:*:*"
+
+    def append(self, _type: Any, vendor: Any, product: Any, version: Any,
+               cpe_name: Any) -> None:
+        """Adds a software to the inventory"""
+        index = len(self.__products)
+        self.__types.append(self.strings.code(_type))
+        self.__vendors.append(self.strings.code(vendor))
+        self.__products.append(product)
+        self.__versions.append(version)
+
+        arch = self.__VERBATIM
+        if isinstance(cpe_name, str) and cpe_name.count(":") == 12:
+            candidate = cpe_name.rsplit(":", 4)[1]
+            if cpe_name == self.compose_cpe(_type, vendor, product, version,
+                                            candidate):
+                arch = self.strings.code(candidate)
+        self.__archs.append(arch)
+        if arch == self.__VERBATIM:
+            self.__cpe_names[index] = cpe_name
+
+    def field(self, index: int, key: str) -> Any:
+        """Returns one field of a software, by its key"""
+        if key == self.keys[0]:
+            return self.strings.value(self.__types[index])
+        if key == self.keys[1]:
+            return self.strings.value(self.__vendors[index])
+        if key == self.keys[2]:
+            return self.__products[index]
+        if key == self.keys[3]:
+            return self.__versions[index]
+        if key == self.keys[4]:
+            return self.__cpe_name(index)
+        raise KeyError(key)
+
+    def __cpe_name(self, index: int) -> Any:
+        """Returns the CPE name of a software, rebuilding it if needed"""
+        arch = self.__archs[index]
+        if arch == self.__VERBATIM:
+            return self.__cpe_names[index]
+        return self.compose_cpe(
+            self.strings.value(self.__types[index]),
+            self.strings.value(self.__vendors[index]),
+            self.__products[index],
+            self.__versions[index],
+            self.strings.value(arch),
+        )
+
+    def find_type(self, _type: str) -> int:
+        """Returns the position of the first software of the given type,
+        or -1 if there is none"""
+        code = self.strings.code(_type)
+        try:
+            return self.__types.index(code)
+        except ValueError:
+            return -1
+
+    def __getitem__(self, index):  # type: ignore
+        if isinstance(index, slice):
+            return [self[position]
+                    for position in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("inventory index out of range")
+        return InventoryRow(self, index)
+
+    def __len__(self) -> int:
+        return len(self.__products)
+
+    def __repr__(self) -> str:
+        return "[" + ", ".join(repr(row) for row in self) + "]"
+
+    def to_list(self) -> "list[dict]":
+        """Returns the inventory as a list of dictionaries"""
+        return [dict(row) for row in self]
+
+    def iter_json(self, indent: int = 4, level: int = 1) -> "Iterator[str]":
+        """Yields the inventory encoded in JSON, one software at a time and
+        directly from the columns, with the same layout produced by
+        "json.dump" at the given indentation and nesting level. Values from
+        the string table are encoded once."""
+        if len(self) == 0:
+            yield "[]"
+            return
+        item_indent = "\n" + " " * (indent * (level + 1))
+        key_indent = "\n" + " " * (indent * (level + 2))
+        names = [key_indent + _encode(key) + ": " for key in self.keys]
+        strings = self.strings
+        yield "["
+        for index in range(len(self)):
+            yield "".join((
+                "," if index else "", item_indent, "{",
+                names[0], strings.encoded(self.__types[index]), ",",
+                names[1], strings.encoded(self.__vendors[index]), ",",
+                names[2], _encode(self.__products[index]), ",",
+                names[3], _encode(self.__versions[index]), ",",
+                names[4], _encode(self.__cpe_name(index)),
+                item_indent, "}",
+            ))
+        yield "\n" + " " * (indent * level) + "]"
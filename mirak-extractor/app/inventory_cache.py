@@ -0,0 +1,177 @@
+# ####################################################
+
+# This code is part of the "Mirak-extractor" software and, consequently, is
+# part of the "Mirak" project. It is expressly forbidden to copy, reproduce,
+# distribute or make available this code or parts thereof in isolation, except
+# under the terms expressly authorized by the rights holder.
+
+# The provision of the complete software must strictly follow the guidelines
+# established in the applicable license, as detailed in the license file
+# included in this repository. Any unauthorized use may result in sanctions
+# provided for in Brazilian law, including, but not limited to,
+# Law No. 9.610/1998 (Copyright Law).
+
+# For more information or specific requests, please contact the holder through
+# the contact details present in the license file.
+
+# ####################################################
+
+"""
+This module contains the "InventoryCache" class, which keeps the sanitized
+package inventory on disk between executions, so that an unchanged package
+database does not have to be parsed again.
+"""
+
+import hashlib
+import json
+import os
+from typing import Callable, Iterable, Iterator, Optional, Tuple
+
+
+class InventoryCache:
+    """Persists the package inventory keyed by the identity (inode, size
+    and modification time) of the package database file and of its SQLite
+    "-wal" and "-shm" files. Each record of the database (a dpkg stanza or
+    an RPM header) is indexed by its digest, so that when the database
+    changes every record is still read, but only the new or modified ones
+    are parsed again. The cache file is read once per execution.
+
+    The records are indexed by digest and not by byte offset: inserting or
+    removing a package moves the offsets of every record after it, and an
+    RPM database (SQLite, ndb or Berkeley DB) has no stable offsets at
+    all, so comparing offsets would still require reading the records.
+    Reading and hashing them is cheap next to parsing and sanitizing."""
+
+    VERSION = 2
+    # Files kept by SQLite next to a database in WAL mode; the committed
+    # transactions not yet checkpointed only change the "-wal" file
+    SQLITE_SUFFIXES = ("-wal", "-shm")
+    DEFAULT_DIR = os.path.join(os.path.expanduser("~"), ".cache",
+                               "mirak-extractor")
+
+    def __init__(self, directory: Optional[str] = None) -> None:
+        self.directory = directory or os.environ.get(
+            "MIRAK_CACHE_DIR", self.DEFAULT_DIR
+        )
+        self.path = os.path.join(self.directory, "inventory.json")
+        self.hits = 0
+        self.misses = 0
+        self.__data: "Optional[dict]" = None
+
+    @staticmethod
+    def file_identity(path: str) -> "list[int]":
+        """Returns the inode, size and modification time (in nanoseconds)
+        of a file, used to detect changes in the package database."""
+        info = os.stat(path)
+        return [info.st_ino, info.st_size, info.st_mtime_ns]
+
+    @classmethod
+    def source_identity(cls, path: str) -> "list":
+        """Returns the identity of a package database together with the
+        identity of its SQLite "-wal" and "-shm" files (None when they do
+        not exist)."""
+        identity: list = [cls.file_identity(path)]
+        for suffix in cls.SQLITE_SUFFIXES:
+            try:
+                identity.append(cls.file_identity(path + suffix))
+            except OSError:
+                identity.append(None)
+        return identity
+
+    def get_rows(
+        self,
+        source: str,
+        tag: str,
+        records: "Callable[[], Iterable[Tuple[int, bytes]]]",
+        parse: "Callable[[bytes], Optional[list[str]]]",
+        rebuild: bool = False,
+    ) -> "list[list[str]]":
+        """Returns the rows of the package database "source" as a list.
+        See "iter_rows"."""
+        return list(self.iter_rows(source, tag, records, parse, rebuild))
+
+    def iter_rows(
+        self,
+        source: str,
+        tag: str,
+        records: "Callable[[], Iterable[Tuple[int, bytes]]]",
+        parse: "Callable[[bytes], Optional[list[str]]]",
+        rebuild: bool = False,
+    ) -> "Iterator[list[str]]":
+        """Yields the rows of the package database "source". If the
+        database is unchanged since the last execution, the stored rows are
+        yielded without reading it. Otherwise, the records are read again
+        and only those whose digest is not in the stored index are parsed
+        (the key of each record is not used). The "tag" distinguishes
+        inventories parsed with different rules, and "rebuild" discards the
+        stored index. The index is only stored once every record has been
+        read."""
+        identity = self.source_identity(source)
+        entry = None if rebuild else self.__load_entry(source)
+        if entry is not None and entry.get("tag") == tag and \
+           entry.get("identity") == identity:
+            self.hits = len(entry["index"])
+            self.misses = 0
+            for _, row in entry["index"]:
+                if row is not None:
+                    yield row
+            return
+
+        known: "dict[str, Optional[list[str]]]" = {}
+        if entry is not None and entry.get("tag") == tag:
+            known = {digest: row for digest, row in entry["index"]}
+
+        index: "list[list]" = []
+        self.hits = 0
+        self.misses = 0
+        for _, record in records():
+            digest = hashlib.blake2b(record, digest_size=12).hexdigest()
+            if digest in known:
+                row = known[digest]
+                self.hits += 1
+            else:
+                row = parse(record)
+                self.misses += 1
+            index.append([digest, row])
+            if row is not None:
+                yield row
+
+        self.__save_entry(source, {"tag": tag, "identity": identity,
+                                   "index": index})
+
+    def __load(self) -> "dict":
+        """Reads the cache file, only the first time. A missing or damaged
+        file is treated as an empty cache."""
+        if self.__data is not None:
+            return self.__data
+        try:
+            with open(self.path, "r", encoding="utf8") as file:
+                data = json.load(file)
+        except (OSError, ValueError):
+            data = {}
+        if not isinstance(data, dict) or data.get("version") != self.VERSION:
+            data = {}
+        self.__data = data
+        return data
+
+    def __load_entry(self, source: str) -> "Optional[dict]":
+        """Returns the stored inventory of a package database, if any"""
+        return self.__load().get("sources", {}).get(source)
+
+    def __save_entry(self, source: str, entry: "dict") -> None:
+        """Stores the inventory of a package database, with the inventories
+        already loaded of the other databases. The file is replaced
+        atomically, and failures to write it are ignored because the cache
+        is only an optimization."""
+        data = self.__load()
+        data["version"] = self.VERSION
+        data.setdefault("sources", {})[source] = entry
+        temporary = self.path + ".tmp"
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            with open(temporary, "w", encoding="utf8") as file:
+                json.dump(data, file, ensure_ascii=False,
+                          separators=(",", ":"))
+            os.replace(temporary, self.path)
+        except OSError:
+            pass
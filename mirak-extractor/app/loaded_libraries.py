@@ -0,0 +1,86 @@
+# ####################################################
+
+# This code is part of the "Mirak-extractor" software and, consequently, is
+# part of the "Mirak" project. It is expressly forbidden to copy, reproduce,
+# distribute or make available this code or parts thereof in isolation, except
+# under the terms expressly authorized by the rights holder.
+
+# The provision of the complete software must strictly follow the guidelines
+# established in the applicable license, as detailed in the license file
+# included in this repository. Any unauthorized use may result in sanctions
+# provided for in Brazilian law, including, but not limited to,
+# Law No. 9.610/1998 (Copyright Law).
+
+# For more information or specific requests, please contact the holder through
+# the contact details present in the license file.
+
+# ####################################################
+
+"""
+This module contains the "LoadedLibraries" class, which lists the shared
+libraries mapped into the processes that listen on the network, that is,
+the code actually exposed by the host.
+"""
+
+import os
+from typing import Dict, Iterable, Iterator, List, Optional, Set
+from app.file_owner_index import FileOwnerIndex
+from app.process_snapshot import ProcessSnapshot
+
+
+class LoadedLibraries:
+    """Reads "/proc/<pid>/maps" of the given processes and keeps each
+    shared object once, with the package that installed it and the names
+    of the processes that loaded it."""
+
+    def __init__(self, snapshot: ProcessSnapshot) -> None:
+        self.snapshot = snapshot
+
+    @staticmethod
+    def is_shared_object(path: str) -> bool:
+        """Checks whether a mapped file is a shared object ("libc.so.6")"""
+        name = os.path.basename(path)
+        return name.endswith(".so") or ".so." in name
+
+    def read_maps(self, pid: int) -> "Iterator[str]":
+        """Yields the shared objects mapped by a process, once each. A
+        process that ended or can not be inspected has none."""
+        path = os.path.join(self.snapshot.proc_root, str(pid), "maps")
+        seen: "Set[str]" = set()
+        try:
+            file = open(path, "r", encoding="utf8", errors="surrogateescape")
+        except OSError:
+            return
+        with file:
+            for line in file:
+                # "address perms offset dev inode pathname"; the path is the
+                # only field that may contain spaces
+                fields = line.rstrip("\n").split(None, 5)
+                if len(fields) < 6 or not fields[5].startswith("/"):
+                    continue
+                mapped = fields[5]
+                if mapped.endswith(" (deleted)"):
+                    mapped = mapped[:-10]
+                if mapped not in seen and self.is_shared_object(mapped):
+                    seen.add(mapped)
+                    yield mapped
+
+    def collect(
+        self, pids: "Iterable[int]", index: Optional[FileOwnerIndex] = None
+    ) -> "List[dict]":
+        """Returns the shared objects loaded by the given processes, sorted
+        by path, in the MIRAK format: the path, the package that owns it
+        (None if unknown) and the names of the processes that loaded it."""
+        loaded_by: "Dict[str, Set[str]]" = {}
+        for pid in sorted(set(pids)):
+            name = self.snapshot.process_name(pid)
+            for path in self.read_maps(pid):
+                loaded_by.setdefault(path, set()).add(name)
+        return [
+            {
+                "path": path,
+                "package": index.owner(path) if index is not None else None,
+                "loadedBy": sorted(names),
+            }
+            for path, names in sorted(loaded_by.items())
+        ]
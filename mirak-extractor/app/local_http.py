@@ -0,0 +1,98 @@
+# ####################################################
+
+# This code is part of the "Mirak-extractor" software and, consequently, is
+# part of the "Mirak" project. It is expressly forbidden to copy, reproduce,
+# distribute or make available this code or parts thereof in isolation, except
+# under the terms expressly authorized by the rights holder.
+
+# The provision of the complete software must strictly follow the guidelines
+# established in the applicable license, as detailed in the license file
+# included in this repository. Any unauthorized use may result in sanctions
+# provided for in Brazilian law, including, but not limited to,
+# Law No. 9.610/1998 (Copyright Law).
+
+# For more information or specific requests, please contact the holder through
+# the contact details present in the license file.
+
+# ####################################################
+
+"""
+This module contains the "LocalHttpClient" class, used to read the HTTP
+endpoints of the local Routinator ("http-listen").
+"""
+
+import http.client
+from typing import Iterator, Optional
+from app.extract_rede_info import ExtractRedeInfo
+from app.service_prober import ServiceProber
+
+
+class LocalHttpClient:
+    """Keeps one connection to a local HTTP endpoint, reused by every
+    request, and streams the bodies in chunks so that large answers are
+    never held in memory. Errors are raised as OSError."""
+
+    CHUNK_SIZE = 65536
+
+    def __init__(self, host: str, port: int, timeout: float = 10.0) -> None:
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self.__connection: "Optional[http.client.HTTPConnection]" = None
+
+    @classmethod
+    def from_endpoint(cls, endpoint: str,
+                      timeout: float = 10.0) -> "Optional[LocalHttpClient]":
+        """Creates a client of an "http-listen" address ("127.0.0.1:8323",
+        "[::]:8323"); a wildcard address is reached through the loopback.
+        Returns None for an invalid address."""
+        parsed = ExtractRedeInfo.parse_endpoint(endpoint)
+        if parsed is None:
+            return None
+        return cls(ServiceProber.target_address(parsed[0]), parsed[1],
+                   timeout)
+
+    def __connect(self) -> http.client.HTTPConnection:
+        if self.__connection is None:
+            self.__connection = http.client.HTTPConnection(
+                self.host, self.port, timeout=self.timeout
+            )
+        return self.__connection
+
+    def stream(self, path: str) -> "Iterator[bytes]":
+        """Requests a path and yields its body in chunks. Raises OSError if
+        the request fails or the answer is not "200 OK"."""
+        connection = self.__connect()
+        try:
+            connection.request("GET", path,
+                               headers={"User-Agent": "mirak-extractor"})
+            response = connection.getresponse()
+        except (OSError, http.client.HTTPException) as ex:
+            self.close()
+            raise OSError(f"GET {path}: {ex}") from ex
+        if response.status != 200:
+            try:
+                response.read()
+            except (OSError, http.client.HTTPException):
+                self.close()
+            raise OSError(f"GET {path}: {response.status} {response.reason}")
+        try:
+            while True:
+                chunk = response.read(self.CHUNK_SIZE)
+                if not chunk:
+                    break
+                yield chunk
+        except (OSError, http.client.HTTPException) as ex:
+            self.close()
+            raise OSError(f"GET {path}: {ex}") from ex
+        finally:
+            # A body that was not read to the end leaves the connection in
+            # an unknown state
+            if not response.isclosed():
+                self.close()
+
+    def close(self) -> None:
+        """Closes the connection; the next request opens a new one"""
+        if self.__connection is not None:
+            self.__connection.close()
+            self.__connection = None
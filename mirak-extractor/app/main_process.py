@@ -22,31 +22,52 @@ application flow. The flow consists of extracting information and exporting it
 to a file following the MIRAK standard. The class also maintains the
 structured information during the process steps.
 """
+import os
 import sys
-import json
 import re
-from typing import List
+from typing import Any, Callable, List, Optional
 import typer
 from tqdm import tqdm
 from app.apps_found import AppsFound
+from app.ancestor_chain import AncestorChain
 from app.apps import Apps
 from app.extract_files_direct_info import ExtractFilesDirectoriesInfo
+from app.repository_cache import RepositoryCache
 from app.result import Result
 from app.report import Report
 from app.extract_os_info import ExtractOsInfo
 from app.extract_rede_info import ExtractRedeInfo
+from app.file_owner_index import FileOwnerIndex
+from app.identity_resolver import IdentityResolver
+from app.inventory_cache import InventoryCache
+from app.loaded_libraries import LoadedLibraries
+from app.local_http import LocalHttpClient
+from app.process_sampler import ProcessSampler
+from app.process_snapshot import ProcessSnapshot
 from app.routinator_config_reader import RoutinatorConfigReader
+from app.routinator_metrics import RoutinatorMetrics
 from app.routinator_validator import validate_config
+from app.rtr_client import RtrClient
+from app.service_prober import ServiceProber
+from app.software_collectors import SoftwareCollectors
+from app.stage_metrics import StageMetrics
+from app.stage_scheduler import StageScheduler
+from app.tree_audit import TreeAudit
+from app.tree_manifest import TreeManifest
+from app.vrp_export import VrpExport, VrpStatistics
 
 
-def progress_bar(total: float):
+def progress_bar(total: Optional[float] = None):
     """
     This function aims to create a progress bar. To do this, it uses the "tqdm"
     module to create an instance responsible for creating and managing the
-    progress bar on the screen.
+    progress bar on the screen. When the total is unknown, the number of
+    processed items is shown instead of the percentage.
     Input: total -> max value of progress bar
     output: tqdm -> instance for control
     """
+    if total is None:
+        return tqdm(bar_format="Progress: {n_fmt} items")
     return tqdm(total=total, bar_format="Progress: {percentage:3.0f}%")
 
 
@@ -55,12 +76,86 @@ class Process:
     This class contains the methods responsible for managing the main
     application process.
     """
+    def __init__(
+        self,
+        rebuild_inventory: bool = False,
+        cache_dir: Optional[str] = None,
+        max_workers: Optional[int] = None,
+        metrics_textfile: Optional[str] = None,
+        telemetry_window: float = 0.0,
+        telemetry_interval: float = 1.0,
+        listener_window: float = 0.0,
+        listener_interval: float = 0.1,
+        probe_services: bool = False,
+        probe_timeout: float = 1.0,
+        probe_concurrency: int = 64,
+        probe_rtr: bool = False,
+        rtr_timeout: float = 10.0,
+        analyze_vrps: bool = False,
+        vrp_format: str = "csv",
+        http_timeout: float = 10.0,
+        scrape_metrics: bool = False,
+        audit_trees: bool = False,
+        audit_workers: Optional[int] = None,
+        repository_stats: bool = False,
+        repository_workers: Optional[int] = None,
+        extra_collectors: bool = False
+    ) -> None:
+        self.rebuild_inventory = rebuild_inventory
+        self.inventory_cache = InventoryCache(cache_dir)
+        self.max_workers = max_workers
+        self.metrics_textfile = metrics_textfile
+        self.metrics = StageMetrics()
+        # Process table read once and shared by the stages that need it
+        self.process_snapshot = ProcessSnapshot()
+        # The same for the permissions of the parent directories
+        self.ancestor_chain = AncestorChain()
+        # And for the names of the users and groups
+        self.identity_resolver = IdentityResolver()
+        # The Routinator process is only sampled when a window is given
+        self.telemetry_window = telemetry_window
+        self.telemetry_interval = telemetry_interval
+        # The same for the load of the listening sockets
+        self.listener_window = listener_window
+        self.listener_interval = listener_interval
+        # The listening ports are only probed on request
+        self.probe_services = probe_services
+        self.probe_timeout = probe_timeout
+        self.probe_concurrency = probe_concurrency
+        self.probe_rtr = probe_rtr
+        self.rtr_timeout = rtr_timeout
+        self.analyze_vrps = analyze_vrps
+        self.vrp_format = vrp_format
+        self.http_timeout = http_timeout
+        self.scrape_metrics = scrape_metrics
+        self.audit_trees = audit_trees
+        self.audit_workers = audit_workers
+        self.repository_stats = repository_stats
+        self.repository_workers = repository_workers
+        # Snap, flatpak, pip and cargo are only collected on request
+        self.extra_collectors = extra_collectors
+
     def start(self, output: str):
         """Initialize the application process"""
 
         report = Report()
         self.extract_process(report)
-        self.export_data(output, report)
+        with self.metrics.measure("export") as record:
+            record.count("packages", len(report.apps_found))
+            self.export_data(output, report)
+        if self.metrics_textfile:
+            try:
+                self.metrics.write_textfile(self.metrics_textfile)
+            except OSError as ex:
+                print(f"Error: unable to write the metrics: {ex}")
+
+    def __measured(self, name: str,
+                   action: "Callable[[], Any]") -> "Callable[[], Any]":
+        """Wraps the action of a stage so that its cost is measured"""
+        def run() -> Any:
+            with self.metrics.measure(name):
+                return action()
+        return run
 
     def extract_process(self, report: Report):
         """This method executes the process of extracting and analyzing the
@@ -68,7 +163,82 @@ class Process:
         information in the Report object. The extraction process begins with
         the operating system information and if it is not possible to find it,
         the user will be contacted to provide such information or cancel the
-        process."""
+        process, before any other stage starts. Only the applications depend
+        on the operating system, so the other stages run concurrently with
+        them. The cost of each stage
+        is measured and stored in the report."""
+
+        result = Result()
+        scheduler = StageScheduler(self.max_workers)
+        # The operating system may be asked to the user, which must not be
+        # mixed with the progress of other stages, and cancelling it must
+        # not wait for them
+        scheduler.add_stage("os", self.__measured(
+            "os", lambda: self.extract_os_info(report, result)),
+            exclusive=True)
+        scheduler.add_stage("apps", self.__measured(
+            "apps", lambda: self.extract_apps(report)), depends=("os",))
+        scheduler.add_stage("files", self.__measured(
+            "files", lambda: self.extract_strategic_files(report)))
+        scheduler.add_stage("rede", self.__measured(
+            "rede", lambda: self.extract_rede_info(report, result)))
+        if self.telemetry_window > 0:
+            scheduler.add_stage("telemetry", self.__measured(
+                "telemetry",
+                lambda: self.extract_routinator_telemetry(report)))
+        if self.listener_window > 0:
+            # The listeners of the Routinator configuration are tagged, so
+            # the configuration read by "files" is needed
+            scheduler.add_stage("listeners", self.__measured(
+                "listeners",
+                lambda: self.extract_listener_load(
+                    report, scheduler.results.get("files"))),
+                depends=("files", "rede"))
+        if self.probe_services:
+            scheduler.add_stage("probe", self.__measured(
+                "probe", lambda: self.extract_port_services(report)),
+                depends=("rede",))
+        if self.probe_rtr:
+            scheduler.add_stage("rtr", self.__measured(
+                "rtr",
+                lambda: self.extract_rtr_performance(
+                    report, scheduler.results.get("files"))),
+                depends=("files",))
+        if self.analyze_vrps:
+            scheduler.add_stage("vrps", self.__measured(
+                "vrps",
+                lambda: self.extract_vrp_statistics(
+                    report, scheduler.results.get("files"))),
+                depends=("files",))
+        if self.scrape_metrics:
+            scheduler.add_stage("scrape", self.__measured(
+                "scrape",
+                lambda: self.extract_routinator_metrics(
+                    report, scheduler.results.get("files"))),
+                depends=("files",))
+        if self.audit_trees:
+            scheduler.add_stage("audit", self.__measured(
+                "audit",
+                lambda: self.extract_tree_audit(
+                    report, scheduler.results.get("files"))),
+                depends=("files",))
+        if self.repository_stats:
+            scheduler.add_stage("repositories", self.__measured(
+                "repositories",
+                lambda: self.extract_repository_cache(
+                    report, scheduler.results.get("files"))),
+                depends=("files",))
+        # The records are created in the order of the stages, which keeps
+        # the metrics in a stable order even though the stages overlap
+        for name in scheduler.order():
+            self.metrics.stage(name)
+        results = scheduler.run()
+        report.add_metrics(self.metrics.as_dict(list(scheduler.stages)))
+        return results
+
+    def extract_os_info(self, report: Report, result: Result):
+        """This method extracts the operating system information and stores
+        it in the Report object as the first software found."""
 
         # Host data collect #########################################
         host_extractor = ExtractOsInfo()
@@ -78,7 +248,6 @@ class Process:
              ["/etc/os-release", "/etc/lsb-release", "/etc/issue"]
         )
 
-        result = Result()
         if len(files_with_access) != 0:
             for file in files_with_access:
                 if "os-release" in file:
@@ -153,32 +322,59 @@ class Process:
             result.version,
             result.cpe_name
         )
+
+    def extract_apps(self, report: Report):
+        """This method extracts the software installed on the host and
+        stores it in the Report object. It requires the operating system
+        information."""
+
         # Applications data collect ####################################
-        app = AppsFound()
+        app = AppsFound(cache=self.inventory_cache)
         print("Starting to extract the applications")
-        softwares = app.locate_apps(report.get_os_product())
-
-        apps = Apps()
-        status_bar = progress_bar(len(softwares))
-        for item in softwares:
-            apps.add_app(item)
+        collectors = SoftwareCollectors(app, report.get_os_product(),
+                                        self.rebuild_inventory,
+                                        optional=self.extra_collectors)
+        # Each software is stored in the report as soon as it is read, so
+        # that no intermediate list of the whole inventory is kept
+        record = self.metrics.stage("apps")
+        status_bar = progress_bar()
+        for item in collectors.iter_apps():
+            software = Apps.build_app(item)
+            report.add_apps(
+                software.get("type"),
+                software.get("vendor"),
+                software.get("product"),
+                software.get("version"),
+                software.get("cpe_name"),
+            )
+            record.count("packages")
             status_bar.update(1)
 
         status_bar.close()
-        for app in apps.get_apps_list():
-            report.add_apps(
-                app.get("type"),
-                app.get("vendor"),
-                app.get("product"),
-                app.get("version"),
-                app.get("cpe_name"),
-            )
+        # The collectors run on their own threads, whose CPU time is not
+        # seen by the measurement of the stage
+        record.cpu_seconds += sum(
+            timing.get("cpu_seconds", 0.0)
+            for timing in collectors.timings.values()
+        )
+        record.error(len(collectors.errors))
+        self.metrics.add_collectors(collectors.timings)
+        print(collectors.summary())
+        for name, error in collectors.errors.items():
+            print(f"Error: collector {name} failed: {error}")
+
+    def extract_strategic_files(self, report: Report) -> Optional[dict]:
+        """This method extracts the information of the strategic RPKI files
+        and directories and stores it in the Report object. The Routinator
+        configuration is returned for the stages that need it."""
 
         #  Strategic Files or Directories information is extracted ###################
 
         reader = RoutinatorConfigReader()
+        config: Optional[dict] = None
         errors: List[str] = []
-        files = ExtractFilesDirectoriesInfo()
+        files = ExtractFilesDirectoriesInfo(self.ancestor_chain,
+                                            self.identity_resolver)
         print("\nStarting to extract relevant RPKI information")
         status_bar_1 = progress_bar(100)
         files_info = files.get_important_files_or_directories(["/etc/routinator/routinator.conf","/etc/routinator/"])
@@ -195,16 +391,237 @@ class Process:
             if errors:
                     files_info[0]["errors"] = errors
         report.add_strategic_files(files_info)
+        self.metrics.stage("files").count("files", len(files_info))
         status_bar_1.update(55)
+        return config
+
+    def extract_rede_info(self, report: Report, result: Result):
+        """This method extracts the external network information of the
+        host and stores it in the Report object. The binary of each
+        listening process, and the shared libraries it loaded, are
+        attributed to the packages that installed them."""
+
         #  external network information is extracted #################################
-        rede = ExtractRedeInfo()
+        rede = ExtractRedeInfo(snapshot=self.process_snapshot)
         result.set_host_ip(rede.extract_ip())
         ports, process_names = rede.extract_ports()
         result.set_ports(ports)
         result.set_ports_by_process(process_names)
+        pids = [pid for pid in rede.pids_by_port.values() if pid]
+        libraries: List[dict] = []
+        # The index is only opened, or built, when some process listens
+        index: Optional[FileOwnerIndex] = None
+        if pids:
+            index = FileOwnerIndex(self.inventory_cache.directory)
+            index.open(self.rebuild_inventory)
+        try:
+            result.set_ports_owned_by(rede.extract_ports_owned_by(index))
+            if pids:
+                libraries = LoadedLibraries(self.process_snapshot) \
+                    .collect(pids, index)
+        finally:
+            if index is not None:
+                index.close()
+        self.metrics.stage("rede").count("ports", len(ports))
+        self.metrics.stage("rede").count("libraries", len(libraries))
         report.add_rede_external(
-            result.host_ip, result.open_ports, result.process_by_ports
+            result.host_ip, result.open_ports, result.process_by_ports,
+            result.ports_owned_by
         )
+        report.add_loaded_libraries(libraries)
+
+    def extract_routinator_telemetry(self, report: Report):
+        """This method samples the resources used by the Routinator process
+        during the configured window and stores their summary in the
+        Report object. Nothing is stored if Routinator is not running."""
+
+        pid = next((info.pid for info in self.process_snapshot.processes()
+                    if info.name == "routinator"), None)
+        if pid is None:
+            print("\nRoutinator is not running, no telemetry was sampled")
+            return
+        print(f"\nSampling Routinator for {self.telemetry_window}s")
+        sampler = ProcessSampler(pid, self.process_snapshot.proc_root,
+                                 self.telemetry_window,
+                                 self.telemetry_interval)
+        if sampler.run():
+            self.metrics.stage("telemetry").count("samples", sampler.count)
+            report.add_routinator_telemetry(sampler.summary())
+
+    def extract_listener_load(self, report: Report,
+                              config: Optional[dict] = None):
+        """This method samples the accept queue and the clients of each
+        listening socket during the configured window and stores their
+        percentiles in the Report object. The RTR and HTTP listeners of
+        the Routinator configuration are identified by their role."""
+
+        endpoints = {}
+        if config is not None:
+            endpoints = {
+                "rtr": config.get("rtr-listen") or [],
+                "http": config.get("http-listen") or [],
+            }
+        print(f"\nSampling the listening sockets for {self.listener_window}s")
+        rede = ExtractRedeInfo(snapshot=self.process_snapshot)
+        load = rede.sample_listener_load(endpoints, self.listener_window,
+                                         self.listener_interval)
+        self.metrics.stage("listeners").count("listeners", len(load))
+        report.add_listener_load(load)
+
+    def extract_port_services(self, report: Report):
+        """This method connects to every listening port of the host to
+        identify the service that answers on it (latency, TLS and protocol)
+        and stores what was found in the Report object."""
+
+        rede = ExtractRedeInfo(snapshot=self.process_snapshot)
+        endpoints = rede.listening_endpoints()
+        print(f"\nProbing {len(endpoints)} listening ports")
+        prober = ServiceProber(self.probe_concurrency, self.probe_timeout)
+        services = prober.run(endpoints)
+        record = self.metrics.stage("probe")
+        record.count("ports", len(services))
+        record.error(sum(1 for service in services.values()
+                         if service["error"] is not None))
+        report.add_port_services(services)
+
+    def extract_rtr_performance(self, report: Report,
+                                config: Optional[dict] = None):
+        """This method queries every "rtr-listen" address of the Routinator
+        configuration as a router would (Reset Query) and stores how fast
+        the VRPs were delivered in the Report object."""
+
+        endpoints = (config or {}).get("rtr-listen") or []
+        if not endpoints:
+            print("\nNo RTR endpoint is configured, no RTR probe was made")
+            return
+        print(f"\nProbing {len(endpoints)} RTR endpoints")
+        client = RtrClient(self.rtr_timeout)
+        performance = [client.probe_endpoint(endpoint)
+                       for endpoint in endpoints]
+        record = self.metrics.stage("rtr")
+        record.count("endpoints", len(performance))
+        record.error(sum(1 for item in performance if item["error"]))
+        report.add_rtr_performance(performance)
+
+    def extract_vrp_statistics(self, report: Report,
+                               config: Optional[dict] = None):
+        """This method reads the VRP export from the first "http-listen"
+        address of the Routinator configuration and stores its statistics
+        in the Report object. The export is parsed as it is received."""
+
+        endpoints = (config or {}).get("http-listen") or []
+        client = LocalHttpClient.from_endpoint(endpoints[0],
+                                               self.http_timeout) \
+            if endpoints else None
+        if client is None:
+            print("\nNo HTTP endpoint is configured, no VRP was analysed")
+            return
+        print(f"\nAnalysing the VRPs exported by {endpoints[0]}")
+        record = self.metrics.stage("vrps")
+        statistics = VrpStatistics()
+        vrp_statistics: dict = {"endpoint": endpoints[0],
+                                "format": self.vrp_format}
+        try:
+            VrpExport(client, self.vrp_format).analyse(statistics)
+            vrp_statistics.update(statistics.summary())
+        except (OSError, ValueError) as ex:
+            print(f"Error: unable to read the VRPs: {ex}")
+            vrp_statistics["error"] = str(ex)
+            record.error()
+        finally:
+            client.close()
+        record.count("vrps", statistics.total)
+        report.add_vrp_statistics(vrp_statistics)
+
+    def extract_routinator_metrics(self, report: Report,
+                                   config: Optional[dict] = None):
+        """This method reads the Prometheus metrics published on the first
+        "http-listen" address of the Routinator configuration and stores
+        their summary in the Report object."""
+
+        endpoints = (config or {}).get("http-listen") or []
+        client = LocalHttpClient.from_endpoint(endpoints[0],
+                                               self.http_timeout) \
+            if endpoints else None
+        if client is None:
+            print("\nNo HTTP endpoint is configured, no metric was read")
+            return
+        print(f"\nReading the metrics of Routinator from {endpoints[0]}")
+        record = self.metrics.stage("scrape")
+        routinator_metrics = RoutinatorMetrics()
+        summary: dict = {"endpoint": endpoints[0]}
+        try:
+            summary.update(routinator_metrics.scrape(client).summary())
+        except (OSError, ValueError) as ex:
+            print(f"Error: unable to read the metrics: {ex}")
+            summary["error"] = str(ex)
+            record.error()
+        finally:
+            client.close()
+        record.count("samples", routinator_metrics.samples)
+        report.add_routinator_metrics(summary)
+
+    def extract_tree_audit(self, report: Report,
+                           config: Optional[dict] = None):
+        """This method audits, recursively, the permissions of the trees
+        named in the Routinator configuration (repository, TALs, working
+        directory and chroot) and stores the counts and the anomalous
+        entries in the Report object."""
+
+        trees = []
+        for key in TreeAudit.CONFIG_KEYS:
+            path = (config or {}).get(key)
+            if isinstance(path, str) and path and \
+                    path not in (tree for _, tree in trees):
+                trees.append((key, path))
+        if not trees:
+            print("\nNo Routinator tree is configured, no tree was audited")
+            return
+        print(f"\nAuditing {len(trees)} Routinator trees")
+        auditor = TreeAudit(self.audit_workers,
+                            identities=self.identity_resolver)
+        record = self.metrics.stage("audit")
+        audits = []
+        for key, path in trees:
+            # The manifest of each tree is kept with the inventory cache, so
+            # the next audit only reads the directories that changed
+            manifest_path = os.path.join(self.inventory_cache.directory,
+                                         TreeManifest.file_name(path))
+            audit = {"key": key, **auditor.audit(
+                path, manifest_path=manifest_path,
+                rebuild=self.rebuild_inventory
+            ), "ancestors": self.ancestor_chain.weakest_link(path)}
+            counts = audit.get("counts", {})
+            record.count("entries", sum(counts.get(kind, 0) for kind in (
+                "files", "directories", "symlinks", "others")))
+            record.count("anomalies", counts.get("anomalous", 0))
+            record.count("rescanned", audit.get("directoriesRescanned", 0))
+            record.count("changes", audit.get("changeCount") or 0)
+            record.error(counts.get("errors", 0) + ("error" in audit))
+            audits.append(audit)
+        report.add_tree_audit(audits)
+
+    def extract_repository_cache(self, report: Report,
+                                 config: Optional[dict] = None):
+        """This method counts, per repository, the RPKI objects kept by
+        Routinator in its repository directory, with their bytes and the
+        age of the newest and oldest ones, and stores them in the Report
+        object."""
+
+        path = (config or {}).get("repository-dir")
+        if not isinstance(path, str) or not path:
+            print("\nThe repository directory of Routinator is not "
+                  "configured, the repository cache was not scanned")
+            return
+        print(f"\nScanning the repository cache of Routinator ({path})")
+        record = self.metrics.stage("repositories")
+        statistics = RepositoryCache(self.repository_workers).scan(path)
+        record.count("repositories",
+                     len(statistics.get("repositories", [])))
+        record.count("objects",
+                     sum(statistics.get("objects", {}).values()))
+        record.error(statistics.get("errors", 0) + ("error" in statistics))
+        report.add_repository_cache(statistics)
 
     def export_data(self, output: str, report: Report):
         """
@@ -212,10 +629,5 @@ class Process:
         to a JSON file.
         """
         with open(output, "w") as json_file:
-            json.dump(
-                report.get_report_dict(),
-                json_file,
-                indent=4,
-                ensure_ascii=False
-            )
+            report.write_json(json_file, indent=4)
         print(f"\nFile exported on '{output}'")
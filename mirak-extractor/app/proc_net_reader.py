@@ -0,0 +1,159 @@
+# ####################################################
+
+# This code is part of the "Mirak-extractor" software and, consequently, is
+# part of the "Mirak" project. It is expressly forbidden to copy, reproduce,
+# distribute or make available this code or parts thereof in isolation, except
+# under the terms expressly authorized by the rights holder.
+
+# The provision of the complete software must strictly follow the guidelines
+# established in the applicable license, as detailed in the license file
+# included in this repository. Any unauthorized use may result in sanctions
+# provided for in Brazilian law, including, but not limited to,
+# Law No. 9.610/1998 (Copyright Law).
+
+# For more information or specific requests, please contact the holder through
+# the contact details present in the license file.
+
+# ####################################################
+
+"""
+This module contains the "ProcNetReader" class, which enumerates the
+listening sockets of the host directly from the socket tables of
+"/proc/net", without building the list of every connection.
+"""
+
+import os
+import socket
+import sys
+from typing import IO, Dict, Iterable, Iterator, NamedTuple, Optional, Set, \
+    Tuple
+
+
+# Protocol, local address and port of a socket
+SocketKey = Tuple[str, str, int]
+
+
+class Listener(NamedTuple):
+    """A listening socket: its protocol, bound address, port and inode"""
+
+    protocol: str
+    address: str
+    port: int
+    inode: int
+
+
+class ProcNetReader:
+    """Reads the socket tables of "/proc/net" line by line. The state of
+    each line is checked before the line is split, so the established
+    connections of a busy validator are discarded without being decoded.
+    UDP sockets have no LISTEN state; a bound, unconnected UDP socket is
+    reported as listening."""
+
+    DEFAULT_ROOT = "/proc"
+    TCP_PROTOCOLS = ("tcp", "tcp6")
+    UDP_PROTOCOLS = ("udp", "udp6")
+    # TCP_LISTEN and TCP_CLOSE, as written by the kernel
+    __TCP_LISTEN = b"0A"
+    __TCP_ESTABLISHED = b"01"
+    __UDP_UNCONNECTED = b"07"
+    __LITTLE_ENDIAN = sys.byteorder == "little"
+
+    def __init__(self, proc_root: str = DEFAULT_ROOT) -> None:
+        self.proc_root = proc_root
+
+    def is_available(self) -> bool:
+        """Checks whether the TCP socket table can be read"""
+        return os.access(os.path.join(self.proc_root, "net", "tcp"), os.R_OK)
+
+    @staticmethod
+    def decode_address(address: bytes) -> "Tuple[str, int]":
+        """Decodes an address of the socket tables ("0100007F:0CFB") into
+        the IP address and the port. The kernel writes the address as
+        32-bit words in host byte order."""
+        host, _, port = address.partition(b":")
+        words = bytes.fromhex(host.decode("ascii"))
+        if ProcNetReader.__LITTLE_ENDIAN:
+            words = b"".join(words[index:index + 4][::-1]
+                             for index in range(0, len(words), 4))
+        family = socket.AF_INET if len(words) == 4 else socket.AF_INET6
+        return socket.inet_ntop(family, words), int(port, 16)
+
+    def __open_table(self, protocol: str) -> "Optional[IO[bytes]]":
+        """Opens a socket table, past its header line"""
+        try:
+            file = open(os.path.join(self.proc_root, "net", protocol), "rb")
+        except OSError:
+            return None
+        file.readline()
+        return file
+
+    @staticmethod
+    def __locate(line: bytes) -> "Tuple[int, int, int]":
+        """Returns where the local address starts, its width and where the
+        state starts. "  sl: local remote st ...": the addresses have a
+        fixed width, so the state is found without splitting the line."""
+        start = line.find(b":") + 2
+        width = line.find(b" ", start) - start
+        return start, width, start + 2 * width + 2
+
+    def __iter_table(self, protocol: str) -> "Iterator[Listener]":
+        """Yields the listening sockets of one socket table"""
+        listening = self.__TCP_LISTEN if protocol.startswith("tcp") \
+            else self.__UDP_UNCONNECTED
+        file = self.__open_table(protocol)
+        if file is None:
+            return
+        with file:
+            for line in file:
+                _, _, state_at = self.__locate(line)
+                if line[state_at:state_at + 2] != listening:
+                    continue
+                fields = line.split(None, 10)
+                if listening == self.__UDP_UNCONNECTED and \
+                        fields[2].rstrip(b"0:") != b"":
+                    # UDP socket connected to a remote address
+                    continue
+                address, port = self.decode_address(fields[1])
+                yield Listener(protocol, address, port, int(fields[9]))
+
+    def iter_listeners(
+        self, protocols: "Iterable[str]" = TCP_PROTOCOLS
+    ) -> "Iterator[Listener]":
+        """Yields the listening sockets of the given socket tables. Tables
+        missing on the host (e.g. "tcp6" without IPv6) are skipped."""
+        for protocol in protocols:
+            yield from self.__iter_table(protocol)
+
+    def read_listener_load(
+        self, ports: "Set[int]"
+    ) -> "Tuple[Dict[SocketKey, int], Dict[SocketKey, int]]":
+        """Reads, in one pass over the TCP tables, the accept queue of the
+        listening sockets on the given ports and the number of established
+        connections on each of those ports, both keyed by protocol, local
+        address and port. Only the lines of the given ports are split."""
+        queues: "Dict[SocketKey, int]" = {}
+        clients: "Dict[SocketKey, int]" = {}
+        for protocol in self.TCP_PROTOCOLS:
+            file = self.__open_table(protocol)
+            if file is None:
+                continue
+            with file:
+                for line in file:
+                    start, width, state_at = self.__locate(line)
+                    state = line[state_at:state_at + 2]
+                    if state != self.__TCP_LISTEN and \
+                            state != self.__TCP_ESTABLISHED:
+                        continue
+                    if int(line[start + width - 4:start + width], 16) \
+                            not in ports:
+                        continue
+                    fields = line.split(None, 5)
+                    address, port = self.decode_address(fields[1])
+                    key = (protocol, address, port)
+                    if state == self.__TCP_LISTEN:
+                        # For a listening socket, "rx_queue" is the number of
+                        # connections waiting to be accepted
+                        queues[key] = int(fields[4].split(b":")[1], 16)
+                    else:
+                        clients[key] = clients.get(key, 0) + 1
+        return queues, clients
@@ -0,0 +1,236 @@
+# ####################################################
+
+# This code is part of the "Mirak-extractor" software and, consequently, is
+# part of the "Mirak" project. It is expressly forbidden to copy, reproduce,
+# distribute or make available this code or parts thereof in isolation, except
+# under the terms expressly authorized by the rights holder.
+
+# The provision of the complete software must strictly follow the guidelines
+# established in the applicable license, as detailed in the license file
+# included in this repository. Any unauthorized use may result in sanctions
+# provided for in Brazilian law, including, but not limited to,
+# Law No. 9.610/1998 (Copyright Law).
+
+# For more information or specific requests, please contact the holder through
+# the contact details present in the license file.
+
+# ####################################################
+
+"""
+This module contains the "ProcessSampler" class, which samples the resource
+usage of a running process (such as Routinator) over a time window, to show
+whether it is close to exhausting the resources of the host.
+"""
+
+import os
+import re
+import time
+from array import array
+from typing import IO, Dict, List, Optional
+
+
+class ProcessSampler:
+    """Samples CPU time, RSS, threads, open descriptors and I/O of a process
+    at a fixed rate. The files of "/proc/<pid>" are opened once and read
+    again into a preallocated buffer, and each sample is stored in a
+    preallocated ring buffer, so that sampling allocates almost nothing.
+    Only the summary (minimum, average and maximum) is reported."""
+
+    # Fields of each sample in the ring buffer
+    FIELDS = ("time", "cpu", "rss", "threads", "fds", "read", "write")
+    __BUFFER_SIZE = 4096
+    # Fields of "/proc/<pid>/stat" after the name of the process: utime
+    # and stime (12th and 13th), num_threads (18th) and rss (22nd)
+    __STAT = re.compile(rb" (?:\S+ ){11}(\d+) (\d+) (?:\S+ ){4}(\d+) "
+                        rb"(?:\S+ ){3}(\d+)")
+
+    def __init__(self, pid: int, proc_root: str = "/proc",
+                 window: float = 10.0, interval: float = 1.0) -> None:
+        if interval <= 0:
+            raise ValueError(f"invalid sampling interval {interval}")
+        self.pid = pid
+        self.directory = os.path.join(proc_root, str(pid))
+        self.window = window
+        self.interval = interval
+        self.capacity = max(2, int(window / interval) + 1)
+        self.__ring = array("d", bytes(8 * len(self.FIELDS) * self.capacity))
+        self.__buffer = bytearray(self.__BUFFER_SIZE)
+        self.count = 0
+        self.ticks_per_second = os.sysconf("SC_CLK_TCK") \
+            if hasattr(os, "sysconf") else 100
+        self.page_size = os.sysconf("SC_PAGE_SIZE") \
+            if hasattr(os, "sysconf") else 4096
+        self.fd_limit: Optional[int] = None
+        self.io_available = False
+
+    def record(self, timestamp: float, cpu_ticks: float, rss: float,
+               threads: float, fds: float, read_bytes: float = 0.0,
+               write_bytes: float = 0.0) -> None:
+        """Stores a sample in the ring buffer, replacing the oldest one
+        when it is full"""
+        base = (self.count % self.capacity) * len(self.FIELDS)
+        ring = self.__ring
+        ring[base] = timestamp
+        ring[base + 1] = cpu_ticks
+        ring[base + 2] = rss
+        ring[base + 3] = threads
+        ring[base + 4] = fds
+        ring[base + 5] = read_bytes
+        ring[base + 6] = write_bytes
+        self.count += 1
+
+    def __read(self, file: "IO[bytes]") -> int:
+        """Reads a "/proc" file again, into the shared buffer, and returns
+        the number of bytes read"""
+        file.seek(0)
+        return file.readinto(self.__buffer) or 0  # type: ignore
+
+    def __field(self, name: bytes, size: int) -> float:
+        """Returns a numeric field ("name: value") read into the buffer"""
+        start = self.__buffer.find(name, 0, size)
+        if start == -1:
+            return 0.0
+        end = self.__buffer.find(b"\n", start, size)
+        return float(self.__buffer[start + len(name):end if end != -1
+                                   else size])
+
+    def __read_fd_limit(self) -> "Optional[int]":
+        """Reads the soft limit of open files of the process"""
+        try:
+            with open(os.path.join(self.directory, "limits"), "rb") as file:
+                for line in file:
+                    if line.startswith(b"Max open files"):
+                        value = line[26:].split()[0]
+                        return int(value) if value.isdigit() else None
+        except OSError:
+            pass
+        return None
+
+    def __count_fds(self) -> int:
+        count = 0
+        with os.scandir(os.path.join(self.directory, "fd")) as entries:
+            for _ in entries:
+                count += 1
+        return count
+
+    def sample(self, stat: "IO[bytes]", io: "Optional[IO[bytes]]") -> None:
+        """Takes one sample of the process"""
+        size = self.__read(stat)
+        # The name of the process, between parentheses, may have spaces,
+        # and the fields are matched in place in the buffer
+        fields = self.__STAT.match(self.__buffer,
+                                   self.__buffer.rfind(b")", 0, size) + 1,
+                                   size)
+        if fields is None:
+            raise ValueError(f"invalid stat of process {self.pid}")
+        read_bytes = write_bytes = 0.0
+        if io is not None:
+            size = self.__read(io)
+            read_bytes = self.__field(b"read_bytes:", size)
+            write_bytes = self.__field(b"write_bytes:", size)
+        try:
+            fds = self.__count_fds()
+        except OSError:
+            fds = 0
+        self.record(
+            time.monotonic(),
+            float(int(fields[1]) + int(fields[2])),
+            float(int(fields[4]) * self.page_size),
+            float(fields[3]),
+            float(fds),
+            read_bytes,
+            write_bytes,
+        )
+
+    def run(self) -> bool:
+        """Samples the process during the window. Returns False if the
+        process could not be read; a process that ends during the window
+        keeps the samples taken until then."""
+        self.fd_limit = self.__read_fd_limit()
+        try:
+            stat = open(os.path.join(self.directory, "stat"), "rb",
+                        buffering=0)
+        except OSError:
+            return False
+        # "io" requires the permission to trace the process, which is only
+        # checked when it is read
+        io: "Optional[IO[bytes]]" = None
+        try:
+            io = open(os.path.join(self.directory, "io"), "rb", buffering=0)
+            self.__read(io)
+        except OSError:
+            if io is not None:
+                io.close()
+            io = None
+        self.io_available = io is not None
+        try:
+            deadline = time.monotonic() + self.window
+            next_sample = time.monotonic()
+            while True:
+                try:
+                    self.sample(stat, io)
+                except (OSError, IndexError, ValueError):
+                    break
+                next_sample += self.interval
+                if next_sample > deadline:
+                    break
+                time.sleep(max(0.0, next_sample - time.monotonic()))
+        finally:
+            stat.close()
+            if io is not None:
+                io.close()
+        return self.count > 0
+
+    def __samples(self) -> "List[int]":
+        """Returns the positions of the stored samples, oldest first"""
+        stored = min(self.count, self.capacity)
+        first = self.count - stored
+        return [(first + index) % self.capacity * len(self.FIELDS)
+                for index in range(stored)]
+
+    @staticmethod
+    def __summary(values: "List[float]") -> "Optional[Dict[str, float]]":
+        if not values:
+            return None
+        return {
+            "min": round(min(values), 2),
+            "avg": round(sum(values) / len(values), 2),
+            "max": round(max(values), 2),
+        }
+
+    def summary(self) -> dict:
+        """Returns the summary of the samples in the MIRAK format. Rates
+        (CPU and I/O) are computed between consecutive samples."""
+        ring = self.__ring
+        positions = self.__samples()
+        cpu: "List[float]" = []
+        reads: "List[float]" = []
+        writes: "List[float]" = []
+        for previous, current in zip(positions, positions[1:]):
+            elapsed = ring[current] - ring[previous]
+            if elapsed <= 0:
+                continue
+            cpu.append((ring[current + 1] - ring[previous + 1]) /
+                       self.ticks_per_second / elapsed * 100)
+            reads.append((ring[current + 5] - ring[previous + 5]) / elapsed)
+            writes.append((ring[current + 6] - ring[previous + 6]) / elapsed)
+        fds = [ring[position + 4] for position in positions]
+        summary = {
+            "pid": self.pid,
+            "samples": len(positions),
+            "intervalSeconds": self.interval,
+            "cpuPercent": self.__summary(cpu),
+            "rssBytes": self.__summary(
+                [ring[position + 2] for position in positions]),
+            "threads": self.__summary(
+                [ring[position + 3] for position in positions]),
+            "openFds": self.__summary(fds),
+            "fdLimit": self.fd_limit,
+            "fdUsagePercent": round(max(fds) / self.fd_limit * 100, 2)
+            if fds and self.fd_limit else None,
+            "ioReadBytesPerSecond": self.__summary(reads)
+            if self.io_available else None,
+            "ioWriteBytesPerSecond": self.__summary(writes)
+            if self.io_available else None,
+        }
+        return summary
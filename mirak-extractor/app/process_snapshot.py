@@ -0,0 +1,152 @@
+# ####################################################
+
+# This code is part of the "Mirak-extractor" software and, consequently, is
+# part of the "Mirak" project. It is expressly forbidden to copy, reproduce,
+# distribute or make available this code or parts thereof in isolation, except
+# under the terms expressly authorized by the rights holder.
+
+# The provision of the complete software must strictly follow the guidelines
+# established in the applicable license, as detailed in the license file
+# included in this repository. Any unauthorized use may result in sanctions
+# provided for in Brazilian law, including, but not limited to,
+# Law No. 9.610/1998 (Copyright Law).
+
+# For more information or specific requests, please contact the holder through
+# the contact details present in the license file.
+
+# ####################################################
+
+"""
+This module contains the "ProcessSnapshot" class, a single pass over the
+process table of the host that is shared by every stage that needs to know
+which process owns a socket, or the name and user of a process.
+"""
+
+import os
+import threading
+from typing import Dict, Iterator, List, NamedTuple, Optional
+
+
+class ProcessInfo(NamedTuple):
+    """Identification of a running process"""
+
+    pid: int
+    name: str
+    exe: str
+    cmdline: "List[str]"
+    uid: int
+
+
+class ProcessSnapshot:
+    """Reads "/proc" once, on the first query, and keeps the owner of each
+    socket inode (from "/proc/<pid>/fd") and the name, executable, command
+    line and real user of each process. Processes that end or can not be
+    inspected during the scan are skipped, as are their descriptors when
+    the extractor does not run as root."""
+
+    DEFAULT_ROOT = "/proc"
+    # Length from which the kernel truncates the process name
+    __COMM_LENGTH = 15
+
+    def __init__(self, proc_root: str = DEFAULT_ROOT) -> None:
+        self.proc_root = proc_root
+        self.__sockets: "Optional[Dict[int, int]]" = None
+        self.__processes: "Dict[int, ProcessInfo]" = {}
+        self.__lock = threading.Lock()
+
+    def __read(self, pid: str, name: str) -> bytes:
+        with open(os.path.join(self.proc_root, pid, name), "rb") as file:
+            return file.read()
+
+    def __read_process(self, pid: str) -> "Optional[ProcessInfo]":
+        """Reads the identification of a process, or None if it ended"""
+        try:
+            comm = self.__read(pid, "comm").rstrip(b"\n") \
+                .decode("utf8", "replace")
+            cmdline = [
+                argument.decode("utf8", "replace")
+                for argument in self.__read(pid, "cmdline").split(b"\0")[:-1]
+            ]
+            status = self.__read(pid, "status")
+        except OSError:
+            return None
+        uid = -1
+        start = status.find(b"\nUid:")
+        if start != -1:
+            uid = int(status[start + 5:].split(None, 1)[0])
+        try:
+            exe = os.readlink(os.path.join(self.proc_root, pid, "exe"))
+        except OSError:
+            exe = ""
+        # Same rule of "psutil.Process.name": a truncated name is completed
+        # with the executable of the command line
+        name = comm
+        if len(comm) >= self.__COMM_LENGTH and cmdline:
+            executable = os.path.basename(cmdline[0])
+            if executable.startswith(comm):
+                name = executable
+        return ProcessInfo(int(pid), name, exe, cmdline, uid)
+
+    def __scan(self) -> None:
+        """Reads every process of "/proc", in the order of their PIDs"""
+        sockets: "Dict[int, int]" = {}
+        processes: "Dict[int, ProcessInfo]" = {}
+        try:
+            pids = sorted((name for name in os.listdir(self.proc_root)
+                           if name.isdigit()), key=int)
+        except OSError:
+            pids = []
+        for pid in pids:
+            info = self.__read_process(pid)
+            if info is None:
+                continue
+            processes[info.pid] = info
+            directory = os.path.join(self.proc_root, pid, "fd")
+            try:
+                descriptors = os.listdir(directory)
+            except OSError:
+                continue
+            for descriptor in descriptors:
+                try:
+                    target = os.readlink(os.path.join(directory, descriptor))
+                except OSError:
+                    continue
+                # "socket:[<inode>]"; of the processes that share a socket,
+                # the one with the lowest PID, usually the parent, is kept
+                if target.startswith("socket:["):
+                    sockets.setdefault(int(target[8:-1]), info.pid)
+        self.__processes = processes
+        self.__sockets = sockets
+
+    def __ensure(self) -> "Dict[int, int]":
+        """Scans "/proc" if it was not scanned yet"""
+        with self.__lock:
+            if self.__sockets is None:
+                self.__scan()
+            return self.__sockets  # type: ignore
+
+    def refresh(self) -> None:
+        """Discards the snapshot, so that the next query scans again"""
+        with self.__lock:
+            self.__sockets = None
+            self.__processes = {}
+
+    def socket_owner(self, inode: int) -> "Optional[int]":
+        """Returns the PID of the process that holds a socket inode"""
+        return self.__ensure().get(inode)
+
+    def process(self, pid: int) -> "Optional[ProcessInfo]":
+        """Returns the identification of a process"""
+        self.__ensure()
+        return self.__processes.get(pid)
+
+    def process_name(self, pid: Optional[int]) -> str:
+        """Returns the name of a process, or "N/A" if it is unknown"""
+        info = self.process(pid) if pid is not None else None
+        return info.name if info is not None else "N/A"
+
+    def processes(self) -> "Iterator[ProcessInfo]":
+        """Yields every process of the snapshot, by PID"""
+        self.__ensure()
+        for pid in sorted(self.__processes):
+            yield self.__processes[pid]
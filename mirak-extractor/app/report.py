@@ -16,13 +16,26 @@
 
 # ####################################################
 
+import json
+from typing import IO, Optional
+from app.inventory import Inventory
+
+
 class Report:
     """Construct the object to persiste result of extraction"""
 
     def __init__(self) -> None:
-        self.apps_found: "list[dict]" = []
+        self.apps_found: Inventory = Inventory()
         self.rede_external: "dict" = {}
         self.strategic_files: "list[dict]" = []
+        self.loaded_libraries: "list[dict]" = []
+        self.routinator_telemetry: "dict" = {}
+        self.rtr_performance: "list[dict]" = []
+        self.vrp_statistics: "dict" = {}
+        self.routinator_metrics: "dict" = {}
+        self.tree_audit: "list[dict]" = []
+        self.repository_cache: "dict" = {}
+        self.metrics: "dict" = {}
 
     def get_os_product(self) -> str:
         """
@@ -30,9 +43,9 @@ class Report:
         software found. Its purpose is to simplify the way of knowing
         which operating system is stored.
         """
-        for app in self.apps_found:
-            if app.get("type") == "o":
-                return app.get("product")
+        index = self.apps_found.find_type("o")
+        if index != -1:
+            return self.apps_found[index].get("product")
         return ""
 
     def add_apps(
@@ -46,15 +59,8 @@ class Report:
         # Manually set the vendor value to the official routinator vendor
         if product == "routinator":
             vendor = "nlnetlabs"
-        self.apps_found.append(
-            {
-                "type": _type,
-                "vendor": vendor,
-                "product": product,
-                "version": version,
-                "cpeName": cpe_name,
-            }
-        )
+        self.apps_found.append(_type, vendor, product, version, cpe_name)
+
     def add_strategic_files(self, files: "list[dict]"):
         """
         Allows you to store information related to important RPKI files or directories.
@@ -64,10 +70,12 @@ class Report:
     def add_rede_external(
         self, host_ip: str,
         open_ports: "list[int]",
-        process_by_ports: "dict[int,str]"
+        process_by_ports: "dict[int,str]",
+        ports_owned_by: "Optional[dict[int, dict]]" = None
     ):
         """
-        Allows you to store information related to the host network.
+        Allows you to store information related to the host network. The
+        packages that own the listening binaries are stored when given.
         """
         self.rede_external.update(
             {
@@ -75,6 +83,78 @@ class Report:
                 "openPorts": open_ports,
                 "portsUseBy": process_by_ports}
         )
+        if ports_owned_by is not None:
+            self.rede_external["portsOwnedBy"] = ports_owned_by
+
+    def add_listener_load(self, listener_load: "list[dict]"):
+        """
+        Allows you to store the accept queue and the clients sampled on
+        each listening socket of the host network.
+        """
+        self.rede_external["listenerLoad"] = listener_load
+
+    def add_port_services(self, port_services: "dict[int, dict]"):
+        """
+        Allows you to store the services found by probing the listening
+        ports of the host network.
+        """
+        self.rede_external["portServices"] = port_services
+
+    def add_loaded_libraries(self, libraries: "list[dict]"):
+        """
+        Allows you to store the shared libraries loaded by the processes
+        that listen on the network, with the processes that loaded them.
+        """
+        self.loaded_libraries = libraries
+
+    def add_routinator_telemetry(self, telemetry: "dict"):
+        """
+        Allows you to store the summary of the resources used by the
+        Routinator process during the sampling window.
+        """
+        self.routinator_telemetry = telemetry
+
+    def add_rtr_performance(self, rtr_performance: "list[dict]"):
+        """
+        Allows you to store how fast each RTR endpoint of Routinator
+        delivered the VRPs to a client.
+        """
+        self.rtr_performance = rtr_performance
+
+    def add_vrp_statistics(self, vrp_statistics: "dict"):
+        """
+        Allows you to store the statistics of the VRPs exported by the
+        HTTP endpoint of Routinator.
+        """
+        self.vrp_statistics = vrp_statistics
+
+    def add_routinator_metrics(self, routinator_metrics: "dict"):
+        """
+        Allows you to store the summary of the Prometheus metrics published
+        by Routinator.
+        """
+        self.routinator_metrics = routinator_metrics
+
+    def add_tree_audit(self, tree_audit: "list[dict]"):
+        """
+        Allows you to store the permission audit of the directory trees
+        used by Routinator.
+        """
+        self.tree_audit = tree_audit
+
+    def add_repository_cache(self, repository_cache: "dict"):
+        """
+        Allows you to store the statistics of the RPKI objects kept by
+        Routinator in its repository directory.
+        """
+        self.repository_cache = repository_cache
+
+    def add_metrics(self, metrics: "dict"):
+        """
+        Allows you to store the time and resources spent by each stage of
+        the extraction.
+        """
+        self.metrics = metrics
 
     def __str__(self) -> str:
         """This method creates a string with the contents of the object."""
@@ -91,11 +171,62 @@ class Report:
     def get_report_dict(self):
         """
         Returns the information contained in the instance in data dictionary
-        format following the MIRAK standard.
+        format following the MIRAK standard, made of builtin types only.
+        The loaded libraries, the Routinator telemetry and RTR performance,
+        the VRP statistics, the Routinator metrics, the audit of its trees,
+        the statistics of its repository cache and the metrics of the
+        extraction are only included when they were stored.
 
         """
-        return {
+        report = self.__sections()
+        report["appsFound"] = self.apps_found.to_list()
+        return report
+
+    def __sections(self) -> "dict":
+        """Returns the sections of the report, with the software inventory
+        kept in its columnar form"""
+        report = {
             "appsFound": self.apps_found,
             "redeExternal": self.rede_external,
             "strategicFiles": self.strategic_files
         }
+        if self.loaded_libraries:
+            report["loadedLibraries"] = self.loaded_libraries
+        if self.routinator_telemetry:
+            report["routinatorTelemetry"] = self.routinator_telemetry
+        if self.rtr_performance:
+            report["rtrPerformance"] = self.rtr_performance
+        if self.vrp_statistics:
+            report["vrpStatistics"] = self.vrp_statistics
+        if self.routinator_metrics:
+            report["routinatorMetrics"] = self.routinator_metrics
+        if self.tree_audit:
+            report["treeAudit"] = self.tree_audit
+        if self.repository_cache:
+            report["repositoryCache"] = self.repository_cache
+        if self.metrics:
+            report["metrics"] = self.metrics
+        return report
+
+    def write_json(self, file: IO[str], indent: int = 4) -> None:
+        """
+        Writes the report to a text file in JSON format. The output is the
+        same produced by "json.dump" with the given indentation, but the
+        software inventory is encoded directly from its columns.
+        """
+        items = list(self.__sections().items())
+        file.write("{")
+        for position, (key, value) in enumerate(items):
+            file.write(("," if position else "") + "\n" + " " * indent
+                       + json.dumps(key) + ": ")
+            if isinstance(value, Inventory):
+                for chunk in value.iter_json(indent, 1):
+                    file.write(chunk)
+            else:
+                # Nested values are indented one level deeper; line breaks
+                # only occur between JSON tokens, never inside strings
+                file.write(
+                    json.dumps(value, indent=indent, ensure_ascii=False)
+                    .replace("\n", "\n" + " " * indent)
+                )
+        file.write("\n}" if items else "}")
@@ -0,0 +1,192 @@
+# ####################################################
+
+# This code is part of the "Mirak-extractor" software and, consequently, is
+# part of the "Mirak" project. It is expressly forbidden to copy, reproduce,
+# distribute or make available this code or parts thereof in isolation, except
+# under the terms expressly authorized by the rights holder.
+
+# The provision of the complete software must strictly follow the guidelines
+# established in the applicable license, as detailed in the license file
+# included in this repository. Any unauthorized use may result in sanctions
+# provided for in Brazilian law, including, but not limited to,
+# Law No. 9.610/1998 (Copyright Law).
+
+# For more information or specific requests, please contact the holder through
+# the contact details present in the license file.
+
+# ####################################################
+
+"""
+This module contains the "RepositoryCache" class, which summarizes the RPKI
+objects kept by Routinator in its repository directory, per repository.
+"""
+
+import multiprocessing
+import os
+import stat
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+# Counts of one repository: objects and bytes per extension (the other
+# files under "other"), errors, oldest and newest mtime, and the files with
+# more than one link, by (device, inode), whose bytes are not counted yet
+ScanResult = Tuple[Dict[str, List[int]], int, Optional[int], Optional[int],
+                   Dict[Tuple[int, int], Tuple[int, str]]]
+
+
+def scan_repository(path: str) -> ScanResult:
+    """Counts the files of a repository directory by their status, without
+    reading them. Runs in the workers of "RepositoryCache", so it is a
+    function of the module."""
+    counts: "Dict[str, List[int]]" = {
+        kind: [0, 0] for kind in RepositoryCache.EXTENSIONS + ("other",)
+    }
+    errors = 0
+    oldest: "Optional[int]" = None
+    newest: "Optional[int]" = None
+    links: "Dict[Tuple[int, int], Tuple[int, str]]" = {}
+    pending = [path]
+    while pending:
+        try:
+            scanner = os.scandir(pending.pop())
+        except OSError:
+            errors += 1
+            continue
+        with scanner:
+            for entry in scanner:
+                try:
+                    status = entry.stat(follow_symlinks=False)
+                except OSError:
+                    errors += 1
+                    continue
+                if stat.S_ISDIR(status.st_mode):
+                    pending.append(entry.path)
+                    continue
+                if not stat.S_ISREG(status.st_mode):
+                    continue
+                kind = entry.name.rpartition(".")[2].lower()
+                if kind not in counts:
+                    kind = "other"
+                counts[kind][0] += 1
+                if status.st_nlink > 1:
+                    links[(status.st_dev, status.st_ino)] = \
+                        (status.st_size, kind)
+                else:
+                    counts[kind][1] += status.st_size
+                mtime = status.st_mtime_ns
+                if oldest is None or mtime < oldest:
+                    oldest = mtime
+                if newest is None or mtime > newest:
+                    newest = mtime
+    return counts, errors, oldest, newest, links
+
+
+class RepositoryCache:
+    """Scans the repository directory of Routinator. Each repository (an
+    RRDP or rsync host, as stored by Routinator in "rrdp/<host>",
+    "rsync/<host>" and "stored/<kind>/<host>") is scanned by a worker of a
+    pool of processes, so the scan is not limited to one core. Only the
+    status of the files is read. A file with several links is counted in
+    each of its names but its bytes are counted once, in the first
+    repository where it is found."""
+
+    EXTENSIONS = ("cer", "roa", "mft", "crl", "gbr", "asa")
+    KINDS = ("rrdp", "rsync")
+
+    def __init__(self, max_workers: Optional[int] = None) -> None:
+        self.max_workers = max_workers or os.cpu_count() or 1
+
+    @classmethod
+    def repositories(cls, root: str) -> "List[Tuple[str, str, str]]":
+        """Returns the name (path relative to the root), type and host of
+        the repositories of a repository directory. Other directories of
+        the root are repositories of type "other"."""
+        found: "List[Tuple[str, str, str]]" = []
+        for base in ("", "stored"):
+            for kind in cls.KINDS:
+                directory = os.path.join(root, base, kind)
+                try:
+                    hosts = sorted(
+                        entry.name for entry in os.scandir(directory)
+                        if entry.is_dir(follow_symlinks=False)
+                    )
+                except OSError:
+                    continue
+                found.extend((os.path.join(base, kind, host), kind, host)
+                             for host in hosts)
+        try:
+            others = sorted(entry.name for entry in os.scandir(root)
+                            if entry.is_dir(follow_symlinks=False) and
+                            entry.name not in cls.KINDS + ("stored",))
+        except OSError:
+            others = []
+        found.extend((name, "other", "") for name in others)
+        return found
+
+    @staticmethod
+    def __time(mtime_ns: "Optional[int]") -> "Optional[str]":
+        if mtime_ns is None:
+            return None
+        return datetime.fromtimestamp(mtime_ns / 1e9, timezone.utc).isoformat(
+            timespec="seconds")
+
+    def __scan_all(self, paths: "List[str]") -> "List[ScanResult]":
+        if len(paths) <= 1 or self.max_workers == 1:
+            return [scan_repository(path) for path in paths]
+        # The stages run in threads, which forking is not safe with
+        methods = multiprocessing.get_all_start_methods()
+        context = multiprocessing.get_context(
+            "forkserver" if "forkserver" in methods else "spawn")
+        with ProcessPoolExecutor(max_workers=min(self.max_workers,
+                                                 len(paths)),
+                                 mp_context=context) as executor:
+            # One repository per task: their sizes are very uneven
+            return list(executor.map(scan_repository, paths))
+
+    def scan(self, root: str) -> dict:
+        """Scans a repository directory and returns the statistics of each
+        repository in the MIRAK format"""
+        if not os.path.isdir(root):
+            return {"path": root, "error": "not a directory"}
+        found = self.repositories(root)
+        results = self.__scan_all([os.path.join(root, name)
+                                   for name, _, _ in found])
+        seen = set()
+        repositories = []
+        totals = {kind: [0, 0] for kind in self.EXTENSIONS + ("other",)}
+        errors = 0
+        for (name, kind, host), result in zip(found, results):
+            counts, failed, oldest, newest, links = result
+            for key, (size, extension) in links.items():
+                if key not in seen:
+                    seen.add(key)
+                    counts[extension][1] += size
+            for extension, (objects, size) in counts.items():
+                totals[extension][0] += objects
+                totals[extension][1] += size
+            errors += failed
+            repositories.append({
+                "repository": name,
+                "type": kind,
+                "host": host,
+                "stored": name.startswith("stored" + os.sep),
+                "objects": {extension: counts[extension][0]
+                            for extension in self.EXTENSIONS},
+                "bytes": {extension: counts[extension][1]
+                          for extension in self.EXTENSIONS},
+                "otherFiles": counts["other"][0],
+                "totalBytes": sum(size for _, size in counts.values()),
+                "oldestMtime": self.__time(oldest),
+                "newestMtime": self.__time(newest),
+                "errors": failed,
+            })
+        return {
+            "path": root,
+            "repositories": repositories,
+            "objects": {extension: totals[extension][0]
+                        for extension in self.EXTENSIONS},
+            "otherFiles": totals["other"][0],
+            "totalBytes": sum(size for _, size in totals.values()),
+            "errors": errors,
+        }
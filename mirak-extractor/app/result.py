@@ -36,6 +36,7 @@ class Result:
         self.host_ip: str = ""
         self.open_ports: 'list[int]' = []
         self.process_by_ports: 'dict[int,str]' = {}
+        self.ports_owned_by: 'dict[int, dict]' = {}
 
     def set_os_info(self, product: str, version: str):
         """This method sets the operating system information
@@ -72,6 +73,11 @@ _linux:{self.version}:*:*:*:*:*:*:*"
         and process name as 'value'"""
         self.process_by_ports = data
 
+    def set_ports_owned_by(self, data: 'dict[int, dict]'):
+        """Sets the process, executable and package by network port.
+        Network port is set to 'key'"""
+        self.ports_owned_by = data
+
     def show(self):
         "Prints all information in object to stdout"
         print(
@@ -0,0 +1,204 @@
+# ####################################################
+
+# This code is part of the "Mirak-extractor" software and, consequently, is
+# part of the "Mirak" project. It is expressly forbidden to copy, reproduce,
+# distribute or make available this code or parts thereof in isolation, except
+# under the terms expressly authorized by the rights holder.
+
+# The provision of the complete software must strictly follow the guidelines
+# established in the applicable license, as detailed in the license file
+# included in this repository. Any unauthorized use may result in sanctions
+# provided for in Brazilian law, including, but not limited to,
+# Law No. 9.610/1998 (Copyright Law).
+
+# For more information or specific requests, please contact the holder through
+# the contact details present in the license file.
+
+# ####################################################
+
+"""
+This module contains the "RoutinatorMetrics" class, which reads the
+Prometheus metrics published by Routinator ("/metrics") and summarizes its
+runtime state.
+"""
+
+import math
+import re
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional
+from app.local_http import LocalHttpClient
+
+
+class Sample(NamedTuple):
+    """One sample of the Prometheus exposition format"""
+
+    name: str
+    labels: "Dict[str, str]"
+    value: float
+
+
+class RoutinatorMetrics:
+    """Tokenizes the Prometheus exposition format line by line, as the
+    body is received, and folds each sample into a summary of the metrics
+    that matter for the performance of Routinator, so that only the
+    summary is kept in memory."""
+
+    PATH = "/metrics"
+    # Failed repositories listed in the report; the others are counted
+    MAX_LISTED = 50
+    __LABEL = re.compile(
+        r'\s*([A-Za-z_][A-Za-z0-9_]*)="((?:[^"\\]|\\.)*)"\s*,?'
+    )
+    __ESCAPES = {"\\\\": "\\", '\\"': '"', "\\n": "\n"}
+    # Gauges reported as they are
+    __GAUGES = {
+        "routinator_last_update_duration": "lastUpdateDurationSeconds",
+        "routinator_last_update_done": "lastUpdateDone",
+        "routinator_serial": "serial",
+        "routinator_rtr_current_connections": "rtrCurrentConnections",
+        "routinator_rtr_connections": "rtrConnections",
+        "routinator_http_connections": "httpConnections",
+    }
+    # Counters summed over their labels
+    __TOTALS = {
+        "routinator_vrps_total": "vrpsTotal",
+        "routinator_vrps_final": "vrpsFinal",
+        "routinator_vrps_duplicate": "vrpsDuplicate",
+        "routinator_vrps_unsafe": "vrpsUnsafe",
+    }
+    # Stale objects per TAL: manifests and CRLs since Routinator 0.9, both
+    # in one count before
+    __STALE = ("routinator_stale_manifests", "routinator_stale_crls",
+               "routinator_stale_count")
+
+    def __init__(self) -> None:
+        self.samples = 0
+        self.values: "Dict[str, Optional[float]]" = dict.fromkeys(
+            list(self.__GAUGES.values()) + list(self.__TOTALS.values())
+        )
+        self.vrps_per_tal: "Dict[str, float]" = {}
+        self.repositories = 0
+        self.failed: "List[dict]" = []
+        self.failed_count = 0
+        self.stale_per_tal: "Dict[str, float]" = {}
+
+    @classmethod
+    def __unescape(cls, value: str) -> str:
+        if "\\" not in value:
+            return value
+        return re.sub(r"\\.", lambda match: cls.__ESCAPES.get(
+            match.group(0), match.group(0)), value)
+
+    @classmethod
+    def parse_line(cls, line: str) -> "Optional[Sample]":
+        """Parses a sample line ('name{label="value"} 1 [timestamp]');
+        comments, blank lines and malformed lines give None"""
+        line = line.strip()
+        if not line or line.startswith("#"):
+            return None
+        labels: "Dict[str, str]" = {}
+        brace = line.find("{")
+        space = line.find(" ")
+        if brace != -1 and (space == -1 or brace < space):
+            name = line[:brace]
+            position = brace + 1
+            while True:
+                match = cls.__LABEL.match(line, position)
+                if match is None:
+                    break
+                labels[match.group(1)] = cls.__unescape(match.group(2))
+                position = match.end()
+            if line[position:position + 1] != "}":
+                return None
+            rest = line[position + 1:].split()
+        else:
+            name, *rest = line.split()
+        if not rest:
+            return None
+        try:
+            value = float(rest[0])
+        except ValueError:
+            return None
+        return Sample(name, labels, value)
+
+    @classmethod
+    def iter_samples(cls, chunks: "Iterable[bytes]") -> "Iterator[Sample]":
+        """Yields the samples of an exposition received in chunks"""
+        pending = b""
+        for chunk in chunks:
+            lines = (pending + chunk).split(b"\n")
+            pending = lines.pop()
+            for line in lines:
+                sample = cls.parse_line(line.decode("utf8", "replace"))
+                if sample is not None:
+                    yield sample
+        sample = cls.parse_line(pending.decode("utf8", "replace"))
+        if sample is not None:
+            yield sample
+
+    def __failed(self, uri: str, kind: str, status: float) -> None:
+        self.failed_count += 1
+        if len(self.failed) < self.MAX_LISTED:
+            self.failed.append({"uri": uri, "type": kind,
+                                "status": int(status)})
+
+    def add(self, sample: Sample) -> None:
+        """Folds one sample into the summary"""
+        self.samples += 1
+        name, labels, value = sample
+        if math.isnan(value):
+            return
+        if name in self.__GAUGES:
+            self.values[self.__GAUGES[name]] = value
+        elif name in self.__TOTALS:
+            key = self.__TOTALS[name]
+            self.values[key] = (self.values[key] or 0) + value
+            if name == "routinator_vrps_total" and "tal" in labels:
+                self.vrps_per_tal[labels["tal"]] = \
+                    self.vrps_per_tal.get(labels["tal"], 0) + value
+        elif name == "routinator_rrdp_status":
+            # The HTTP status of the last update; negative when the
+            # repository could not be reached
+            self.repositories += 1
+            if value not in (200, 304):
+                self.__failed(labels.get("uri", ""), "rrdp", value)
+        elif name == "routinator_rsync_status":
+            # The exit code of rsync
+            self.repositories += 1
+            if value != 0:
+                self.__failed(labels.get("uri", ""), "rsync", value)
+        elif name in self.__STALE:
+            tal = labels.get("tal", "")
+            self.stale_per_tal[tal] = self.stale_per_tal.get(tal, 0) + value
+
+    def scrape(self, client: LocalHttpClient) -> "RoutinatorMetrics":
+        """Reads the metrics from the HTTP endpoint of Routinator"""
+        for sample in self.iter_samples(client.stream(self.PATH)):
+            self.add(sample)
+        return self
+
+    @staticmethod
+    def __number(value: "Optional[float]") -> "Optional[float]":
+        if value is None:
+            return None
+        return int(value) if value.is_integer() else round(value, 3)
+
+    def summary(self) -> dict:
+        """Returns the summary in the MIRAK format. Metrics that the
+        version of Routinator does not publish are None."""
+        summary: dict = {
+            key: self.__number(value) for key, value in self.values.items()
+        }
+        summary.update({
+            "samples": self.samples,
+            "vrpsPerTal": {tal: self.__number(count) for tal, count
+                           in sorted(self.vrps_per_tal.items())},
+            "repositories": self.repositories,
+            "failedRepositories": self.failed_count,
+            "failedRepositoryList": self.failed,
+            "staleObjects": self.__number(
+                sum(self.stale_per_tal.values())
+            ) if self.stale_per_tal else None,
+            "stalePerTal": {tal: self.__number(count) for tal, count
+                            in sorted(self.stale_per_tal.items())},
+        })
+        return summary
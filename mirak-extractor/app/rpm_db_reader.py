@@ -0,0 +1,315 @@
+# ####################################################
+
+# This code is part of the "Mirak-extractor" software and, consequently, is
+# part of the "Mirak" project. It is expressly forbidden to copy, reproduce,
+# distribute or make available this code or parts thereof in isolation, except
+# under the terms expressly authorized by the rights holder.
+
+# The provision of the complete software must strictly follow the guidelines
+# established in the applicable license, as detailed in the license file
+# included in this repository. Any unauthorized use may result in sanctions
+# provided for in Brazilian law, including, but not limited to,
+# Law No. 9.610/1998 (Copyright Law).
+
+# For more information or specific requests, please contact the holder through
+# the contact details present in the license file.
+
+# ####################################################
+
+"""
+This module contains the "RpmDbReader" class, which reads the RPM database
+of RHEL hosts directly, without depending on the "rpm" tool. The SQLite
+backend ("rpmdb.sqlite") is preferred, and the NDB ("Packages.db") and
+Berkeley DB ("Packages") backends are used as a fallback.
+"""
+
+import mmap
+import os
+import sqlite3
+import struct
+from pathlib import Path
+from typing import Iterator, Optional, Tuple
+
+
+class RpmDbReader:
+    """Reads the package headers stored in the RPM database in read-only
+    mode and decodes only the header tags required by the extractor."""
+
+    DEFAULT_DIRS = ("/var/lib/rpm", "/usr/lib/sysimage/rpm")
+    NONE = "(none)"
+
+    # Header tags (rpmtag.h)
+    TAG_NAME = 1000
+    TAG_VERSION = 1001
+    TAG_VENDOR = 1011
+    TAG_ARCH = 1022
+    TAG_DIRINDEXES = 1116
+    TAG_BASENAMES = 1117
+    TAG_DIRNAMES = 1118
+    # Header tag types
+    __STRING_TYPES = (6, 8, 9)
+    __INT32_TYPE = 4
+    __STRING_ARRAY_TYPE = 8
+
+    # NDB format (lib/backend/ndb/rpmpkg.c)
+    __NDB_MAGIC = b"RpmP"
+    __NDB_SLOT_MAGIC = b"Slot"
+    __NDB_BLOB_MAGIC = b"BlbS"
+    __NDB_PAGE_SIZE = 4096
+    __NDB_BLOCK_SIZE = 16
+
+    # Berkeley DB hash format (dbinc/db_page.h)
+    __BDB_HASH_MAGIC = 0x061561
+    __BDB_PAGE_HEADER = 26
+    __BDB_HASH_PAGES = (2, 13)
+    __BDB_OVERFLOW_PAGE = 7
+    __BDB_KEYDATA = 1
+    __BDB_OFFPAGE = 3
+
+    def __init__(self, directories: "Tuple[str, ...]" = DEFAULT_DIRS) -> None:
+        self.directories = directories
+
+    def locate_database(self) -> "Optional[Tuple[str, str]]":
+        """Returns the backend name and the path of the first readable RPM
+        database found, or None if there is no database available."""
+        backends = (
+            ("sqlite", "rpmdb.sqlite"),
+            ("ndb", "Packages.db"),
+            ("bdb", "Packages"),
+        )
+        for directory in self.directories:
+            for backend, file_name in backends:
+                path = os.path.join(directory, file_name)
+                if os.path.isfile(path) and os.access(path, os.R_OK):
+                    return backend, path
+        return None
+
+    def is_available(self) -> bool:
+        """Checks whether an RPM database can be read directly"""
+        return self.locate_database() is not None
+
+    def iter_headers(self) -> "Iterator[Tuple[int, bytes]]":
+        """Yields the record number and the header blob of each package
+        stored in the database."""
+        database = self.locate_database()
+        if database is None:
+            return
+        backend, path = database
+        if backend == "sqlite":
+            yield from self.__iter_sqlite(path)
+        elif backend == "ndb":
+            yield from self.__iter_ndb(path)
+        else:
+            yield from self.__iter_bdb(path)
+
+    def parse_header(self, blob: bytes) -> "Optional[list[str]]":
+        """Decodes the NAME, VENDOR, VERSION and ARCH tags of a header
+        blob. Missing tags are reported as "(none)", like "rpm -q" does.
+        Returns None if the blob is not a valid header."""
+        if len(blob) < 8:
+            return None
+        index_count, data_length = struct.unpack_from(">II", blob, 0)
+        data_start = 8 + index_count * 16
+        if data_start + data_length > len(blob):
+            return None
+
+        wanted = {
+            self.TAG_NAME: 0,
+            self.TAG_VENDOR: 1,
+            self.TAG_VERSION: 2,
+            self.TAG_ARCH: 3,
+        }
+        values = [self.NONE, self.NONE, self.NONE, self.NONE]
+        for entry in range(index_count):
+            tag, tag_type, offset, _ = struct.unpack_from(
+                ">iIiI", blob, 8 + entry * 16
+            )
+            position = wanted.get(tag)
+            if position is None or tag_type not in self.__STRING_TYPES:
+                continue
+            start = data_start + offset
+            end = blob.find(b"\0", start, data_start + data_length)
+            if end == -1:
+                end = data_start + data_length
+            values[position] = blob[start:end].decode(
+                "utf-8", errors="replace"
+            )
+
+        if values[0] == self.NONE:
+            return None
+        return values
+
+    def parse_files(self, blob: bytes) -> "Optional[Tuple[str, list[str]]]":
+        """Decodes the name of the package of a header blob and the paths
+        of the files it owns, rebuilt from the DIRNAMES, DIRINDEXES and
+        BASENAMES tags. Returns None if the blob is not a valid header."""
+        if len(blob) < 8:
+            return None
+        index_count, data_length = struct.unpack_from(">II", blob, 0)
+        data_start = 8 + index_count * 16
+        data_end = data_start + data_length
+        if data_end > len(blob):
+            return None
+
+        name = None
+        arrays: "dict[int, list]" = {}
+        for entry in range(index_count):
+            tag, tag_type, offset, count = struct.unpack_from(
+                ">iIiI", blob, 8 + entry * 16
+            )
+            start = data_start + offset
+            if tag == self.TAG_NAME and tag_type in self.__STRING_TYPES:
+                end = blob.find(b"\0", start, data_end)
+                name = blob[start:end if end != -1 else data_end].decode(
+                    "utf-8", errors="replace"
+                )
+            elif tag in (self.TAG_BASENAMES, self.TAG_DIRNAMES) and \
+                    tag_type == self.__STRING_ARRAY_TYPE:
+                values = blob[start:data_end].split(b"\0", count)[:count]
+                arrays[tag] = [
+                    value.decode("utf-8", errors="replace")
+                    for value in values
+                ]
+            elif tag == self.TAG_DIRINDEXES and \
+                    tag_type == self.__INT32_TYPE:
+                arrays[tag] = list(struct.unpack_from(f">{count}i", blob,
+                                                      start))
+
+        if name is None:
+            return None
+        basenames = arrays.get(self.TAG_BASENAMES, [])
+        dirnames = arrays.get(self.TAG_DIRNAMES, [])
+        indexes = arrays.get(self.TAG_DIRINDEXES, [])
+        return name, [
+            dirnames[index] + basename
+            for basename, index in zip(basenames, indexes)
+            if 0 <= index < len(dirnames)
+        ]
+
+    def read_installed(self) -> "Iterator[list[str]]":
+        """Yields the package name, vendor, version and architecture of
+        every package in the database, in the same format produced by
+        "rpm -qa"."""
+        for _, blob in self.iter_headers():
+            app = self.parse_header(blob)
+            if app is not None:
+                yield app
+
+    def __iter_sqlite(self, path: str) -> "Iterator[Tuple[int, bytes]]":
+        """Reads the "Packages" table of the SQLite backend. The database is
+        opened read-only; rpm keeps it in WAL mode, so the transactions not
+        yet checkpointed are read from the "-wal" file and a running
+        transaction is never waited on. Raises sqlite3.Error if the
+        database can not be read."""
+        uri = Path(path).resolve().as_uri() + "?mode=ro"
+        connection = sqlite3.connect(uri, uri=True)
+        try:
+            cursor = connection.execute(
+                "SELECT hnum, blob FROM Packages ORDER BY hnum"
+            )
+            for hnum, blob in cursor:
+                yield hnum, bytes(blob)
+        finally:
+            connection.close()
+
+    def __iter_ndb(self, path: str) -> "Iterator[Tuple[int, bytes]]":
+        """Reads the slot table of the NDB backend and yields the blob
+        referenced by each used slot."""
+        with open(path, "rb") as file:
+            if os.fstat(file.fileno()).st_size < self.__NDB_PAGE_SIZE:
+                return
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                if data[0:4] != self.__NDB_MAGIC:
+                    return
+                slot_pages = struct.unpack_from("<I", data, 12)[0]
+                slots_end = min(slot_pages * self.__NDB_PAGE_SIZE, len(data))
+                # The first two slots hold the database header
+                for slot in range(32, slots_end, 16):
+                    magic = data[slot:slot + 4]
+                    pkg_index, block_offset, _ = struct.unpack_from(
+                        "<III", data, slot + 4
+                    )
+                    if magic != self.__NDB_SLOT_MAGIC or pkg_index == 0:
+                        continue
+                    blob_start = block_offset * self.__NDB_BLOCK_SIZE
+                    blob_magic = data[blob_start:blob_start + 4]
+                    if blob_start + 16 > len(data) or \
+                       blob_magic != self.__NDB_BLOB_MAGIC:
+                        continue
+                    blob_index, _, blob_length = struct.unpack_from(
+                        "<III", data, blob_start + 4
+                    )
+                    if blob_index != pkg_index:
+                        continue
+                    yield pkg_index, data[blob_start + 16:
+                                          blob_start + 16 + blob_length]
+
+    def __iter_bdb(self, path: str) -> "Iterator[Tuple[int, bytes]]":
+        """Reads the hash pages of the Berkeley DB backend and yields the
+        data of each key/data pair, following overflow pages when the
+        header does not fit in a single page."""
+        with open(path, "rb") as file:
+            if os.fstat(file.fileno()).st_size < 512:
+                return
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                for order in ("<", ">"):
+                    if struct.unpack_from(order + "I", data, 12)[0] == \
+                       self.__BDB_HASH_MAGIC:
+                        break
+                else:
+                    return
+                page_size = struct.unpack_from(order + "I", data, 20)[0]
+                if page_size < 512:
+                    return
+                for page in range(1, len(data) // page_size):
+                    start = page * page_size
+                    if data[start + 25] not in self.__BDB_HASH_PAGES:
+                        continue
+                    entries = struct.unpack_from(order + "H", data,
+                                                 start + 20)[0]
+                    offsets = struct.unpack_from(
+                        order + "%dH" % entries, data,
+                        start + self.__BDB_PAGE_HEADER
+                    )
+                    for item in range(0, entries - 1, 2):
+                        key = self.__bdb_item(data, start, page_size,
+                                              offsets, item, order)
+                        value = self.__bdb_item(data, start, page_size,
+                                                offsets, item + 1, order)
+                        if key is None or value is None or len(key) != 4:
+                            continue
+                        record = struct.unpack(order + "I", key)[0]
+                        # Record 0 only stores the next free instance number
+                        if record == 0 or len(value) < 8:
+                            continue
+                        yield record, value
+
+    def __bdb_item(
+        self, data: mmap.mmap, start: int, page_size: int,
+        offsets: "Tuple[int, ...]", item: int, order: str
+    ) -> "Optional[bytes]":
+        """Returns the content of a hash page item, either stored inline or
+        in a chain of overflow pages."""
+        offset = offsets[item]
+        end = offsets[item - 1] if item > 0 else page_size
+        item_type = data[start + offset]
+        if item_type == self.__BDB_KEYDATA:
+            return data[start + offset + 1:start + end]
+        if item_type != self.__BDB_OFFPAGE:
+            return None
+
+        page, total = struct.unpack_from(order + "II", data,
+                                         start + offset + 4)
+        chunks: "list[bytes]" = []
+        remaining = total
+        while page != 0 and remaining > 0:
+            page_start = page * page_size
+            if page_start + page_size > len(data) or \
+               data[page_start + 25] != self.__BDB_OVERFLOW_PAGE:
+                return None
+            length = struct.unpack_from(order + "H", data, page_start + 22)[0]
+            body = page_start + self.__BDB_PAGE_HEADER
+            chunks.append(data[body:body + min(length, remaining)])
+            remaining -= length
+            page = struct.unpack_from(order + "I", data, page_start + 16)[0]
+        return b"".join(chunks)
@@ -0,0 +1,175 @@
+# ####################################################
+
+# This code is part of the "Mirak-extractor" software and, consequently, is
+# part of the "Mirak" project. It is expressly forbidden to copy, reproduce,
+# distribute or make available this code or parts thereof in isolation, except
+# under the terms expressly authorized by the rights holder.
+
+# The provision of the complete software must strictly follow the guidelines
+# established in the applicable license, as detailed in the license file
+# included in this repository. Any unauthorized use may result in sanctions
+# provided for in Brazilian law, including, but not limited to,
+# Law No. 9.610/1998 (Copyright Law).
+
+# For more information or specific requests, please contact the holder through
+# the contact details present in the license file.
+
+# ####################################################
+
+"""
+This module contains the "RtrClient" class, which measures how fast an RTR
+cache (RFC 6810 and RFC 8210) delivers the VRPs to a router.
+"""
+
+import socket
+import struct
+import time
+from typing import Dict
+from app.extract_rede_info import ExtractRedeInfo
+from app.service_prober import ServiceProber
+
+
+class RtrClient:
+    """Sends a Reset Query to an RTR cache and reads the Cache Response as
+    a stream of PDUs: each PDU is read into a preallocated buffer and only
+    counted, so the VRP set is never kept in memory. Version 1 is tried
+    first and, if the cache does not support it, version 0."""
+
+    VERSIONS = (1, 0)
+    RESET_QUERY = 2
+    CACHE_RESPONSE = 3
+    END_OF_DATA = 7
+    CACHE_RESET = 8
+    ERROR_REPORT = 10
+    # Error code of the Error Report PDU for an unsupported version
+    UNSUPPORTED_VERSION = 4
+    PDU_NAMES = {
+        0: "serialNotify",
+        3: "cacheResponse",
+        4: "ipv4Prefix",
+        6: "ipv6Prefix",
+        7: "endOfData",
+        8: "cacheReset",
+        9: "routerKey",
+        10: "errorReport",
+        11: "aspa",
+    }
+    # version, type, session id (or error code) and length
+    __HEADER = struct.Struct("!BBHI")
+    # The largest PDU of a well-behaved cache is an Error Report or a
+    # Router Key; larger ones are read in several parts
+    __BUFFER_SIZE = 65536
+
+    def __init__(self, timeout: float = 10.0) -> None:
+        self.timeout = timeout
+        self.__buffer = bytearray(self.__BUFFER_SIZE)
+        self.__view = memoryview(self.__buffer)
+
+    def __read(self, sock: socket.socket, size: int) -> memoryview:
+        """Reads exactly "size" bytes (at most the size of the buffer).
+        Raises EOFError if the cache closes the connection."""
+        received = 0
+        while received < size:
+            count = sock.recv_into(self.__view[received:size])
+            if count == 0:
+                raise EOFError("connection closed by the cache")
+            received += count
+        return self.__view[:size]
+
+    def __skip(self, sock: socket.socket, size: int) -> None:
+        """Discards the body of a PDU, in parts if it is large"""
+        while size > 0:
+            part = min(size, self.__BUFFER_SIZE)
+            self.__read(sock, part)
+            size -= part
+
+    def __error_text(self, sock: socket.socket, code: int,
+                     size: int) -> str:
+        """Reads the body of an Error Report PDU (the erroneous PDU and the
+        diagnostic text) and returns its text"""
+        text = ""
+        if size <= self.__BUFFER_SIZE:
+            data = bytes(self.__read(sock, size))
+            if len(data) >= 4:
+                start = 4 + struct.unpack_from("!I", data)[0]
+                if len(data) >= start + 4:
+                    length = struct.unpack_from("!I", data, start)[0]
+                    text = data[start + 4:start + 4 + length] \
+                        .decode("utf8", "replace")
+        return f"error report {code}" + (f": {text}" if text else "")
+
+    def query(self, host: str, port: int, version: int) -> dict:
+        """Sends a Reset Query with the given version and reads the answer
+        up to the End of Data PDU. Times are measured from the moment the
+        query is sent."""
+        pdus: "Dict[str, int]" = {}
+        result: dict = {
+            "version": version,
+            "sessionId": None,
+            "serial": None,
+            "timeToFirstPduMs": None,
+            "timeToEndOfDataMs": None,
+            "pdus": pdus,
+            "bytes": 0,
+            "error": None,
+        }
+        with socket.create_connection((host, port), self.timeout) as sock:
+            sock.settimeout(self.timeout)
+            started = time.perf_counter()
+            sock.sendall(self.__HEADER.pack(version, self.RESET_QUERY, 0,
+                                            self.__HEADER.size))
+            while True:
+                header = self.__read(sock, self.__HEADER.size)
+                _, kind, session, length = self.__HEADER.unpack(header)
+                if result["timeToFirstPduMs"] is None:
+                    result["timeToFirstPduMs"] = round(
+                        (time.perf_counter() - started) * 1000, 3)
+                if length < self.__HEADER.size:
+                    raise ValueError(f"invalid PDU length {length}")
+                name = self.PDU_NAMES.get(kind, f"type{kind}")
+                pdus[name] = pdus.get(name, 0) + 1
+                result["bytes"] += length
+                body = length - self.__HEADER.size
+                if kind == self.END_OF_DATA and body >= 4:
+                    data = self.__read(sock, body)
+                    result["timeToEndOfDataMs"] = round(
+                        (time.perf_counter() - started) * 1000, 3)
+                    result["sessionId"] = session
+                    result["serial"] = struct.unpack_from("!I", data)[0]
+                    if body >= 16:
+                        result["refreshInterval"], result["retryInterval"], \
+                            result["expireInterval"] = \
+                            struct.unpack_from("!III", data, 4)
+                    return result
+                if kind == self.ERROR_REPORT:
+                    result["error"] = self.__error_text(sock, session, body)
+                    result["errorCode"] = session
+                    return result
+                if kind == self.CACHE_RESET:
+                    result["error"] = "cache reset"
+                    return result
+                self.__skip(sock, body)
+
+    def probe(self, host: str, port: int) -> dict:
+        """Measures the delivery of the VRPs by a cache, negotiating the
+        version. Connection errors are reported in "error"."""
+        result: dict = {}
+        for version in self.VERSIONS:
+            try:
+                result = self.query(host, port, version)
+            except (OSError, EOFError, ValueError) as ex:
+                return {"version": version, "error": str(ex) or
+                        type(ex).__name__}
+            if result.get("errorCode") != self.UNSUPPORTED_VERSION:
+                break
+        result.pop("errorCode", None)
+        return result
+
+    def probe_endpoint(self, endpoint: str) -> dict:
+        """Probes an "rtr-listen" address ("127.0.0.1:3323", "[::]:3323").
+        A wildcard address is reached through the loopback."""
+        parsed = ExtractRedeInfo.parse_endpoint(endpoint)
+        if parsed is None:
+            return {"endpoint": endpoint, "error": "invalid address"}
+        host = ServiceProber.target_address(parsed[0])
+        return {"endpoint": endpoint, **self.probe(host, parsed[1])}
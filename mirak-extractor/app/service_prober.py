@@ -0,0 +1,210 @@
+# ####################################################
+
+# This code is part of the "Mirak-extractor" software and, consequently, is
+# part of the "Mirak" project. It is expressly forbidden to copy, reproduce,
+# distribute or make available this code or parts thereof in isolation, except
+# under the terms expressly authorized by the rights holder.
+
+# The provision of the complete software must strictly follow the guidelines
+# established in the applicable license, as detailed in the license file
+# included in this repository. Any unauthorized use may result in sanctions
+# provided for in Brazilian law, including, but not limited to,
+# Law No. 9.610/1998 (Copyright Law).
+
+# For more information or specific requests, please contact the holder through
+# the contact details present in the license file.
+
+# ####################################################
+
+"""
+This module contains the "ServiceProber" class, which connects to the
+listening ports of the host to find out which service answers on each one.
+"""
+
+import asyncio
+import ssl
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+class ServiceProber:
+    """Probes the listeners of the host concurrently, on a single event
+    loop, so that probing many ports takes about as long as the slowest
+    probe. At most "concurrency" connections are open at a time and every
+    step (connection, TLS handshake, read) of a probe shares one deadline,
+    so that a probe never takes longer than the timeout. For each
+    listener the connection latency, whether TLS is offered and the
+    fingerprint of the protocol ("ssh", "http" or "rtr") are recorded."""
+
+    # Sent when the service does not speak first. An RTR server answers
+    # the unknown version with an Error Report PDU.
+    HTTP_REQUEST = b"HEAD / HTTP/1.0\r\nUser-Agent: mirak-extractor\r\n\r\n"
+    BANNER_LENGTH = 80
+    __READ_SIZE = 512
+    # RTR Error Report PDU type
+    __RTR_ERROR_REPORT = 10
+
+    def __init__(self, concurrency: int = 64, timeout: float = 1.0) -> None:
+        self.concurrency = max(1, concurrency)
+        self.timeout = timeout
+
+    @staticmethod
+    def target_address(address: str) -> str:
+        """Returns the address to connect to a listener; the wildcard
+        addresses are reached through the loopback"""
+        if address == "0.0.0.0":
+            return "127.0.0.1"
+        if address == "::":
+            return "::1"
+        return address
+
+    @classmethod
+    def fingerprint(cls, data: bytes) -> "Tuple[Optional[str], Optional[str]]":
+        """Identifies the protocol of the first bytes sent by a service and
+        returns it with the banner (its first line), if it is text"""
+        if not data:
+            return None, None
+        if len(data) >= 8 and data[0] <= 2 and \
+                data[1] == cls.__RTR_ERROR_REPORT:
+            return "rtr", None
+        if data[0] in (0x15, 0x16):
+            # A TLS record (alert or handshake)
+            return None, None
+        line = data.split(b"\n", 1)[0].strip()
+        banner = line[:cls.BANNER_LENGTH].decode("ascii", "replace") \
+            if line else None
+        if data.startswith(b"SSH-"):
+            return "ssh", banner
+        if data.startswith(b"HTTP/"):
+            return "http", banner
+        return None, banner
+
+    @staticmethod
+    def __remaining(deadline: float) -> float:
+        return max(0.0, deadline - time.monotonic())
+
+    async def __close(self, writer: asyncio.StreamWriter,
+                      deadline: float) -> None:
+        writer.close()
+        try:
+            await asyncio.wait_for(writer.wait_closed(),
+                                   self.__remaining(deadline))
+        except (OSError, asyncio.TimeoutError):
+            pass
+
+    async def __exchange(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter,
+        deadline: float
+    ) -> bytes:
+        """Waits for the service to speak first (SSH does) and, if it does
+        not, sends an HTTP request and reads the answer"""
+        try:
+            return await asyncio.wait_for(
+                reader.read(self.__READ_SIZE),
+                min(self.timeout / 2, self.__remaining(deadline))
+            )
+        except asyncio.TimeoutError:
+            pass
+        writer.write(self.HTTP_REQUEST)
+        try:
+            await asyncio.wait_for(writer.drain(), self.__remaining(deadline))
+            return await asyncio.wait_for(reader.read(self.__READ_SIZE),
+                                          self.__remaining(deadline))
+        except asyncio.TimeoutError:
+            return b""
+
+    async def __probe_tls(self, host: str, port: int,
+                          deadline: float) -> "Optional[dict]":
+        """Tries a TLS handshake; the certificate is not verified, since
+        only the offer of TLS is of interest. Returns None if the service
+        does not speak TLS."""
+        context = ssl.create_default_context()
+        context.check_hostname = False
+        context.verify_mode = ssl.CERT_NONE
+        started = time.perf_counter()
+        try:
+            reader, writer = await asyncio.wait_for(
+                asyncio.open_connection(host, port, ssl=context),
+                self.__remaining(deadline)
+            )
+        except (OSError, ssl.SSLError, asyncio.TimeoutError):
+            return None
+        handshake = time.perf_counter() - started
+        try:
+            data = await self.__exchange(reader, writer, deadline)
+        except OSError:
+            data = b""
+        finally:
+            await self.__close(writer, deadline)
+        protocol, banner = self.fingerprint(data)
+        return {"handshakeMs": round(handshake * 1000, 3),
+                "protocol": protocol, "banner": banner}
+
+    async def probe(self, address: str, port: int) -> dict:
+        """Probes one listener and returns what was found in the MIRAK
+        format. "error" tells why a listener could not be probed."""
+        host = self.target_address(address)
+        result: dict = {
+            "address": address,
+            "port": port,
+            "connectMs": None,
+            "tls": False,
+            "tlsHandshakeMs": None,
+            "protocol": None,
+            "banner": None,
+            "error": None,
+        }
+        deadline = time.monotonic() + self.timeout
+        started = time.perf_counter()
+        try:
+            reader, writer = await asyncio.wait_for(
+                asyncio.open_connection(host, port),
+                self.__remaining(deadline)
+            )
+        except asyncio.TimeoutError:
+            result["error"] = "timeout"
+            return result
+        except OSError as ex:
+            result["error"] = ex.strerror or str(ex)
+            return result
+        result["connectMs"] = round((time.perf_counter() - started) * 1000, 3)
+        try:
+            data = await self.__exchange(reader, writer, deadline)
+        except OSError:
+            data = b""
+        finally:
+            await self.__close(writer, deadline)
+        result["protocol"], result["banner"] = self.fingerprint(data)
+        # SSH and RTR never run over TLS; an HTTP server may answer a plain
+        # request on its TLS port with "400 Bad Request"
+        status = data.split(b"\n", 1)[0]
+        if result["protocol"] is None or \
+                (result["protocol"] == "http" and b" 400 " in status):
+            tls = await self.__probe_tls(host, port, deadline)
+            if tls is not None:
+                result["tls"] = True
+                result["tlsHandshakeMs"] = tls["handshakeMs"]
+                result["protocol"] = tls["protocol"] or result["protocol"]
+                result["banner"] = tls["banner"] or result["banner"]
+        return result
+
+    async def probe_all(
+        self, listeners: "Iterable[Tuple[str, int]]"
+    ) -> "List[dict]":
+        """Probes the given listeners (address and port) concurrently and
+        returns the results in the same order"""
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def bounded(address: str, port: int) -> dict:
+            async with semaphore:
+                return await self.probe(address, port)
+
+        return list(await asyncio.gather(
+            *(bounded(address, port) for address, port in listeners)
+        ))
+
+    def run(self, listeners: "Iterable[Tuple[str, int]]") -> "Dict[int, dict]":
+        """Probes the listeners on a new event loop and returns the results
+        by port"""
+        results = asyncio.run(self.probe_all(list(listeners)))
+        return {result.pop("port"): result for result in results}
@@ -0,0 +1,146 @@
+# ####################################################
+
+# This code is part of the "Mirak-extractor" software and, consequently, is
+# part of the "Mirak" project. It is expressly forbidden to copy, reproduce,
+# distribute or make available this code or parts thereof in isolation, except
+# under the terms expressly authorized by the rights holder.
+
+# The provision of the complete software must strictly follow the guidelines
+# established in the applicable license, as detailed in the license file
+# included in this repository. Any unauthorized use may result in sanctions
+# provided for in Brazilian law, including, but not limited to,
+# Law No. 9.610/1998 (Copyright Law).
+
+# For more information or specific requests, please contact the holder through
+# the contact details present in the license file.
+
+# ####################################################
+
+"""
+This module contains the "SockDiagReader" class, which asks the kernel for
+the listening TCP sockets through netlink ("NETLINK_SOCK_DIAG"), so that
+the connections of the host are filtered by the kernel itself.
+"""
+
+import errno
+import os
+import socket
+import struct
+from typing import Dict, Iterator, Optional, Tuple
+from app.proc_net_reader import Listener, SocketKey
+
+
+class SockDiagReader:
+    """Dumps the TCP sockets in the LISTEN state, for IPv4 and IPv6, with
+    "inet_diag" requests. Only the listening sockets are sent back by the
+    kernel, however large the connection table is."""
+
+    NETLINK_SOCK_DIAG = 4
+    SOCK_DIAG_BY_FAMILY = 20
+    NLM_F_REQUEST = 0x01
+    NLM_F_DUMP = 0x300
+    NLMSG_ERROR = 2
+    NLMSG_DONE = 3
+    TCP_LISTEN = 10
+    # nlmsghdr: length, type, flags, sequence and port id
+    __HEADER = struct.Struct("=IHHII")
+    # inet_diag_req_v2: family, protocol, extensions, padding, states and
+    # the socket id (ports, addresses, interface and cookie)
+    __REQUEST = struct.Struct("=BBBBI48s")
+    # inet_diag_msg: family, state, timer, retransmits, the socket id
+    # (big-endian ports and addresses), expires, queues, uid and inode
+    __MESSAGE = struct.Struct("=BBBB2s2s16s16sI8sIIIII")
+    __BUFFER_SIZE = 65536
+
+    def __init__(self, timeout: float = 2.0) -> None:
+        self.timeout = timeout
+
+    @staticmethod
+    def is_supported() -> bool:
+        """Checks whether the platform has netlink sockets"""
+        return hasattr(socket, "AF_NETLINK")
+
+    def build_request(self, family: int, sequence: int) -> bytes:
+        """Builds the dump request of the listening TCP sockets of an
+        address family"""
+        request = self.__REQUEST.pack(
+            family, socket.IPPROTO_TCP, 0, 0, 1 << self.TCP_LISTEN, b""
+        )
+        return self.__HEADER.pack(
+            self.__HEADER.size + len(request), self.SOCK_DIAG_BY_FAMILY,
+            self.NLM_F_REQUEST | self.NLM_F_DUMP, sequence, 0
+        ) + request
+
+    def parse_messages(
+        self, data: bytes,
+        queues: "Optional[Dict[SocketKey, Tuple[int, int]]]" = None
+    ) -> "Tuple[list, bool]":
+        """Decodes a buffer received from the kernel. Returns the listening
+        sockets found and whether the end of the dump was reached. For a
+        listening socket the kernel reports the accept queue and its limit
+        (the backlog), which are stored in "queues" when it is given.
+        Raises OSError if the kernel refused the request."""
+        listeners = []
+        offset = 0
+        while offset + self.__HEADER.size <= len(data):
+            length, kind, _, _, _ = self.__HEADER.unpack_from(data, offset)
+            if length < self.__HEADER.size:
+                break
+            body = offset + self.__HEADER.size
+            if kind == self.NLMSG_DONE:
+                return listeners, True
+            if kind == self.NLMSG_ERROR:
+                code = -struct.unpack_from("=i", data, body)[0]
+                raise OSError(code, os.strerror(code))
+            if kind == self.SOCK_DIAG_BY_FAMILY:
+                (family, state, _, _, sport, _, source, _, _, _,
+                 _, rqueue, wqueue, _, inode) = self.__MESSAGE.unpack_from(
+                     data, body)
+                if state == self.TCP_LISTEN:
+                    if family == socket.AF_INET:
+                        protocol = "tcp"
+                        address = socket.inet_ntop(family, source[:4])
+                    else:
+                        protocol = "tcp6"
+                        address = socket.inet_ntop(family, source)
+                    port = struct.unpack("!H", sport)[0]
+                    listeners.append(Listener(protocol, address, port, inode))
+                    if queues is not None:
+                        queues[(protocol, address, port)] = (rqueue, wqueue)
+            # Messages are aligned to 4 bytes
+            offset += (length + 3) & ~3
+        return listeners, False
+
+    def __dump(
+        self, family: int,
+        queues: "Optional[Dict[SocketKey, Tuple[int, int]]]"
+    ) -> "Iterator[Listener]":
+        """Yields the listening sockets of one address family"""
+        with socket.socket(socket.AF_NETLINK, socket.SOCK_DGRAM,
+                           self.NETLINK_SOCK_DIAG) as sock:
+            sock.settimeout(self.timeout)
+            sock.sendall(self.build_request(family, 1))
+            while True:
+                listeners, done = self.parse_messages(
+                    sock.recv(self.__BUFFER_SIZE), queues
+                )
+                yield from listeners
+                if done:
+                    return
+
+    def iter_listeners(
+        self, queues: "Optional[Dict[SocketKey, Tuple[int, int]]]" = None
+    ) -> "Iterator[Listener]":
+        """Yields the listening TCP sockets, IPv4 first, and stores their
+        accept queue and backlog in "queues" when it is given. Raises
+        OSError if netlink is not available, so that the caller can fall
+        back to "/proc/net". A host without IPv6 simply has no IPv6
+        sockets."""
+        if not self.is_supported():
+            raise OSError(errno.EAFNOSUPPORT, "netlink is not supported")
+        yield from self.__dump(socket.AF_INET, queues)
+        try:
+            yield from self.__dump(socket.AF_INET6, queues)
+        except OSError as ex:
+            if ex.errno not in (errno.ENOENT, errno.EAFNOSUPPORT):
+                raise
@@ -0,0 +1,339 @@
+# ####################################################
+
+# This code is part of the "Mirak-extractor" software and, consequently, is
+# part of the "Mirak" project. It is expressly forbidden to copy, reproduce,
+# distribute or make available this code or parts thereof in isolation, except
+# under the terms expressly authorized by the rights holder.
+
+# The provision of the complete software must strictly follow the guidelines
+# established in the applicable license, as detailed in the license file
+# included in this repository. Any unauthorized use may result in sanctions
+# provided for in Brazilian law, including, but not limited to,
+# Law No. 9.610/1998 (Copyright Law).
+
+# For more information or specific requests, please contact the holder through
+# the contact details present in the license file.
+
+# ####################################################
+
+"""
+This module contains the software collectors, each responsible for one
+source of installed software (the operating system package manager, snap,
+flatpak, Python site-packages and cargo), and the "SoftwareCollectors"
+registry, which runs them concurrently.
+"""
+
+import abc
+import glob
+import json
+import os
+import queue
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator, List, Optional, Tuple
+import tomli
+from app.apps_found import AppsFound
+
+
+class SoftwareCollector(abc.ABC):
+    """Base class of the software collectors. Each collector yields the
+    product name, vendor, version and (optionally) architecture of the
+    software it finds, in the same format used by "AppsFound"."""
+
+    name = ""
+    # Failures of a required collector abort the extraction
+    required = False
+    # Rows already sanitized by the collector itself
+    sanitized = False
+
+    def is_available(self) -> bool:
+        """Checks whether the source of software exists on the host"""
+        return True
+
+    @abc.abstractmethod
+    def collect(self) -> "Iterator[list[str]]":
+        """Yields the software found"""
+
+
+class PackageManagerCollector(SoftwareCollector):
+    """Collects the software installed by the package manager of the
+    operating system (dpkg or rpm), through "AppsFound"."""
+
+    required = True
+    sanitized = True
+
+    def __init__(self, apps_found: AppsFound, os: str,
+                 rebuild: bool = False) -> None:
+        self.apps_found = apps_found
+        self.os = os
+        self.rebuild = rebuild
+        self.name = "rpm" if os == "enterprise" else "dpkg"
+
+    def collect(self) -> "Iterator[list[str]]":
+        yield from self.apps_found.iter_apps(self.os, self.rebuild)
+
+
+class SnapCollector(SoftwareCollector):
+    """Collects the snaps mounted under "/snap", reading the metadata
+    ("meta/snap.yaml") of the current revision of each one."""
+
+    name = "snap"
+
+    def __init__(self, root: str = "/snap") -> None:
+        self.root = root
+
+    def is_available(self) -> bool:
+        return os.path.isdir(self.root)
+
+    def collect(self) -> "Iterator[list[str]]":
+        for path in sorted(glob.glob(
+            os.path.join(self.root, "*", "current", "meta", "snap.yaml")
+        )):
+            name = path.split(os.sep)[-4]
+            version = ""
+            arch = "all"
+            with open(path, "r", encoding="utf8") as file:
+                lines = file.read().splitlines()
+            for position, line in enumerate(lines):
+                if line.startswith("version:"):
+                    version = line.split(":", 1)[1].strip().strip("'\"")
+                elif line.startswith("architectures:"):
+                    inline = line.split(":", 1)[1].strip()
+                    if inline.startswith("["):
+                        arch = inline.strip("[]").split(",")[0].strip()
+                    elif position + 1 < len(lines) and \
+                            lines[position + 1].strip().startswith("-"):
+                        arch = lines[position + 1].strip()[1:].strip()
+            if version:
+                yield [name, "", version, arch]
+
+
+class FlatpakCollector(SoftwareCollector):
+    """Collects the flatpak applications installed system-wide. The version
+    is read from the application metainfo and, when it is not declared,
+    the branch is used instead."""
+
+    name = "flatpak"
+    __RELEASE = re.compile(r"<release\b[^>]*\bversion=\"([^\"]+)\"")
+
+    def __init__(self, root: str = "/var/lib/flatpak/app") -> None:
+        self.root = root
+
+    def is_available(self) -> bool:
+        return os.path.isdir(self.root)
+
+    def collect(self) -> "Iterator[list[str]]":
+        for app_id in sorted(os.listdir(self.root)):
+            current = os.path.join(self.root, app_id, "current")
+            if not os.path.islink(current):
+                continue
+            # "current" points to "<arch>/<branch>"
+            arch, _, branch = os.readlink(current).partition("/")
+            yield [app_id, "", self.__read_version(current) or branch, arch]
+
+    def __read_version(self, current: str) -> "Optional[str]":
+        """Returns the newest release declared in the metainfo of an
+        application, if any"""
+        for pattern in ("metainfo", "appdata"):
+            for path in sorted(glob.glob(os.path.join(
+                current, "active", "files", "share", pattern, "*.xml"
+            ))):
+                with open(path, "r", encoding="utf8",
+                          errors="replace") as file:
+                    match = self.__RELEASE.search(file.read())
+                if match:
+                    return match.group(1)
+        return None
+
+
+class PythonCollector(SoftwareCollector):
+    """Collects the Python distributions installed with pip. Only the
+    "/usr/local" site directories are read, because the system ones are
+    already managed, and reported, by the package manager."""
+
+    name = "pip"
+
+    def __init__(self, patterns: "Tuple[str, ...]" = (
+        "/usr/local/lib/python3*/dist-packages",
+        "/usr/local/lib/python3*/site-packages",
+        "/usr/local/lib64/python3*/site-packages",
+    )) -> None:
+        self.patterns = patterns
+
+    def __directories(self) -> "List[str]":
+        directories: "List[str]" = []
+        for pattern in self.patterns:
+            directories.extend(sorted(glob.glob(pattern)))
+        return directories
+
+    def is_available(self) -> bool:
+        return bool(self.__directories())
+
+    def collect(self) -> "Iterator[list[str]]":
+        for directory in self.__directories():
+            for path in sorted(glob.glob(os.path.join(directory, "*.dist-info",
+                                                      "METADATA")) +
+                               glob.glob(os.path.join(directory, "*.egg-info",
+                                                      "PKG-INFO"))):
+                name = version = ""
+                with open(path, "r", encoding="utf8",
+                          errors="replace") as file:
+                    # Only the header section, up to the first blank line
+                    for line in file:
+                        if not line.strip():
+                            break
+                        if line.startswith("Name:"):
+                            name = line[5:].strip()
+                        elif line.startswith("Version:"):
+                            version = line[8:].strip()
+                if name and version:
+                    yield [name.lower(), "", version]
+
+
+class CargoCollector(SoftwareCollector):
+    """Collects the binaries installed with "cargo install", which is a
+    common way of installing Routinator. The installation registry of each
+    cargo home (".crates2.json" or ".crates.toml") is read."""
+
+    name = "cargo"
+    __PACKAGE = re.compile(r"^(\S+) (\S+) \(")
+
+    def __init__(self, homes: "Optional[Tuple[str, ...]]" = None) -> None:
+        if homes is None:
+            homes = tuple(dict.fromkeys(
+                home for home in (
+                    os.environ.get("CARGO_HOME"),
+                    os.path.join(os.path.expanduser("~"), ".cargo"),
+                    "/root/.cargo",
+                    "/usr/local/cargo",
+                ) if home
+            ))
+        self.homes = homes
+
+    def __registries(self) -> "List[str]":
+        registries: "List[str]" = []
+        for home in self.homes:
+            for file_name in (".crates2.json", ".crates.toml"):
+                path = os.path.join(home, file_name)
+                if os.path.isfile(path):
+                    registries.append(path)
+                    break
+        return registries
+
+    def is_available(self) -> bool:
+        return bool(self.__registries())
+
+    def collect(self) -> "Iterator[list[str]]":
+        seen: "set[str]" = set()
+        for path in self.__registries():
+            if path.endswith(".json"):
+                with open(path, "r", encoding="utf8") as file:
+                    packages = list(json.load(file).get("installs", {}))
+            else:
+                with open(path, "rb") as file:
+                    packages = list(tomli.load(file).get("v1", {}))
+            for package in packages:
+                match = self.__PACKAGE.match(package)
+                if match and package not in seen:
+                    seen.add(package)
+                    yield [match.group(1), "", match.group(2)]
+
+
+class SoftwareCollectors:
+    """Registry of software collectors. The available collectors run
+    concurrently on a thread pool, and the software they find is yielded
+    in the order of the registry, so that the result is deterministic.
+    The rows of the first collector are yielded while it still runs."""
+
+    # Optional sources of software, run alongside the package manager only
+    # on request, since they add vendors unknown to the package managers
+    # to the report
+    OPTIONAL_COLLECTORS: "Tuple[type, ...]" = (
+        SnapCollector,
+        FlatpakCollector,
+        PythonCollector,
+        CargoCollector,
+    )
+    __DONE = object()
+
+    def __init__(
+        self,
+        apps_found: AppsFound,
+        os: str,
+        rebuild: bool = False,
+        collectors: "Optional[List[SoftwareCollector]]" = None,
+        max_workers: Optional[int] = None,
+        optional: bool = False,
+    ) -> None:
+        self.apps_found = apps_found
+        self.os = os
+        if collectors is None:
+            collectors = [PackageManagerCollector(apps_found, os, rebuild)]
+            if optional:
+                collectors.extend(
+                    collector() for collector in self.OPTIONAL_COLLECTORS
+                )
+        self.collectors = collectors
+        self.max_workers = max_workers
+        self.timings: "dict[str, dict]" = {}
+        self.errors: "dict[str, str]" = {}
+
+    def __run(self, collector: SoftwareCollector,
+              output: "queue.Queue") -> None:
+        """Runs one collector, sending each row it finds to its queue"""
+        start = time.perf_counter()
+        cpu = time.thread_time()
+        count = 0
+        try:
+            for row in collector.collect():
+                if not collector.sanitized:
+                    row = self.apps_found.sanitize_app(row, collector.name)
+                output.put(row)
+                count += 1
+        except Exception as ex:
+            self.errors[collector.name] = str(ex)
+            output.put(ex)
+        finally:
+            self.timings[collector.name] = {
+                "seconds": time.perf_counter() - start,
+                "cpu_seconds": time.thread_time() - cpu,
+                "items": count,
+            }
+            output.put(self.__DONE)
+
+    def iter_apps(self) -> "Iterator[list[str]]":
+        """Runs the available collectors and yields the software found.
+        A failure of an optional collector is recorded in "errors" and does
+        not interrupt the others."""
+        collectors = [collector for collector in self.collectors
+                      if collector.is_available()]
+        if not collectors:
+            return
+        queues: "List[queue.Queue]" = [queue.Queue() for _ in collectors]
+        self.timings = {collector.name: {"seconds": 0.0,
+                                         "cpu_seconds": 0.0, "items": 0}
+                        for collector in collectors}
+        workers = self.max_workers or len(collectors)
+        with ThreadPoolExecutor(max_workers=workers,
+                                thread_name_prefix="collector") as executor:
+            for collector, output in zip(collectors, queues):
+                executor.submit(self.__run, collector, output)
+            for collector, output in zip(collectors, queues):
+                while True:
+                    row = output.get()
+                    if row is self.__DONE:
+                        break
+                    if isinstance(row, Exception):
+                        if collector.required:
+                            raise row
+                        continue
+                    yield row
+
+    def summary(self) -> str:
+        """Returns a human readable summary of the time spent by each
+        collector"""
+        return "\n".join(
+            f"{name}: {timing['items']} items in {timing['seconds']:.3f}s"
+            for name, timing in self.timings.items()
+        )
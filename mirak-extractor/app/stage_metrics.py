@@ -0,0 +1,196 @@
+# ####################################################
+
+# This code is part of the "Mirak-extractor" software and, consequently, is
+# part of the "Mirak" project. It is expressly forbidden to copy, reproduce,
+# distribute or make available this code or parts thereof in isolation, except
+# under the terms expressly authorized by the rights holder.
+
+# The provision of the complete software must strictly follow the guidelines
+# established in the applicable license, as detailed in the license file
+# included in this repository. Any unauthorized use may result in sanctions
+# provided for in Brazilian law, including, but not limited to,
+# Law No. 9.610/1998 (Copyright Law).
+
+# For more information or specific requests, please contact the holder through
+# the contact details present in the license file.
+
+# ####################################################
+
+"""
+This module contains the "StageMetrics" class, which measures the cost of
+each stage of the extraction process and exports it in the OpenMetrics text
+format, to be collected by the node_exporter textfile collector.
+"""
+
+import os
+import resource
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional
+
+
+class StageRecord:
+    """Measurements of a single stage"""
+
+    def __init__(self) -> None:
+        self.wall_seconds = 0.0
+        self.cpu_seconds = 0.0
+        self.peak_rss_delta_bytes = 0
+        self.items: "Dict[str, int]" = {}
+        self.errors = 0
+
+    def count(self, kind: str, amount: int = 1) -> None:
+        """Adds to the number of items of a kind processed by the stage"""
+        self.items[kind] = self.items.get(kind, 0) + amount
+
+    def error(self, amount: int = 1) -> None:
+        """Adds to the number of errors found by the stage"""
+        self.errors += amount
+
+    def as_dict(self) -> dict:
+        """Returns the measurements in the MIRAK format"""
+        return {
+            "wallSeconds": round(self.wall_seconds, 6),
+            "cpuSeconds": round(self.cpu_seconds, 6),
+            "peakRssDeltaBytes": self.peak_rss_delta_bytes,
+            "items": dict(self.items),
+            "errors": self.errors,
+        }
+
+
+class StageMetrics:
+    """Collects the wall time, CPU time, peak RSS growth, item counts and
+    error counts of each stage. The CPU time is the one spent by the thread
+    that runs the stage, since stages run concurrently; work that a stage
+    delegates to other threads can be added with "StageRecord.cpu_seconds".
+    The peak RSS is the high-water mark of the whole process."""
+
+    PREFIX = "mirak_extractor"
+
+    def __init__(self) -> None:
+        self.stages: "Dict[str, StageRecord]" = {}
+        self.collectors: "Dict[str, dict]" = {}
+        self.__lock = threading.Lock()
+
+    def stage(self, name: str) -> StageRecord:
+        """Returns the record of a stage, creating it if needed"""
+        with self.__lock:
+            return self.stages.setdefault(name, StageRecord())
+
+    @staticmethod
+    def __peak_rss_bytes() -> int:
+        # "ru_maxrss" is reported in kilobytes on Linux
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+    @contextmanager
+    def measure(self, name: str) -> "Iterator[StageRecord]":
+        """Measures the block of code of a stage. An exception raised by the
+        block is counted as an error and raised again."""
+        record = self.stage(name)
+        peak_rss = self.__peak_rss_bytes()
+        cpu = time.thread_time()
+        wall = time.perf_counter()
+        try:
+            yield record
+        except BaseException:
+            record.error()
+            raise
+        finally:
+            record.wall_seconds += time.perf_counter() - wall
+            record.cpu_seconds += time.thread_time() - cpu
+            record.peak_rss_delta_bytes += self.__peak_rss_bytes() - peak_rss
+
+    def add_collectors(self, timings: "Dict[str, dict]") -> None:
+        """Stores the time spent and items found by each software
+        collector"""
+        self.collectors.update(timings)
+
+    def as_dict(self, stages: "Optional[List[str]]" = None) -> dict:
+        """Returns the measurements in the MIRAK format. The stages can be
+        restricted to the given names."""
+        names = stages if stages is not None else list(self.stages)
+        data: dict = {
+            "stages": {name: self.stages[name].as_dict()
+                       for name in names if name in self.stages}
+        }
+        if self.collectors:
+            data["collectors"] = {
+                name: {"seconds": round(timing["seconds"], 6),
+                       "cpuSeconds": round(timing.get("cpu_seconds", 0.0), 6),
+                       "items": timing["items"]}
+                for name, timing in self.collectors.items()
+            }
+        return data
+
+    def to_openmetrics(self, timestamp: Optional[float] = None) -> str:
+        """Returns the measurements in the OpenMetrics text format"""
+        prefix = self.PREFIX
+        lines: "List[str]" = []
+
+        def family(name: str, help_text: str, unit: str = "") -> None:
+            lines.append(f"# TYPE {prefix}_{name} gauge")
+            if unit:
+                lines.append(f"# UNIT {prefix}_{name} {unit}")
+            lines.append(f"# HELP {prefix}_{name} {help_text}")
+
+        def sample(name: str, labels: "Dict[str, str]", value: float) -> None:
+            text = ",".join(
+                f'{key}="{self.__escape(label)}"'
+                for key, label in labels.items()
+            )
+            lines.append(f"{prefix}_{name}{{{text}}} {value}")
+
+        stages = list(self.stages.items())
+        family("stage_duration_seconds", "Wall time spent by the stage.",
+               "seconds")
+        for name, record in stages:
+            sample("stage_duration_seconds", {"stage": name},
+                   round(record.wall_seconds, 6))
+        family("stage_cpu_seconds", "CPU time spent by the stage.", "seconds")
+        for name, record in stages:
+            sample("stage_cpu_seconds", {"stage": name},
+                   round(record.cpu_seconds, 6))
+        family("stage_peak_rss_delta_bytes",
+               "Growth of the process peak RSS during the stage.", "bytes")
+        for name, record in stages:
+            sample("stage_peak_rss_delta_bytes", {"stage": name},
+                   record.peak_rss_delta_bytes)
+        family("stage_items", "Items processed by the stage.")
+        for name, record in stages:
+            for kind, amount in record.items.items():
+                sample("stage_items", {"stage": name, "kind": kind}, amount)
+        family("stage_errors", "Errors found by the stage.")
+        for name, record in stages:
+            sample("stage_errors", {"stage": name}, record.errors)
+        if self.collectors:
+            family("collector_duration_seconds",
+                   "Wall time spent by the software collector.", "seconds")
+            for name, timing in self.collectors.items():
+                sample("collector_duration_seconds", {"collector": name},
+                       round(timing["seconds"], 6))
+            family("collector_items", "Software found by the collector.")
+            for name, timing in self.collectors.items():
+                sample("collector_items", {"collector": name},
+                       timing["items"])
+        family("last_run_timestamp_seconds",
+               "Time when the extraction finished.", "seconds")
+        if timestamp is None:
+            timestamp = time.time()
+        lines.append(f"{prefix}_last_run_timestamp_seconds " +
+                     f"{round(timestamp, 3)}")
+        lines.append("# EOF")
+        return "\n".join(lines) + "\n"
+
+    @staticmethod
+    def __escape(value: str) -> str:
+        return value.replace("\\", "\\\\").replace("\"", "\\\"") \
+            .replace("\n", "\\n")
+
+    def write_textfile(self, path: str) -> None:
+        """Writes the measurements to a node_exporter textfile. The file is
+        replaced atomically, so that a partial file is never collected."""
+        temporary = f"{path}.{os.getpid()}.tmp"
+        with open(temporary, "w", encoding="utf8") as file:
+            file.write(self.to_openmetrics())
+        os.replace(temporary, path)
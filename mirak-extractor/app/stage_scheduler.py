@@ -0,0 +1,131 @@
+# ####################################################
+
+# This code is part of the "Mirak-extractor" software and, consequently, is
+# part of the "Mirak" project. It is expressly forbidden to copy, reproduce,
+# distribute or make available this code or parts thereof in isolation, except
+# under the terms expressly authorized by the rights holder.
+
+# The provision of the complete software must strictly follow the guidelines
+# established in the applicable license, as detailed in the license file
+# included in this repository. Any unauthorized use may result in sanctions
+# provided for in Brazilian law, including, but not limited to,
+# Law No. 9.610/1998 (Copyright Law).
+
+# For more information or specific requests, please contact the holder through
+# the contact details present in the license file.
+
+# ####################################################
+
+"""
+This module contains the "StageScheduler" class, which executes the stages
+of the extraction process as a dependency graph, running concurrently the
+stages that do not depend on each other.
+"""
+
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, \
+    wait
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+
+class Stage:
+    """A step of the extraction process, with the names of the stages that
+    must be finished before it starts. An exclusive stage runs alone, for
+    instance because it may ask the user something."""
+
+    def __init__(self, name: str, action: "Callable[[], Any]",
+                 depends: "Tuple[str, ...]" = (),
+                 exclusive: bool = False) -> None:
+        self.name = name
+        self.action = action
+        self.depends = depends
+        self.exclusive = exclusive
+
+
+class StageScheduler:
+    """Executes a graph of stages on a thread pool. A stage starts as soon as
+    all of its dependencies are finished. With a single worker the stages
+    run one after another, in the order they were added. The results are
+    stored in "results" as the stages finish, so a stage can read the
+    results of its dependencies."""
+
+    def __init__(self, max_workers: Optional[int] = None) -> None:
+        self.max_workers = max_workers
+        self.stages: "Dict[str, Stage]" = {}
+        self.results: "Dict[str, Any]" = {}
+
+    def add_stage(self, name: str, action: "Callable[[], Any]",
+                  depends: "Tuple[str, ...]" = (),
+                  exclusive: bool = False) -> None:
+        """Adds a stage to the graph. An exclusive stage only starts when
+        no other stage is running, and no stage starts while it runs."""
+        if name in self.stages:
+            raise ValueError(f"Stage '{name}' already exists")
+        self.stages[name] = Stage(name, action, tuple(depends), exclusive)
+
+    def order(self) -> "List[str]":
+        """Returns the stages in an order that respects their dependencies,
+        keeping the insertion order whenever possible. Raises ValueError if
+        a dependency is unknown or if the graph has a cycle."""
+        for stage in self.stages.values():
+            for dependency in stage.depends:
+                if dependency not in self.stages:
+                    raise ValueError(f"Stage '{stage.name}' depends on " +
+                                     f"unknown stage '{dependency}'")
+        ordered: "List[str]" = []
+        done: "set[str]" = set()
+        while len(ordered) < len(self.stages):
+            ready = [name for name, stage in self.stages.items()
+                     if name not in done and
+                     all(dependency in done for dependency in stage.depends)]
+            if not ready:
+                raise ValueError("The stages have a dependency cycle")
+            ordered.append(ready[0])
+            done.add(ready[0])
+        return ordered
+
+    def run(self) -> "Dict[str, Any]":
+        """Executes every stage and returns their results by name. If a
+        stage fails, the stages not yet started are skipped, the running
+        ones are waited for and the error is raised again."""
+        order = self.order()
+        results = self.results
+        results.clear()
+        workers = self.max_workers or len(order) or 1
+        with ThreadPoolExecutor(max_workers=workers,
+                                thread_name_prefix="stage") as executor:
+            running: "Dict[Future, str]" = {}
+            pending = list(order)
+            error: Optional[BaseException] = None
+            while pending or running:
+                if error is None:
+                    for name in list(pending):
+                        stage = self.stages[name]
+                        if len(running) >= workers or any(
+                            self.stages[other].exclusive
+                            for other in running.values()
+                        ):
+                            break
+                        if not all(dependency in results for dependency in
+                                   stage.depends):
+                            continue
+                        if stage.exclusive and running:
+                            # The stages after it wait, so that it is not
+                            # delayed indefinitely
+                            break
+                        pending.remove(name)
+                        running[executor.submit(stage.action)] = name
+                    if not running:
+                        break
+                elif not running:
+                    break
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    name = running.pop(future)
+                    exception = future.exception()
+                    if exception is not None:
+                        error = error or exception
+                    else:
+                        results[name] = future.result()
+            if error is not None:
+                raise error
+        return results
@@ -0,0 +1,32 @@
+"""
+Fixtures shared by the benchmarks. The benchmarks are skipped unless the
+"MIRAK_BENCHMARK" environment variable is set:
+
+    MIRAK_BENCHMARK=1 python -m pytest -q app/tests/benchmark -s
+
+"MIRAK_BENCHMARK_SCALE" multiplies the size of the fixtures (for example,
+0.1 for a quick run) and "MIRAK_BENCHMARK_UPDATE=1" stores the results as
+the new baseline instead of comparing against it. The baseline stores the
+throughput of each stage relative to a reference loop of the interpreter,
+so it does not depend on the speed of the machine. Each measurement lasts
+at least "MIRAK_BENCHMARK_MIN_SECONDS" (0.2 by default).
+"""
+
+import pytest
+from app.tests.benchmark.runner import ENABLED, UPDATE, BenchmarkRunner
+
+
+def pytest_collection_modifyitems(config, items):
+    skip = pytest.mark.skip(reason="set MIRAK_BENCHMARK=1 to run")
+    for item in items:
+        if not ENABLED and "benchmark" in item.nodeid.split("/"):
+            item.add_marker(skip)
+
+
+@pytest.fixture(scope="session")
+def benchmark_runner():
+    runner = BenchmarkRunner()
+    yield runner
+    print("\n" + runner.report())
+    if UPDATE and runner.results:
+        runner.save_baseline()
@@ -0,0 +1,113 @@
+"""
+Generators of synthetic host data used by the benchmarks: a dpkg status
+file, the socket tables of "/proc/net" and the tree of a Routinator
+repository directory.
+"""
+
+import os
+from collections import namedtuple
+from typing import Iterator, List, Tuple
+
+# Same fields used from "psutil.net_connections"
+Connection = namedtuple("Connection", ["laddr", "status", "pid"])
+Address = namedtuple("Address", ["ip", "port"])
+
+TCP_STATES = {"ESTABLISHED": "01", "LISTEN": "0A", "TIME_WAIT": "06"}
+
+
+def write_dpkg_status(path: str, packages: int) -> None:
+    """Writes a dpkg status file with the given number of installed
+    packages. One package in ten is only configured, not installed."""
+    with open(path, "w", encoding="utf8") as file:
+        for index in range(packages):
+            status = "deinstall ok config-files" if index % 10 == 9 \
+                else "install ok installed"
+            file.write(
+                f"Package: package-{index}\n"
+                f"Status: {status}\n"
+                "Priority: optional\n"
+                "Section: libs\n"
+                f"Installed-Size: {index % 4096}\n"
+                f"Maintainer: Maintainer {index % 97} "
+                f"<maintainer{index % 97}@example.org>\n"
+                f"Architecture: {'all' if index % 3 else 'amd64'}\n"
+                f"Version: {index % 13}.{index % 7}.{index}-1ubuntu1\n"
+                f"Depends: libc6 (>= 2.{index % 35}), package-{index // 2}\n"
+                f"Description: synthetic package {index}\n"
+                " A package generated for the benchmarks.\n"
+                "\n"
+            )
+
+
+def iter_sockets(sockets: int) -> "Iterator[Tuple[int, str, int]]":
+    """Yields the local port, TCP state and inode of the synthetic sockets.
+    Most of them are established connections of a few listeners, as on a
+    busy RPKI validator."""
+    for index in range(sockets):
+        if index % 100 == 0:
+            yield 1024 + index // 100, "LISTEN", 100000 + index
+        elif index % 7 == 0:
+            yield 32768 + index % 28000, "TIME_WAIT", 0
+        else:
+            yield 3323, "ESTABLISHED", 100000 + index
+
+
+def write_proc_net(root: str, sockets: int) -> None:
+    """Writes "net/tcp" and "net/tcp6" under "root" with the given number
+    of sockets, split between both files, in the kernel format."""
+    directory = os.path.join(root, "net")
+    os.makedirs(directory, exist_ok=True)
+    header = "  sl  local_address rem_address   st tx_queue rx_queue tr " + \
+        "tm->when retrnsmt   uid  timeout inode\n"
+    tcp = open(os.path.join(directory, "tcp"), "w", encoding="ascii")
+    tcp6 = open(os.path.join(directory, "tcp6"), "w", encoding="ascii")
+    with tcp, tcp6:
+        tcp.write(header)
+        tcp6.write(header)
+        for index, (port, state, inode) in enumerate(iter_sockets(sockets)):
+            code = TCP_STATES[state]
+            if index % 2:
+                local = f"00000000000000000000000000000000:{port:04X}"
+                remote = "0000000000000000FFFF00000100007F:" + \
+                    f"{index % 65535:04X}"
+                file = tcp6
+            else:
+                local = f"00000000:{port:04X}"
+                remote = f"0100007F:{index % 65535:04X}"
+                file = tcp
+            file.write(
+                f"{index:4d}: {local} {remote} {code} 00000000:00000000 "
+                f"00:00000000 00000000   998        0 {inode} 1 "
+                "0000000000000000 100 0 0 10 0\n"
+            )
+
+
+def build_connections(sockets: int) -> "List[Connection]":
+    """Returns the synthetic sockets as "psutil.net_connections" does"""
+    return [
+        Connection(Address("0.0.0.0", port), state,
+                   1000 + inode % 50 if inode else None)
+        for port, state, inode in iter_sockets(sockets)
+    ]
+
+
+def build_repository_tree(root: str, files: int,
+                          files_per_directory: int = 1000) -> "List[str]":
+    """Creates a tree similar to the Routinator repository directory, with
+    the given number of small files, and returns the paths of the files.
+    The files are grouped by publication point, "files_per_directory" in
+    each one."""
+    paths: "List[str]" = []
+    kinds = ("roa", "mft", "crl", "cer")
+    for index in range(files):
+        directory = os.path.join(
+            root, "rrdp", f"rpki{index // 100000}.example.net",
+            "repository", f"ca{index // files_per_directory}"
+        )
+        if index % files_per_directory == 0:
+            os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"object{index}.{kinds[index % 4]}")
+        with open(path, "wb") as file:
+            file.write(b"0")
+        paths.append(path)
+    return paths
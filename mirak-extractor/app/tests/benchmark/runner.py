@@ -0,0 +1,160 @@
+"""
+Measurement of the benchmarks and comparison against the stored baseline.
+"""
+
+import gc
+import json
+import os
+import statistics
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List
+
+ENABLED = os.environ.get("MIRAK_BENCHMARK", "") not in ("", "0")
+# Multiplies the size of every fixture, to run a smaller or larger suite
+SCALE = float(os.environ.get("MIRAK_BENCHMARK_SCALE", "1"))
+# Accepted fraction of loss of throughput or growth of peak memory
+TOLERANCE = float(os.environ.get("MIRAK_BENCHMARK_TOLERANCE", "0.3"))
+# Minimum time of each measurement: a stage (or the reference loop) runs
+# again until it is reached, so that fast stages are not measured by a
+# single execution of a millisecond
+MIN_SECONDS = float(os.environ.get("MIRAK_BENCHMARK_MIN_SECONDS", "0.2"))
+# Growth of peak memory always accepted, so that stages that allocate
+# almost nothing do not fail because of the allocations of the interpreter
+MEMORY_SLACK = 64 * 1024
+UPDATE = os.environ.get("MIRAK_BENCHMARK_UPDATE", "") not in ("", "0")
+BASELINE = os.environ.get(
+    "MIRAK_BENCHMARK_BASELINE",
+    os.path.join(os.path.dirname(__file__), "baseline.json")
+)
+
+
+# Items of one execution of the reference loop
+REFERENCE_ITEMS = 20_000
+
+
+def scaled(size: int) -> int:
+    """Returns a fixture size multiplied by the scale of the suite"""
+    return max(1, int(size * SCALE))
+
+
+def reference_loop() -> int:
+    """Work of the interpreter alone (formatting, splitting and dict
+    inserts), whose speed is that of the machine that runs the suite"""
+    table: "Dict[str, str]" = {}
+    for number in range(REFERENCE_ITEMS):
+        key = f"package-{number}"
+        table[key] = key.split("-")[1]
+    return len(table)
+
+
+class BenchmarkRunner:
+    """Measures the throughput and the peak memory of a stage. The time is
+    measured without "tracemalloc", which slows down the allocations, and
+    the memory in a second execution of the stage. The throughput is
+    compared as a ratio to the throughput of a reference loop measured
+    right before each measurement of the stage, so that the baseline holds
+    on any machine and a slower period of the machine slows both."""
+
+    def __init__(self, baseline_path: str = BASELINE,
+                 tolerance: float = TOLERANCE) -> None:
+        self.baseline_path = baseline_path
+        self.tolerance = tolerance
+        self.results: "Dict[str, dict]" = {}
+        try:
+            with open(baseline_path, "r", encoding="utf8") as file:
+                self.baseline: "Dict[str, dict]" = json.load(file)
+        except (OSError, ValueError):
+            self.baseline = {}
+
+    @staticmethod
+    def __rate(action: "Callable[[], Any]", items: int) -> float:
+        """Runs an action for at least "MIN_SECONDS" (once, at least) and
+        returns the items processed per second"""
+        gc.collect()
+        runs = 0
+        start = time.perf_counter()
+        while True:
+            action()
+            runs += 1
+            elapsed = time.perf_counter() - start
+            if elapsed >= MIN_SECONDS:
+                return items * runs / elapsed
+
+    def measure(self, name: str, items: int, action: "Callable[[], Any]",
+                repeat: int = 5) -> dict:
+        """Measures the throughput (items per second) of the stage in
+        "repeat" rounds, each one preceded by a measurement of the
+        reference loop, and records the median of the rounds, with the
+        peak of memory allocated by the stage. Returns the differences from
+        the baseline that exceed the tolerance as a list in
+        "regressions"."""
+        throughputs: "List[float]" = []
+        ratios: "List[float]" = []
+        for _ in range(repeat):
+            reference = self.__rate(reference_loop, REFERENCE_ITEMS)
+            throughputs.append(self.__rate(action, items))
+            ratios.append(throughputs[-1] / reference)
+        throughput = statistics.median(throughputs)
+
+        gc.collect()
+        tracemalloc.start()
+        try:
+            action()
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        result = {
+            "items": items,
+            "seconds": round(items / throughput, 6),
+            "throughput": round(throughput, 1),
+            "relativeThroughput": round(statistics.median(ratios), 4),
+            "peakBytes": peak,
+        }
+        self.results[name] = result
+        result["regressions"] = self.compare(name, result)
+        return result
+
+    def compare(self, name: str, result: dict) -> "List[str]":
+        """Returns the regressions of a result against the baseline. Stages
+        without a baseline have no regressions."""
+        expected = self.baseline.get(name)
+        if expected is None or UPDATE:
+            return []
+        regressions: "List[str]" = []
+        minimum = expected["relativeThroughput"] * (1 - self.tolerance)
+        if result["relativeThroughput"] < minimum:
+            regressions.append(
+                f"{name}: throughput {result['relativeThroughput']}x the " +
+                f"reference below {round(minimum, 4)}x " +
+                f"(baseline {expected['relativeThroughput']}x)"
+            )
+        maximum = expected["peakBytes"] * (1 + self.tolerance) + MEMORY_SLACK
+        if result["peakBytes"] > maximum:
+            regressions.append(
+                f"{name}: peak memory {result['peakBytes']} bytes above " +
+                f"{int(maximum)} bytes (baseline {expected['peakBytes']})"
+            )
+        return regressions
+
+    def save_baseline(self) -> None:
+        """Stores the results of this execution as the new baseline,
+        keeping the stages that were not executed"""
+        baseline = dict(self.baseline)
+        for name, result in self.results.items():
+            baseline[name] = {
+                key: result[key]
+                for key in ("items", "relativeThroughput", "peakBytes")
+            }
+        with open(self.baseline_path, "w", encoding="utf8") as file:
+            json.dump(dict(sorted(baseline.items())), file, indent=4)
+            file.write("\n")
+
+    def report(self) -> str:
+        """Returns a table with the results of this execution"""
+        return "\n".join(
+            f"{name:<40} {result['throughput']:>14.1f} items/s " +
+            f"{result['peakBytes'] / 1048576:>10.1f} MiB"
+            for name, result in self.results.items()
+        )
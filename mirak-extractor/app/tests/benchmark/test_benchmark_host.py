@@ -0,0 +1,104 @@
+import os
+import time
+import pytest
+from mock import patch
+from app.extract_files_direct_info import ExtractFilesDirectoriesInfo
+from app.extract_rede_info import ExtractRedeInfo
+from app.repository_cache import RepositoryCache
+from app.tests.benchmark.fixtures import build_connections, \
+    build_repository_tree, write_proc_net
+from app.tests.benchmark.runner import scaled
+from app.tree_audit import TreeAudit
+
+
+class FakeProcess:
+    def __init__(self, pid):
+        self.pid = pid
+
+    def name(self):
+        return f"process-{self.pid}"
+
+
+@pytest.mark.parametrize("size", [10000, 100000])
+def teste_caso_benchmark_extract_ports(benchmark_runner, size, tmp_path):
+    write_proc_net(str(tmp_path), scaled(size))
+    instance = ExtractRedeInfo(proc_root=str(tmp_path), use_netlink=False)
+
+    result = benchmark_runner.measure(
+        f"extract_ports@{scaled(size)}", scaled(size), instance.extract_ports
+    )
+    assert not result["regressions"], result["regressions"]
+
+
+@pytest.mark.parametrize("size", [10000, 100000])
+def teste_caso_benchmark_extract_ports_psutil(benchmark_runner, size):
+    connections = build_connections(scaled(size))
+    instance = ExtractRedeInfo(proc_root="/nonexistent",
+                               use_netlink=False)
+
+    with patch("psutil.net_connections", return_value=connections), \
+         patch("psutil.Process", FakeProcess):
+        result = benchmark_runner.measure(
+            f"extract_ports_psutil@{len(connections)}", len(connections),
+            instance.extract_ports
+        )
+    assert not result["regressions"], result["regressions"]
+
+
+@pytest.fixture(scope="module")
+def repository_tree(tmp_path_factory):
+    root = str(tmp_path_factory.mktemp("repository"))
+    return build_repository_tree(root, scaled(1000000))
+
+
+def teste_caso_benchmark_strategic_files(benchmark_runner, repository_tree):
+    instance = ExtractFilesDirectoriesInfo()
+
+    result = benchmark_runner.measure(
+        f"get_important_files_or_directories@{len(repository_tree)}",
+        len(repository_tree),
+        lambda: instance.get_important_files_or_directories(repository_tree),
+        repeat=1,
+    )
+    assert not result["regressions"], result["regressions"]
+
+
+def teste_caso_benchmark_tree_audit(benchmark_runner, repository_tree):
+    root = os.path.commonpath(repository_tree)
+    instance = TreeAudit()
+
+    result = benchmark_runner.measure(
+        f"tree_audit@{len(repository_tree)}", len(repository_tree),
+        lambda: instance.audit(root), repeat=3,
+    )
+    assert not result["regressions"], result["regressions"]
+
+
+def teste_caso_benchmark_repository_cache(benchmark_runner,
+                                          repository_tree):
+    root = os.path.commonpath(repository_tree)
+    instance = RepositoryCache()
+
+    result = benchmark_runner.measure(
+        f"repository_cache@{len(repository_tree)}", len(repository_tree),
+        lambda: instance.scan(root), repeat=3,
+    )
+    assert not result["regressions"], result["regressions"]
+
+
+def teste_caso_benchmark_tree_audit_incremental(benchmark_runner,
+                                                repository_tree, tmp_path):
+    root = os.path.commonpath(repository_tree)
+    manifest_path = os.path.join(tmp_path, "manifest.idx")
+    instance = TreeAudit()
+    # The tree was just built, so the first scan is dated after its ctimes
+    with patch("app.tree_audit.time.time_ns",
+               return_value=time.time_ns() + 3600 * 10**9):
+        instance.audit(root, manifest_path=manifest_path)
+
+    result = benchmark_runner.measure(
+        f"tree_audit_incremental@{len(repository_tree)}",
+        len(repository_tree),
+        lambda: instance.audit(root, manifest_path=manifest_path),
+    )
+    assert not result["regressions"], result["regressions"]
@@ -0,0 +1,59 @@
+import os
+import pytest
+from app.apps import Apps
+from app.apps_found import AppsFound
+from app.main_process import Process
+from app.report import Report
+from app.tests.benchmark.fixtures import write_dpkg_status
+from app.tests.benchmark.runner import scaled
+
+SIZES = [1000, 10000, 50000]
+
+
+@pytest.fixture(scope="module", params=SIZES)
+def dpkg_status(request, tmp_path_factory):
+    path = os.path.join(tmp_path_factory.mktemp("dpkg"), "status")
+    write_dpkg_status(path, scaled(request.param))
+    return scaled(request.param), path
+
+
+def teste_caso_benchmark_locate_apps(benchmark_runner, dpkg_status):
+    size, path = dpkg_status
+    instance = AppsFound(dpkg_status_path=path)
+    apps = instance.locate_apps("ubuntu")
+
+    result = benchmark_runner.measure(
+        f"locate_apps@{size}", len(apps),
+        lambda: instance.locate_apps("ubuntu")
+    )
+    assert not result["regressions"], result["regressions"]
+
+
+def teste_caso_benchmark_add_app(benchmark_runner, dpkg_status):
+    size, path = dpkg_status
+    apps = AppsFound(dpkg_status_path=path).locate_apps("ubuntu")
+
+    def add_all():
+        instance = Apps()
+        for software in apps:
+            instance.add_app(software)
+
+    result = benchmark_runner.measure(f"add_app@{size}", len(apps), add_all)
+    assert not result["regressions"], result["regressions"]
+
+
+def teste_caso_benchmark_export_data(benchmark_runner, dpkg_status, tmp_path):
+    size, path = dpkg_status
+    report = Report()
+    for software in AppsFound(dpkg_status_path=path).locate_apps("ubuntu"):
+        app = Apps.build_app(software)
+        report.add_apps(app["type"], app["vendor"], app["product"],
+                        app["version"], app["cpe_name"])
+    output = os.path.join(tmp_path, "mirak.json")
+    instance = Process()
+
+    result = benchmark_runner.measure(
+        f"export_data@{size}", len(report.apps_found),
+        lambda: instance.export_data(output, report)
+    )
+    assert not result["regressions"], result["regressions"]
@@ -0,0 +1,55 @@
+"""
+Minimal HTTP server used by the tests in place of the HTTP endpoint of
+Routinator: it serves fixed bodies by path and answers 404 otherwise.
+"""
+
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict
+
+
+class StubHttpServer:
+    """HTTP server on an ephemeral port of the loopback. Used as a context
+    manager; "address" is the "http-listen" form of the server and
+    "requests" counts the requests received on each connection."""
+
+    def __init__(self, bodies: "Dict[str, bytes]") -> None:
+        self.bodies = bodies
+        self.requests: "list[str]" = []
+        self.connections = 0
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def setup(self) -> None:
+                super().setup()
+                stub.connections += 1
+
+            def do_GET(self) -> None:
+                stub.requests.append(self.path)
+                body = stub.bodies.get(self.path)
+                if body is None:
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args) -> None:
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        self.port = self.server.server_address[1]
+        self.address = f"127.0.0.1:{self.port}"
+
+    def __enter__(self) -> "StubHttpServer":
+        threading.Thread(target=self.server.serve_forever,
+                         daemon=True).start()
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.server.shutdown()
+        self.server.server_close()
@@ -0,0 +1,79 @@
+"""
+Minimal RTR cache used by the tests: it answers a Reset Query with a Cache
+Response, the configured number of IPv4 and IPv6 prefixes and End of Data.
+"""
+
+import socket
+import socketserver
+import struct
+import threading
+from typing import Tuple
+
+HEADER = struct.Struct("!BBHI")
+
+
+class StubRtrServer:
+    """Local RTR cache on an ephemeral port of the loopback. Used as a
+    context manager; "address" is the "rtr-listen" form of the server."""
+
+    def __init__(self, ipv4_prefixes: int = 10, ipv6_prefixes: int = 5,
+                 versions: "Tuple[int, ...]" = (0, 1), session: int = 7,
+                 serial: int = 42) -> None:
+        self.ipv4_prefixes = ipv4_prefixes
+        self.ipv6_prefixes = ipv6_prefixes
+        self.versions = versions
+        self.session = session
+        self.serial = serial
+        self.queries: "list[int]" = []
+        stub = self
+
+        class Handler(socketserver.BaseRequestHandler):
+            def handle(self) -> None:
+                stub.answer(self.request)
+
+        self.server = socketserver.ThreadingTCPServer(("127.0.0.1", 0),
+                                                      Handler)
+        self.server.daemon_threads = True
+        self.port = self.server.server_address[1]
+        self.address = f"127.0.0.1:{self.port}"
+
+    @staticmethod
+    def error_report(version: int, code: int, text: bytes) -> bytes:
+        return HEADER.pack(version, 10, code, 16 + len(text)) + \
+            struct.pack("!I", 0) + struct.pack("!I", len(text)) + text
+
+    def answer(self, sock: socket.socket) -> None:
+        version, kind, _, _ = HEADER.unpack(sock.recv(HEADER.size))
+        self.queries.append(version)
+        if version not in self.versions:
+            sock.sendall(self.error_report(max(self.versions), 4,
+                                           b"Unsupported Protocol Version"))
+            return
+        if kind != 2:
+            sock.sendall(self.error_report(version, 3, b""))
+            return
+        chunks = [HEADER.pack(version, 3, self.session, 8)]
+        for number in range(self.ipv4_prefixes):
+            chunks.append(HEADER.pack(version, 4, 0, 20) + struct.pack(
+                "!BBBB4sI", 1, 24, 24, 0, struct.pack("!I", number << 8),
+                64512))
+        for number in range(self.ipv6_prefixes):
+            chunks.append(HEADER.pack(version, 6, 0, 32) + struct.pack(
+                "!BBBB16sI", 1, 48, 48, 0, number.to_bytes(16, "big"),
+                64512))
+        if version == 0:
+            chunks.append(HEADER.pack(version, 7, self.session, 12) +
+                          struct.pack("!I", self.serial))
+        else:
+            chunks.append(HEADER.pack(version, 7, self.session, 24) +
+                          struct.pack("!IIII", self.serial, 3600, 600, 7200))
+        sock.sendall(b"".join(chunks))
+
+    def __enter__(self) -> "StubRtrServer":
+        threading.Thread(target=self.server.serve_forever,
+                         daemon=True).start()
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.server.shutdown()
+        self.server.server_close()
@@ -0,0 +1,79 @@
+import os
+import stat
+from unittest import mock
+from app.ancestor_chain import AncestorChain
+from app.extract_files_direct_info import ExtractFilesDirectoriesInfo
+
+
+def teste_caso_cadeia_sem_elo_fraco(tmp_path):
+    os.chmod(tmp_path, 0o755)
+    path = os.path.join(tmp_path, "routinator.conf")
+    open(path, "w").close()
+
+    # A directory that only its owner writes adds nothing to the chain
+    chain = AncestorChain()
+    assert chain.weakest_link(path) == chain.weakest_link(str(tmp_path))
+    with mock.patch("app.ancestor_chain.os.stat",
+                    return_value=os.stat_result((stat.S_IFDIR | 0o755,) +
+                                                (0,) * 9)):
+        assert AncestorChain().weakest_link(path) == \
+            {"path": None, "mode": None, "issue": None}
+
+
+def teste_caso_elo_mais_fraco(tmp_path):
+    shared = os.path.join(tmp_path, "shared")
+    repository = os.path.join(shared, "repository")
+    os.makedirs(os.path.join(repository, "rrdp"))
+    os.chmod(shared, 0o1777)
+    os.chmod(repository, 0o775)
+    path = os.path.join(repository, "rrdp", "a.roa")
+    open(path, "w").close()
+    os.chmod(path, 0o600)
+
+    # The group-writable directory is worse than the sticky one above it
+    assert AncestorChain().weakest_link(path) == \
+        {"path": repository, "mode": "0775", "issue": "group-writable"}
+
+    os.chmod(shared, 0o777)
+    assert AncestorChain().weakest_link(path) == \
+        {"path": shared, "mode": "0777", "issue": "world-writable"}
+
+
+def teste_caso_rank_dos_modos():
+    assert AncestorChain.rank(stat.S_IFDIR | 0o755) == 0
+    assert AncestorChain.RANKS[AncestorChain.rank(0o1777) - 1] == \
+        "world-writable-sticky"
+    assert AncestorChain.RANKS[AncestorChain.rank(0o2770) - 1] == \
+        "group-writable"
+
+
+def teste_caso_um_stat_por_diretorio(tmp_path):
+    directories = [os.path.join(tmp_path, f"rrdp-{number}")
+                   for number in range(3)]
+    paths = []
+    for directory in directories:
+        os.makedirs(directory)
+        for number in range(50):
+            path = os.path.join(directory, f"{number}.roa")
+            open(path, "w").close()
+            paths.append(path)
+    chain = AncestorChain()
+
+    with mock.patch("app.ancestor_chain.os.stat", wraps=os.stat) as status:
+        links = [chain.weakest_link(path) for path in paths]
+    checked = [call.args[0] for call in status.call_args_list]
+    assert len(checked) == len(set(checked))
+    assert len(checked) == len(chain)
+    assert len(checked) == str(tmp_path).count(os.sep) + 1 + 3
+    assert all(link == links[0] for link in links[:50])
+
+
+def teste_caso_informacao_dos_arquivos(tmp_path):
+    path = os.path.join(tmp_path, "routinator.conf")
+    open(path, "w").close()
+    chain = AncestorChain()
+
+    files = ExtractFilesDirectoriesInfo(chain).\
+        get_important_files_or_directories([path, str(tmp_path)])
+    assert files[0]["ancestors"] == chain.weakest_link(path)
+    assert set(files[1]["ancestors"]) == {"path", "mode", "issue"}
@@ -1,11 +1,20 @@
+import io
 import pytest
 from mock import patch
 from app.apps_found import AppsFound
+from app.dpkg_status_reader import DpkgStatusReader
+from app.rpm_db_reader import RpmDbReader
 
 
 class MockStdout:
     def __init__(self, stdout):
-        self.stdout = stdout
+        self.stdout = io.StringIO(stdout)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
 
 def teste_caso_localizar_apps_ubuntu():
     instance = AppsFound()
@@ -25,7 +34,8 @@ wireless-regdb|Ubuntu Developers <ubuntu-devel-discuss@lists.ubuntu.com>|2022.06
 wpasupplicant|Ubuntu Developers <ubuntu-devel-discuss@lists.ubuntu.com>|2:2.9-1ubuntu4.4|amd64
 wslu|Balint Reczey <rbalint@ubuntu.com>|2.3.6-0ubuntu2~20.04.0|all
 """)
-    with patch("subprocess.run", return_value=content):
+    with patch("subprocess.Popen", return_value=content), \
+         patch.object(DpkgStatusReader, "is_available", return_value=False):
         softwares = instance.locate_apps("ubuntu")
         assert len(softwares) == 15
         assert softwares[0][0] == "usbutils"
@@ -48,7 +58,8 @@ wireless-regdb|Ubuntu Developers <ubuntu-devel-discuss@lists.ubuntu.com>|2022.06
 wpasupplicant|Ubuntu Developers <ubuntu-devel-discuss@lists.ubuntu.com>|2:2.9-1ubuntu4.4|amd64
 wslu|Balint Reczey <rbalint@ubuntu.com>|2.3.6-0ubuntu2~20.04.0|all
 """)
-    with patch("subprocess.run", return_value=content):
+    with patch("subprocess.Popen", return_value=content), \
+         patch.object(DpkgStatusReader, "is_available", return_value=False):
         softwares = instance.locate_apps("ubuntu")
         assert len(softwares) == 15
         assert softwares[0][0] == "usbutils"
@@ -73,7 +84,8 @@ wslu|Balint Reczey <rbalint@ubuntu.com>|2.3.6-0ubuntu2~20.04.0|all
 python3|Ubuntu Developers <ubuntu-devel-discuss@lists.ubuntu.com>|3.9.4|amd64
 routinator|Ubuntu Developers <ubuntu-devel-discuss@lists.ubuntu.com>|0.9.0-rc3|amd64
 """)
-    with patch("subprocess.run", return_value=content):
+    with patch("subprocess.Popen", return_value=content), \
+         patch.object(DpkgStatusReader, "is_available", return_value=False):
         softwares = instance.locate_apps("ubuntu")
         assert len(softwares) == 17
         assert softwares[0][0] == "usbutils"
@@ -101,7 +113,8 @@ gpg-pubkey|(none)|08c4cc43|(none)
 rsync|Red Hat, Inc.|3.2.3|x86_64
 routinator|(none)|0.14.0|x86_64
 """)
-    with patch("subprocess.run", return_value=content):
+    with patch("subprocess.Popen", return_value=content), \
+         patch.object(RpmDbReader, "is_available", return_value=False):
         softwares = instance.locate_apps("enterprise")
         assert len(softwares) == 20
         assert softwares[0][0] == "dnf"
@@ -0,0 +1,47 @@
+from mock import patch
+from app.apps_found import AppsFound
+from app.dpkg_status_reader import DpkgStatusReader
+
+
+class MockPopen:
+    def __init__(self, lines):
+        self.read = 0
+        self.stdout = self.__stream(lines)
+
+    def __stream(self, lines):
+        for line in lines:
+            self.read += 1
+            yield line
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+
+def teste_caso_iterar_apps_sob_demanda():
+    instance = AppsFound()
+    process = MockPopen([
+        "curl|Ubuntu Developers <ubuntu-devel@lists.ubuntu.com>|" +
+        "7.68.0|amd64\n",
+        "wget:amd64|Ubuntu Developers <ubuntu-devel@lists.ubuntu.com>|" +
+        "1.20.3|amd64\n",
+        "routinator|NLnet Labs <routinator@nlnetlabs.nl>|0.14.0|amd64\n",
+    ])
+    with patch("subprocess.Popen", return_value=process), \
+         patch.object(DpkgStatusReader, "is_available", return_value=False):
+        softwares = instance.iter_apps("ubuntu")
+        assert next(softwares) == ["curl", "ubuntu-tag_rec-app", "7.68.0",
+                                   "amd64"]
+        assert process.read == 1
+        remaining = list(softwares)
+        assert process.read == 3
+        assert remaining[0][0] == "wget"
+        assert remaining[1][1] == "nlnetlabs"
+
+
+def teste_caso_iterar_apps_sistema_desconhecido():
+    instance = AppsFound()
+
+    assert list(instance.iter_apps("arch")) == []
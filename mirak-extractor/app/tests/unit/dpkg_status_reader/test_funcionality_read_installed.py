@@ -0,0 +1,73 @@
+from app.apps_found import AppsFound
+from app.dpkg_status_reader import DpkgStatusReader
+
+
+STATUS = """Package: adduser
+Status: install ok installed
+Priority: important
+Maintainer: Debian Adduser Developers <adduser@packages.debian.org>
+Architecture: all
+Version: 3.134
+Conffiles:
+ /etc/adduser.conf cc3493ecd2d09837ffdcc3e25fdfff18
+Description: add and remove users and groups
+ This package includes the 'adduser' and 'deluser' commands.
+
+Package: vim
+Status: deinstall ok config-files
+Maintainer: Debian Vim Maintainers <team+vim@tracker.debian.org>
+Architecture: amd64
+Version: 2:9.0.1378-2
+
+Package: routinator
+Status: hold ok installed
+Maintainer: NLnet Labs <routinator@nlnetlabs.nl>
+Architecture: amd64
+Version: 0.14.0-1~bookworm
+Description: RPKI relying party software
+
+
+Package: python3
+Status: deinstall ok installed
+Maintainer: Matthias Klose <doko@debian.org>
+Architecture: amd64
+Version: 3.11.2-1+b1
+"""
+
+
+def teste_caso_ler_pacotes_instalados(tmp_path):
+    status = tmp_path / "status"
+    status.write_text(STATUS)
+    instance = DpkgStatusReader(str(status))
+
+    softwares = list(instance.read_installed())
+    assert len(softwares) == 3
+    assert softwares[0] == [
+        "adduser",
+        "Debian Adduser Developers <adduser@packages.debian.org>",
+        "3.134",
+        "all",
+    ]
+    # A held package and one selected for removal are still installed
+    assert softwares[1][0] == "routinator"
+    assert softwares[2][0] == "python3"
+
+
+def teste_caso_ler_arquivo_vazio(tmp_path):
+    status = tmp_path / "status"
+    status.write_text("")
+    instance = DpkgStatusReader(str(status))
+
+    assert list(instance.read_installed()) == []
+
+
+def teste_caso_localizar_apps_pelo_banco_dpkg(tmp_path):
+    status = tmp_path / "status"
+    status.write_text(STATUS)
+    instance = AppsFound(dpkg_status_path=str(status))
+
+    softwares = instance.locate_apps("debian")
+    assert len(softwares) == 3
+    assert softwares[0] == ["adduser", "debian-tag_rec-app", "3.134", "all"]
+    assert softwares[1][1] == "nlnetlabs"
+    assert softwares[2][:2] == ["python", "python"]
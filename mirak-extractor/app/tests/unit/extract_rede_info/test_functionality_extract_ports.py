@@ -17,7 +17,8 @@ class MockSconn:
 
 
 def test_caso_extract_ports():
-    instance = ExtractRedeInfo()
+    # Sem netlink e sem "/proc/net", as portas são obtidas pelo psutil
+    instance = ExtractRedeInfo(proc_root="/nonexistent", use_netlink=False)
 
     def mock_process(pid):
         process_mock = MagicMock()
@@ -0,0 +1,135 @@
+import os
+import struct
+import pytest
+from mock import patch
+from app.extract_rede_info import ExtractRedeInfo
+from app.file_owner_index import FileOwnerIndex
+from app.process_snapshot import ProcessInfo, ProcessSnapshot
+from app.rpm_db_reader import RpmDbReader
+
+LISTS = {
+    "bash.list": ["/.", "/bin", "/bin/bash", "/usr/share/doc/bash"],
+    "libc6:amd64.list": ["/.", "/usr", "/usr/lib/x86_64-linux-gnu/libc.so.6"],
+    "routinator.list": ["/.", "/usr", "/usr/bin/routinator"],
+}
+
+
+@pytest.fixture
+def dpkg_info(tmp_path):
+    directory = os.path.join(tmp_path, "info")
+    os.makedirs(directory)
+    for name, paths in LISTS.items():
+        with open(os.path.join(directory, name), "w") as file:
+            file.write("\n".join(paths) + "\n")
+    return directory
+
+
+def make_index(tmp_path, dpkg_info, cache="cache"):
+    return FileOwnerIndex(
+        os.path.join(tmp_path, cache), dpkg_info_dir=dpkg_info,
+        dpkg_status_path=os.path.join(tmp_path, "status")
+    )
+
+
+def teste_caso_indice_de_arquivos_dpkg(tmp_path, dpkg_info):
+    instance = make_index(tmp_path, dpkg_info)
+
+    assert instance.open()
+    assert instance.rebuilt
+    assert instance.lookup("/usr/bin/routinator") == "routinator"
+    assert instance.lookup("/usr/lib/x86_64-linux-gnu/libc.so.6") == "libc6"
+    assert instance.lookup("/usr/local/bin/routinator") is None
+    assert instance.lookup("/") is None
+    assert instance.lookup("/zzz") is None
+    # "/usr" pertence aos dois pacotes; o primeiro é mantido
+    assert instance.lookup("/usr") == "libc6"
+    # usr-merge e binário substituído por atualização
+    assert instance.owner("/usr/bin/bash") == "bash"
+    assert instance.owner("/usr/bin/routinator (deleted)") == "routinator"
+    assert instance.owner("/opt/routinator/routinator") is None
+    instance.close()
+
+
+def teste_caso_indice_reaproveitado(tmp_path, dpkg_info):
+    make_index(tmp_path, dpkg_info).open()
+
+    instance = make_index(tmp_path, dpkg_info)
+    assert instance.open()
+    assert not instance.rebuilt
+    assert len(instance) == 6
+
+    with open(os.path.join(dpkg_info, "nginx.list"), "w") as file:
+        file.write("/usr/sbin/nginx\n")
+    os.utime(dpkg_info, ns=(0, 1))
+    instance = make_index(tmp_path, dpkg_info)
+    assert instance.open()
+    assert instance.rebuilt
+    assert instance.owner("/usr/sbin/nginx") == "nginx"
+
+
+def teste_caso_indice_em_memoria(tmp_path, dpkg_info):
+    with open(os.path.join(tmp_path, "cache"), "w") as file:
+        file.write("not a directory")
+    instance = make_index(tmp_path, dpkg_info)
+
+    assert instance.open()
+    assert instance.owner("/bin/bash") == "bash"
+
+
+def teste_caso_indice_de_arquivos_rpm(tmp_path):
+    def string_array(values):
+        return b"".join(value.encode() + b"\0" for value in values)
+
+    tags = [
+        (1000, 6, b"routinator\0", 1),
+        (1116, 4, struct.pack(">2i", 0, 1), 2),
+        (1117, 8, string_array(["routinator", "README.md"]), 2),
+        (1118, 8, string_array(["/usr/bin/", "/usr/share/doc/routinator/"]),
+         2),
+    ]
+    index = data = b""
+    for tag, kind, value, count in tags:
+        data += b"\0" * (-len(data) % 4)
+        index += struct.pack(">iIiI", tag, kind, len(data), count)
+        data += value
+    blob = struct.pack(">II", len(tags), len(data)) + index + data
+
+    assert RpmDbReader().parse_files(blob) == (
+        "routinator",
+        ["/usr/bin/routinator", "/usr/share/doc/routinator/README.md"],
+    )
+    instance = FileOwnerIndex(os.path.join(tmp_path, "cache"),
+                              dpkg_info_dir=os.path.join(tmp_path, "none"))
+    with patch.object(RpmDbReader, "locate_database",
+                      return_value=("sqlite", __file__)), \
+         patch.object(RpmDbReader, "iter_headers",
+                      return_value=iter([(1, blob)])):
+        assert instance.open()
+    assert instance.owner("/usr/bin/routinator") == "routinator"
+
+
+def teste_caso_portas_por_pacote(tmp_path, dpkg_info):
+    snapshot = ProcessSnapshot(str(tmp_path))
+    processes = {
+        10: ProcessInfo(10, "routinator", "/usr/bin/routinator", [], 998),
+        11: ProcessInfo(11, "routinator", "/opt/routinator/routinator", [],
+                        998),
+    }
+    instance = ExtractRedeInfo(snapshot=snapshot)
+    instance.pids_by_port = {3323: 10, 8323: 11, 22: None}
+    index = make_index(tmp_path, dpkg_info)
+    index.open()
+
+    with patch.object(ProcessSnapshot, "process",
+                      side_effect=processes.get):
+        ports_owned_by = instance.extract_ports_owned_by(index)
+
+    assert ports_owned_by == {
+        3323: {"process": "routinator", "executable": "/usr/bin/routinator",
+               "package": "routinator", "packaged": True},
+        8323: {"process": "routinator",
+               "executable": "/opt/routinator/routinator",
+               "package": None, "packaged": False},
+        22: {"process": "N/A", "executable": None, "package": None,
+             "packaged": None},
+    }
@@ -0,0 +1,72 @@
+import os
+from unittest import mock
+from app.extract_files_direct_info import ExtractFilesDirectoriesInfo
+from app.identity_resolver import IdentityResolver
+
+
+def write_databases(root):
+    os.makedirs(os.path.join(root, "etc"))
+    with open(os.path.join(root, "etc", "passwd"), "w") as file:
+        file.write("root:x:0:0:root:/root:/bin/bash\n"
+                   "# comment\n"
+                   "routinator:x:998:998::/var/lib/routinator:/sbin/nologin\n"
+                   "toor:x:0:0::/root:/bin/sh\n"
+                   "+::::::\n")
+    with open(os.path.join(root, "etc", "group"), "w") as file:
+        file.write("root:x:0:\nroutinator:x:998:\n")
+
+
+def teste_caso_bases_locais(tmp_path):
+    write_databases(str(tmp_path))
+    resolver = IdentityResolver(root=str(tmp_path))
+
+    with mock.patch("app.identity_resolver.pwd.getpwuid") as getpwuid, \
+         mock.patch("app.identity_resolver.grp.getgrgid") as getgrgid:
+        assert resolver.user(0) == "root"
+        assert resolver.user(998) == "routinator"
+        assert resolver.group(998) == "routinator"
+    getpwuid.assert_not_called()
+    getgrgid.assert_not_called()
+    assert resolver.lookups == 0
+
+
+def teste_caso_nss_e_cache_negativo(tmp_path):
+    write_databases(str(tmp_path))
+    resolver = IdentityResolver(root=str(tmp_path))
+
+    with mock.patch("app.identity_resolver.pwd.getpwuid",
+                    return_value=mock.Mock(pw_name="ldapuser")) as getpwuid, \
+         mock.patch("app.identity_resolver.grp.getgrgid",
+                    side_effect=KeyError(5000)) as getgrgid:
+        for _ in range(3):
+            assert resolver.user(5000) == "ldapuser"
+            assert resolver.group(5000) == "N/A"
+    assert getpwuid.call_count == 1
+    assert getgrgid.call_count == 1
+    assert resolver.lookups == 2
+
+
+def teste_caso_sem_bases_locais(tmp_path):
+    resolver = IdentityResolver(root=str(tmp_path))
+
+    with mock.patch("app.identity_resolver.pwd.getpwuid",
+                    side_effect=KeyError(1)):
+        assert resolver.user(1) == "N/A"
+    assert IdentityResolver.parse(os.path.join(tmp_path, "missing")) == {}
+
+
+def teste_caso_dono_desconhecido(tmp_path):
+    write_databases(str(tmp_path))
+    path = os.path.join(tmp_path, "routinator.conf")
+    open(path, "w").close()
+    resolver = IdentityResolver(root=str(tmp_path))
+    instance = ExtractFilesDirectoriesInfo(identities=resolver)
+
+    with mock.patch("app.identity_resolver.pwd.getpwuid",
+                    side_effect=KeyError(0)), \
+         mock.patch("app.identity_resolver.grp.getgrgid",
+                    side_effect=KeyError(0)), \
+         mock.patch("os.stat", return_value=os.stat_result(
+             (0o100600, 0, 0, 1, 4242, 4242, 0, 0, 0, 0))):
+        files = instance.get_important_files_or_directories([path])
+    assert files[0]["owner"] == {"user": "N/A", "group": "N/A"}
@@ -0,0 +1,42 @@
+import pytest
+from app.inventory import Inventory, StringTable
+
+
+def teste_caso_adicionar_software_ao_inventario():
+    instance = Inventory(strings=StringTable())
+    instance.append("o", "canonical", "ubuntu", "20.04",
+                    "cpe:2.3:o:canonical:ubuntu_linux:20.04:*:*:*:*:*:*:*")
+    instance.append("a", "ubuntu-tag_rec-app", "curl", "7.68.0",
+                    "cpe:2.3:a:ubuntu-tag_rec-app:curl:7.68.0:*:*:*:" +
+                    "amd64:*:*:*")
+
+    assert len(instance) == 2
+    assert instance[0].get("cpeName") == \
+        "cpe:2.3:o:canonical:ubuntu_linux:20.04:*:*:*:*:*:*:*"
+    assert instance[-1] == {
+        "type": "a",
+        "vendor": "ubuntu-tag_rec-app",
+        "product": "curl",
+        "version": "7.68.0",
+        "cpeName":
+            "cpe:2.3:a:ubuntu-tag_rec-app:curl:7.68.0:*:*:*:amd64:*:*:*",
+    }
+    assert instance.find_type("a") == 1
+    assert instance.find_type("h") == -1
+    with pytest.raises(IndexError):
+        instance[2]
+
+
+def teste_caso_valores_repetidos_armazenados_uma_vez():
+    strings = StringTable()
+    instance = Inventory(cpe_key="cpe_name", strings=strings)
+    for product in ("curl", "wget", "vim"):
+        instance.append("a", "debian-tag_rec-app", product, "1.0",
+                        f"cpe:2.3:a:debian-tag_rec-app:{product}:1.0:*:*:*:"
+                        "amd64:*:*:*")
+
+    vendor = strings.code("debian-tag_rec-app")
+    assert strings.code("debian-tag_rec-app") == vendor
+    assert instance[2].get("vendor") is instance[0].get("vendor")
+    assert instance[1].get("cpe_name") == \
+        "cpe:2.3:a:debian-tag_rec-app:wget:1.0:*:*:*:amd64:*:*:*"
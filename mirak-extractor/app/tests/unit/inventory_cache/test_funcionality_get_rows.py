@@ -0,0 +1,131 @@
+import json
+import os
+from mock import patch
+from app.apps_found import AppsFound
+from app.dpkg_status_reader import DpkgStatusReader
+from app.inventory_cache import InventoryCache
+
+
+STANZA = """Package: {name}
+Status: install ok installed
+Maintainer: Debian Developers <debian-devel@lists.debian.org>
+Architecture: amd64
+Version: {version}
+
+"""
+
+
+def write_status(path, packages):
+    path.write_text("".join(
+        STANZA.format(name=name, version=version) for name, version in packages
+    ))
+
+
+def teste_caso_inventario_sem_alteracao_usa_cache(tmp_path):
+    status = tmp_path / "status"
+    write_status(status, [("curl", "7.88.1"), ("routinator", "0.14.0")])
+    cache = InventoryCache(str(tmp_path / "cache"))
+    instance = AppsFound(dpkg_status_path=str(status), cache=cache)
+
+    first = instance.locate_apps("debian")
+    assert cache.misses == 2
+    with patch.object(DpkgStatusReader, "parse_stanza") as mock_parse, \
+         patch.object(DpkgStatusReader, "iter_stanzas") as mock_iter:
+        second = instance.locate_apps("debian")
+        mock_parse.assert_not_called()
+        mock_iter.assert_not_called()
+    assert first == second
+    assert second[1] == ["routinator", "nlnetlabs", "0.14.0", "amd64"]
+
+
+def teste_caso_inventario_alterado_reprocessa_somente_novos(tmp_path):
+    status = tmp_path / "status"
+    write_status(status, [("curl", "7.88.1"), ("wget", "1.21.3")])
+    cache = InventoryCache(str(tmp_path / "cache"))
+    instance = AppsFound(dpkg_status_path=str(status), cache=cache)
+    instance.locate_apps("debian")
+
+    write_status(status, [("curl", "7.88.1"), ("wget", "1.21.4"),
+                          ("vim", "9.0.1378")])
+    os.utime(status, ns=(1, 1))
+    softwares = instance.locate_apps("debian")
+    assert cache.hits == 1
+    assert cache.misses == 2
+    assert [software[2] for software in softwares] == [
+        "7.88.1", "1.21.4", "9.0.1378"
+    ]
+
+
+def teste_caso_inventario_reconstrucao_forcada(tmp_path):
+    status = tmp_path / "status"
+    write_status(status, [("curl", "7.88.1")])
+    cache = InventoryCache(str(tmp_path / "cache"))
+    instance = AppsFound(dpkg_status_path=str(status), cache=cache)
+    instance.locate_apps("debian")
+
+    instance.locate_apps("debian", rebuild=True)
+    assert cache.hits == 0
+    assert cache.misses == 1
+
+
+def teste_caso_inventario_cache_corrompido(tmp_path):
+    status = tmp_path / "status"
+    write_status(status, [("curl", "7.88.1")])
+    (tmp_path / "inventory.json").write_text("{corrompido")
+    cache = InventoryCache(str(tmp_path))
+
+    softwares = AppsFound(dpkg_status_path=str(status),
+                          cache=cache).locate_apps("ubuntu")
+    assert softwares == [["curl", "ubuntu-tag_rec-app", "7.88.1", "amd64"]]
+
+
+def teste_caso_inventario_lido_uma_vez(tmp_path):
+    status = tmp_path / "status"
+    write_status(status, [("curl", "7.88.1")])
+    AppsFound(dpkg_status_path=str(status),
+              cache=InventoryCache(str(tmp_path / "cache"))
+              ).locate_apps("debian")
+    cache = InventoryCache(str(tmp_path / "cache"))
+    instance = AppsFound(dpkg_status_path=str(status), cache=cache)
+
+    with patch("app.inventory_cache.json.load", wraps=json.load) as load:
+        instance.locate_apps("debian")
+        instance.locate_apps("debian", rebuild=True)
+        instance.locate_apps("debian")
+    assert load.call_count == 1
+    assert cache.hits == 1
+
+
+def teste_caso_inventario_wal_alterado(tmp_path):
+    database = tmp_path / "rpmdb.sqlite"
+    database.write_bytes(b"header")
+    records = [(1, b"curl"), (2, b"wget")]
+    cache = InventoryCache(str(tmp_path / "cache"))
+
+    def parse(record):
+        return [record.decode(), "vendor", "1.0", "x86_64"]
+
+    assert len(cache.get_rows(str(database), "enterprise",
+                              lambda: records[:1], parse)) == 1
+    # A transaction committed to the WAL does not change the database file
+    (tmp_path / "rpmdb.sqlite-wal").write_bytes(b"frame")
+    rows = cache.get_rows(str(database), "enterprise", lambda: records,
+                          parse)
+    assert [row[0] for row in rows] == ["curl", "wget"]
+    assert cache.hits == 1
+    assert cache.misses == 1
+
+
+def teste_caso_inventario_de_regras_antigas(tmp_path):
+    status = tmp_path / "status"
+    write_status(status, [("curl", "7.88.1")])
+    cache = InventoryCache(str(tmp_path / "cache"))
+    AppsFound(dpkg_status_path=str(status), cache=cache).locate_apps("debian")
+
+    # The rows sanitized by older rules are parsed again
+    with patch.object(AppsFound, "RULES_VERSION", AppsFound.RULES_VERSION + 1):
+        instance = AppsFound(dpkg_status_path=str(status),
+                             cache=InventoryCache(str(tmp_path / "cache")))
+        instance.locate_apps("debian")
+        assert instance.cache.hits == 0
+        assert instance.cache.misses == 1
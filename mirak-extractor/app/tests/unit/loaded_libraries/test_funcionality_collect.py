@@ -0,0 +1,70 @@
+import os
+import pytest
+from mock import patch
+from app.file_owner_index import FileOwnerIndex
+from app.loaded_libraries import LoadedLibraries
+from app.process_snapshot import ProcessSnapshot
+from app.report import Report
+
+MAPS = {
+    10: [
+        "55d0c0a00000-55d0c0a4b000 r--p 00000000 08:01 1311 " +
+        "/usr/bin/routinator",
+        "7f1c2a000000-7f1c2a028000 r--p 00000000 08:01 2201 " +
+        "/usr/lib/x86_64-linux-gnu/libc.so.6",
+        "7f1c2a028000-7f1c2a1bd000 r-xp 00028000 08:01 2201 " +
+        "/usr/lib/x86_64-linux-gnu/libc.so.6",
+        "7f1c2a400000-7f1c2a401000 rw-p 00000000 00:00 0 ",
+        "7f1c2a500000-7f1c2a600000 r-xp 00000000 08:01 2301 " +
+        "/usr/lib/x86_64-linux-gnu/libssl.so.3 (deleted)",
+        "7ffd5e3c1000-7ffd5e3e2000 rw-p 00000000 00:00 0 [stack]",
+    ],
+    11: [
+        "7f1c2a000000-7f1c2a028000 r--p 00000000 08:01 2201 " +
+        "/usr/lib/x86_64-linux-gnu/libc.so.6",
+        "7f1c2a700000-7f1c2a710000 r-xp 00000000 08:01 2401 " +
+        "/opt/my app/libplugin.so",
+    ],
+}
+NAMES = {10: "routinator", 11: "nginx"}
+
+
+@pytest.fixture
+def proc_root(tmp_path):
+    for pid, lines in MAPS.items():
+        os.makedirs(os.path.join(tmp_path, str(pid)))
+        with open(os.path.join(tmp_path, str(pid), "maps"), "w") as file:
+            file.write("\n".join(lines) + "\n")
+    return str(tmp_path)
+
+
+def teste_caso_bibliotecas_carregadas(proc_root):
+    snapshot = ProcessSnapshot(proc_root)
+    owners = {"/usr/lib/x86_64-linux-gnu/libc.so.6": "libc6",
+              "/usr/lib/x86_64-linux-gnu/libssl.so.3": "libssl3"}
+
+    with patch.object(ProcessSnapshot, "process_name",
+                      side_effect=NAMES.get), \
+         patch.object(FileOwnerIndex, "owner", side_effect=owners.get):
+        libraries = LoadedLibraries(snapshot).collect(
+            [11, 10, 10, 99], FileOwnerIndex()
+        )
+
+    assert libraries == [
+        {"path": "/opt/my app/libplugin.so", "package": None,
+         "loadedBy": ["nginx"]},
+        {"path": "/usr/lib/x86_64-linux-gnu/libc.so.6", "package": "libc6",
+         "loadedBy": ["nginx", "routinator"]},
+        {"path": "/usr/lib/x86_64-linux-gnu/libssl.so.3",
+         "package": "libssl3", "loadedBy": ["routinator"]},
+    ]
+
+
+def teste_caso_relatorio_com_bibliotecas():
+    instance = Report()
+    assert "loadedLibraries" not in instance.get_report_dict()
+
+    libraries = [{"path": "/usr/lib/x86_64-linux-gnu/libc.so.6",
+                  "package": "libc6", "loadedBy": ["routinator"]}]
+    instance.add_loaded_libraries(libraries)
+    assert instance.get_report_dict().get("loadedLibraries") == libraries
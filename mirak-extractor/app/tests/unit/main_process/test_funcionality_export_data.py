@@ -24,7 +24,7 @@ def teste_caso_exportando_data():
             return_value=return_os
             ), \
          patch(
-            'app.apps_found.AppsFound.locate_apps',
+            'app.apps_found.AppsFound.iter_apps',
             return_value=return_apps
             ), \
          patch(
@@ -22,7 +22,7 @@ def teste_caso_criacao_processo_extração_correto_os_release():
             return_value=return_os
             ), \
          patch(
-            'app.apps_found.AppsFound.locate_apps',
+            'app.apps_found.AppsFound.iter_apps',
             return_value=return_apps
             ), \
          patch(
@@ -58,7 +58,7 @@ def teste_caso_criacao_processo_extração_correto_lsb_release():
             return_value=return_os
             ), \
          patch(
-            'app.apps_found.AppsFound.locate_apps',
+            'app.apps_found.AppsFound.iter_apps',
             return_value=return_apps
             ), \
          patch(
@@ -94,7 +94,7 @@ def teste_caso_criacao_processo_extração_correto_issue():
             return_value=return_os
             ), \
          patch(
-            'app.apps_found.AppsFound.locate_apps',
+            'app.apps_found.AppsFound.iter_apps',
             return_value=return_apps
             ), \
          patch(
@@ -130,7 +130,7 @@ def teste_caso_criacao_processo_extração_com_erro_os_release():
             return_value=return_os
             ), \
          patch(
-            'app.apps_found.AppsFound.locate_apps',
+            'app.apps_found.AppsFound.iter_apps',
             return_value=return_apps
             ), \
          patch(
@@ -167,7 +167,7 @@ def teste_caso_criacao_processo_extração_com_erro_lsb_release():
             return_value=return_os
             ), \
          patch(
-            'app.apps_found.AppsFound.locate_apps',
+            'app.apps_found.AppsFound.iter_apps',
             return_value=return_apps
             ), \
          patch(
@@ -204,7 +204,7 @@ def teste_caso_criacao_processo_extração_com_erro_issue():
             return_value=return_os
             ), \
          patch(
-            'app.apps_found.AppsFound.locate_apps',
+            'app.apps_found.AppsFound.iter_apps',
             return_value=return_apps
             ), \
          patch(
@@ -236,7 +236,7 @@ def teste_caso_criacao_processo_extração_com_erro_sem_arquivo():
         return_value=return_files
           ), \
          patch(
-            'app.apps_found.AppsFound.locate_apps',
+            'app.apps_found.AppsFound.iter_apps',
             return_value=return_apps
             ), \
          patch(
@@ -276,7 +276,7 @@ def teste_caso_processo_extração_com_erro_insercao_erronea(capsys):
         return_value=return_files
           ), \
          patch(
-            'app.apps_found.AppsFound.locate_apps',
+            'app.apps_found.AppsFound.iter_apps',
             return_value=return_apps
             ), \
          patch(
@@ -317,7 +317,7 @@ def teste_caso_processo_extração_insercao_erronea_na_versao(capsys):
         return_value=return_files
           ), \
          patch(
-            'app.apps_found.AppsFound.locate_apps',
+            'app.apps_found.AppsFound.iter_apps',
             return_value=return_apps
             ), \
          patch(
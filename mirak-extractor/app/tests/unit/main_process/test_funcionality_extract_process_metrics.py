@@ -0,0 +1,40 @@
+from mock import patch
+from app.main_process import Process
+from app.report import Report
+
+
+def teste_caso_metricas_dos_estagios():
+    instance = Process()
+    report = Report()
+    return_apps = [['ca-certificates', 'ubuntu-tag_rec-app',
+                    '20230311ubuntu0.20.04.1', 'all'],
+                   ['routinator', 'nlnetlabs', '0.14.0', 'amd64']]
+
+    with patch(
+        'app.extract_os_info.ExtractOsInfo.is_there_access',
+        return_value=["os-release"]
+          ), \
+         patch(
+             'app.extract_os_info.ExtractOsInfo.extract_from_os_release',
+            return_value=("ubuntu", "20.04")
+            ), \
+         patch(
+            'app.apps_found.AppsFound.iter_apps',
+            return_value=return_apps
+            ), \
+         patch(
+            'app.extract_rede_info.ExtractRedeInfo.extract_ip',
+            return_value="172.25.232.77"
+            ), \
+         patch(
+            'app.extract_rede_info.ExtractRedeInfo.extract_ports',
+            return_value=([3323], {3323: 'routinator'})
+            ):
+        instance.extract_process(report)
+
+    metrics = report.get_report_dict().get("metrics")
+    assert list(metrics["stages"]) == ["os", "apps", "files", "rede"]
+    assert metrics["stages"]["apps"]["items"] == {"packages": 2}
+    assert metrics["stages"]["rede"]["items"] == {"ports": 1, "libraries": 0}
+    assert metrics["collectors"]["dpkg"]["items"] == 2
+    assert all(stage["errors"] == 0 for stage in metrics["stages"].values())
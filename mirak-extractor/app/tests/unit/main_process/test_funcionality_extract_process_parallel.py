@@ -0,0 +1,67 @@
+import io
+import threading
+from mock import patch
+from app.main_process import Process
+from app.report import Report
+
+
+def run_extraction(max_workers, overlap=None):
+    """With "overlap", the applications and the ports only finish when
+    both are running at the same time"""
+    report = Report()
+    events = []
+
+    def apps(*args):
+        events.append("apps")
+        if overlap is not None:
+            overlap.wait()
+        yield ['ca-certificates', 'ubuntu-tag_rec-app',
+               '20230311ubuntu0.20.04.1', 'all']
+        yield ['routinator', 'nlnetlabs', '0.14.0', 'amd64']
+
+    def ports(*args):
+        events.append("ports")
+        if overlap is not None:
+            overlap.wait()
+        return ([3323, 8323], {3323: 'routinator', 8323: 'routinator'})
+
+    def os_info(*args):
+        events.append("os")
+        return ("ubuntu", "20.04")
+
+    with patch(
+        'app.extract_os_info.ExtractOsInfo.is_there_access',
+        return_value=["os-release"]
+          ), \
+         patch(
+             'app.extract_os_info.ExtractOsInfo.extract_from_os_release',
+            side_effect=os_info
+            ), \
+         patch(
+            'app.apps_found.AppsFound.iter_apps',
+            side_effect=apps
+            ), \
+         patch(
+            'app.extract_rede_info.ExtractRedeInfo.extract_ip',
+            return_value="172.25.232.77"
+            ), \
+         patch(
+            'app.extract_rede_info.ExtractRedeInfo.extract_ports',
+            side_effect=ports
+            ):
+        Process(max_workers=max_workers).extract_process(report)
+    # The measured times differ between executions
+    report.add_metrics({})
+    output = io.StringIO()
+    report.write_json(output)
+    return output.getvalue(), events
+
+
+def teste_caso_extracao_paralela_igual_a_sequencial():
+    sequential, _ = run_extraction(1)
+    # The barrier is broken by its timeout if the stages do not overlap
+    parallel, events = run_extraction(None, threading.Barrier(2, timeout=10))
+
+    assert parallel == sequential
+    # The operating system runs alone, before every other stage
+    assert events[0] == "os"
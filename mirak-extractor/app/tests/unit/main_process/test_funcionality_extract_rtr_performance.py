@@ -0,0 +1,25 @@
+from app.main_process import Process
+from app.report import Report
+from app.tests.rtr_stub import StubRtrServer
+
+
+def teste_caso_desempenho_rtr():
+    instance = Process(probe_rtr=True, rtr_timeout=2)
+    report = Report()
+
+    with StubRtrServer(ipv4_prefixes=3, ipv6_prefixes=2) as server:
+        instance.extract_rtr_performance(
+            report, {"rtr-listen": [server.address]})
+
+    performance = report.get_report_dict()["rtrPerformance"]
+    assert [item["endpoint"] for item in performance] == [server.address]
+    assert performance[0]["pdus"]["ipv6Prefix"] == 2
+    assert instance.metrics.stage("rtr").items == {"endpoints": 1}
+
+
+def teste_caso_sem_endpoints_rtr():
+    instance = Process(probe_rtr=True)
+    report = Report()
+
+    instance.extract_rtr_performance(report, None)
+    assert "rtrPerformance" not in report.get_report_dict()
@@ -0,0 +1,79 @@
+import os
+import pytest
+from app.extract_rede_info import ExtractRedeInfo
+from app.proc_net_reader import Listener, ProcNetReader
+
+HEADER = "  sl  local_address rem_address   st tx_queue rx_queue tr " + \
+    "tm->when retrnsmt   uid  timeout inode\n"
+TCP = HEADER + \
+    "   0: 00000000:0CFB 00000000:0000 0A 00000000:00000000 00:00000000 " + \
+    "00000000   998        0 1001 1 0000000000000000 100 0 0 10 0\n" + \
+    "   1: 0100007F:0CFB 0100007F:D431 01 00000000:00000000 00:00000000 " + \
+    "00000000   998        0 1002 1 0000000000000000 20 4 30 10 -1\n" + \
+    "   2: 0100007F:1F90 00000000:0000 0A 00000000:00000000 00:00000000 " + \
+    "00000000     0        0 1003 1 0000000000000000 100 0 0 10 0\n"
+TCP6 = HEADER + \
+    "   0: 00000000000000000000000000000000:2083 " + \
+    "00000000000000000000000000000000:0000 0A 00000000:00000000 " + \
+    "00:00000000 00000000   998        0 1004 1 0000000000000000 " + \
+    "100 0 0 10 0\n"
+UDP = "   sl  local_address rem_address   st tx_queue rx_queue tr " + \
+    "tm->when retrnsmt   uid  timeout inode ref pointer drops\n" + \
+    "  100: 3500007F:0035 00000000:0000 07 00000000:00000000 00:00000000 " + \
+    "00000000   101        0 1005 2 0000000000000000 0\n" + \
+    "  101: 0100007F:A1B2 0100007F:0035 01 00000000:00000000 00:00000000 " + \
+    "00000000   101        0 1006 2 0000000000000000 0\n"
+
+
+@pytest.fixture
+def proc_root(tmp_path):
+    os.makedirs(os.path.join(tmp_path, "net"))
+    for name, content in (("tcp", TCP), ("tcp6", TCP6), ("udp", UDP)):
+        with open(os.path.join(tmp_path, "net", name), "w") as file:
+            file.write(content)
+    for pid, name, inodes in ((4242, "routinator", (1001, 1004)),
+                              (4343, "systemd-resolve", (1005,))):
+        os.makedirs(os.path.join(tmp_path, str(pid), "fd"))
+        with open(os.path.join(tmp_path, str(pid), "comm"), "w") as file:
+            file.write(name + "\n")
+        with open(os.path.join(tmp_path, str(pid), "cmdline"), "w") as file:
+            file.write(f"/usr/bin/{name}\0")
+        with open(os.path.join(tmp_path, str(pid), "status"), "w") as file:
+            file.write(f"Name:\t{name}\nUid:\t998\t998\t998\t998\n")
+        for descriptor, inode in enumerate(inodes, start=3):
+            os.symlink(f"socket:[{inode}]",
+                       os.path.join(tmp_path, str(pid), "fd", str(descriptor)))
+    return str(tmp_path)
+
+
+def teste_caso_listando_sockets_tcp(proc_root):
+    instance = ProcNetReader(proc_root)
+
+    assert list(instance.iter_listeners()) == [
+        Listener("tcp", "0.0.0.0", 3323, 1001),
+        Listener("tcp", "127.0.0.1", 8080, 1003),
+        Listener("tcp6", "::", 8323, 1004),
+    ]
+
+
+def teste_caso_listando_sockets_udp(proc_root):
+    instance = ProcNetReader(proc_root)
+
+    assert list(instance.iter_listeners(ProcNetReader.UDP_PROTOCOLS)) == [
+        Listener("udp", "127.0.0.53", 53, 1005),
+    ]
+
+
+def teste_caso_extract_ports_pelo_proc(proc_root):
+    instance = ExtractRedeInfo(proc_root=proc_root, use_netlink=False)
+
+    open_ports, ports_by_process = instance.extract_ports()
+    assert open_ports == [3323, 8080, 8323]
+    assert ports_by_process == {3323: "routinator", 8080: "N/A",
+                                8323: "routinator"}
+
+    instance = ExtractRedeInfo(proc_root=proc_root, include_udp=True,
+                               use_netlink=False)
+    open_ports, ports_by_process = instance.extract_ports()
+    assert open_ports == [3323, 8080, 8323, 53]
+    assert ports_by_process[53] == "systemd-resolve"
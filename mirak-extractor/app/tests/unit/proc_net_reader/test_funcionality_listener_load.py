@@ -0,0 +1,78 @@
+import os
+import pytest
+from app.extract_rede_info import ExtractRedeInfo
+from app.proc_net_reader import ProcNetReader
+
+HEADER = "  sl  local_address rem_address   st tx_queue rx_queue tr " + \
+    "tm->when retrnsmt   uid  timeout inode\n"
+TCP = HEADER + \
+    "   0: 00000000:0CFB 00000000:0000 0A 00000000:00000005 00:00000000 " + \
+    "00000000   998        0 1001 1 0000000000000000 100 0 0 10 0\n" + \
+    "   1: 0100007F:0CFB 0100007F:D431 01 00000000:00000000 00:00000000 " + \
+    "00000000   998        0 1002 1 0000000000000000 20 4 30 10 -1\n" + \
+    "   2: 0A00000A:0CFB 0B00000A:D432 01 00000000:00000000 00:00000000 " + \
+    "00000000   998        0 1003 1 0000000000000000 20 4 30 10 -1\n" + \
+    "   3: 0100007F:2454 00000000:0000 0A 00000000:00000000 00:00000000 " + \
+    "00000000   998        0 1004 1 0000000000000000 100 0 0 10 0\n" + \
+    "   4: 0100007F:2454 0100007F:9C40 01 00000000:00000000 00:00000000 " + \
+    "00000000     0        0 1005 1 0000000000000000 20 4 30 10 -1\n"
+
+
+@pytest.fixture
+def proc_root(tmp_path):
+    os.makedirs(os.path.join(tmp_path, "net"))
+    with open(os.path.join(tmp_path, "net", "tcp"), "w") as file:
+        file.write(TCP)
+    return str(tmp_path)
+
+
+def teste_caso_lendo_fila_e_clientes(proc_root):
+    instance = ProcNetReader(proc_root)
+
+    queues, clients = instance.read_listener_load({3323, 9300})
+    assert queues == {("tcp", "0.0.0.0", 3323): 5,
+                      ("tcp", "127.0.0.1", 9300): 0}
+    assert clients == {("tcp", "127.0.0.1", 3323): 1,
+                       ("tcp", "10.0.0.10", 3323): 1,
+                       ("tcp", "127.0.0.1", 9300): 1}
+
+    queues, clients = instance.read_listener_load({9300})
+    assert list(queues) == [("tcp", "127.0.0.1", 9300)]
+    assert list(clients) == [("tcp", "127.0.0.1", 9300)]
+
+
+def teste_caso_amostrando_carga_dos_listeners(proc_root):
+    instance = ExtractRedeInfo(proc_root=proc_root, use_netlink=False)
+
+    load = instance.sample_listener_load(
+        {"rtr": ["[::]:3323"], "http": ["127.0.0.1:9300"]},
+        window=0.02, interval=0.01
+    )
+    assert [(item["port"], item["role"]) for item in load] == \
+        [(3323, "rtr"), (9300, "http")]
+    rtr = load[0]
+    assert rtr["backlog"] is None
+    assert rtr["samples"] >= 2
+    assert rtr["acceptQueue"] == {"p50": 5, "p90": 5, "p99": 5, "max": 5}
+    # Both clients of port 3323 belong to the wildcard listener
+    assert rtr["clients"]["max"] == 2
+    assert load[1]["clients"]["max"] == 1
+
+
+@pytest.mark.parametrize("interval", [0, -0.1])
+def teste_caso_intervalo_invalido(proc_root, interval):
+    instance = ExtractRedeInfo(proc_root=proc_root, use_netlink=False)
+
+    with pytest.raises(ValueError):
+        instance.sample_listener_load(window=0.02, interval=interval)
+
+
+def teste_caso_percentis_por_posicao():
+    values = list(range(1, 101))
+
+    assert ExtractRedeInfo.percentiles(values) == \
+        {"p50": 50, "p90": 90, "p99": 99, "max": 100}
+    assert ExtractRedeInfo.percentiles([7]) == \
+        {"p50": 7, "p90": 7, "p99": 7, "max": 7}
+    assert ExtractRedeInfo.parse_endpoint("[::1]:3323") == ("::1", 3323)
+    assert ExtractRedeInfo.parse_endpoint("3323") is None
@@ -0,0 +1,98 @@
+import os
+import pytest
+from mock import patch
+from app.main_process import Process
+from app.process_sampler import ProcessSampler
+from app.process_snapshot import ProcessInfo, ProcessSnapshot
+from app.report import Report
+
+STAT = "4242 (routinator (server) 1) S 1 4242 4242 0 -1 4194560 5000 " + \
+    "0 0 0 {utime} {stime} 0 0 20 0 12 0 1000 300000000 {rss} " + \
+    "18446744073709551615 1 1 0 0 0 0 0 4096 0 0 0 0 17 1 0 0 0 0 0\n"
+LIMITS = "Limit                     Soft Limit           " + \
+    "Hard Limit           Units     \n" + \
+    "Max open files            1024                 " + \
+    "524288               files     \n"
+
+
+@pytest.fixture
+def proc_root(tmp_path):
+    directory = os.path.join(tmp_path, "4242")
+    os.makedirs(os.path.join(directory, "fd"))
+    for descriptor in range(8):
+        os.symlink("/dev/null", os.path.join(directory, "fd", str(descriptor)))
+    with open(os.path.join(directory, "stat"), "w") as file:
+        file.write(STAT.format(utime=150, stime=50, rss=25600))
+    with open(os.path.join(directory, "io"), "w") as file:
+        file.write("rchar: 10\nwchar: 20\nsyscr: 1\nsyscw: 2\n" +
+                   "read_bytes: 4096\nwrite_bytes: 8192\n")
+    with open(os.path.join(directory, "limits"), "w") as file:
+        file.write(LIMITS)
+    return str(tmp_path)
+
+
+def teste_caso_amostragem_do_processo(proc_root):
+    instance = ProcessSampler(4242, proc_root, window=0.05, interval=0.01)
+
+    assert instance.run()
+    summary = instance.summary()
+    assert summary["samples"] >= 2
+    assert summary["rssBytes"]["max"] == 25600 * os.sysconf("SC_PAGE_SIZE")
+    assert summary["threads"] == {"min": 12, "avg": 12, "max": 12}
+    assert summary["openFds"]["max"] == 8
+    assert summary["fdLimit"] == 1024
+    assert summary["fdUsagePercent"] == 0.78
+    assert summary["cpuPercent"]["max"] == 0
+    assert summary["ioReadBytesPerSecond"]["max"] == 0
+
+
+def teste_caso_resumo_do_anel():
+    instance = ProcessSampler(4242, window=2, interval=1)
+    instance.fd_limit = 100
+    # Capacidade de três amostras; a primeira é descartada
+    instance.record(0.0, 0, 100, 4, 10, 0, 0)
+    instance.record(1.0, 0, 100, 4, 10, 0, 0)
+    instance.record(2.0, 50, 300, 6, 20, 1000, 0)
+    instance.record(3.0, 150, 200, 8, 30, 3000, 500)
+
+    summary = instance.summary()
+    assert summary["samples"] == 3
+    assert summary["cpuPercent"] == {
+        "min": 50 / instance.ticks_per_second * 100,
+        "avg": 75 / instance.ticks_per_second * 100,
+        "max": 100 / instance.ticks_per_second * 100,
+    }
+    assert summary["rssBytes"] == {"min": 100, "avg": 200, "max": 300}
+    assert summary["fdUsagePercent"] == 30
+
+
+def teste_caso_intervalo_invalido():
+    with pytest.raises(ValueError):
+        ProcessSampler(4242, window=1, interval=0)
+
+
+def teste_caso_stat_invalido(proc_root):
+    with open(os.path.join(proc_root, "4242", "stat"), "w") as file:
+        file.write("4242 (routinator) S 1\n")
+
+    assert not ProcessSampler(4242, proc_root, window=0.01).run()
+
+
+def teste_caso_processo_inexistente(tmp_path):
+    assert not ProcessSampler(1, str(tmp_path), window=0.01).run()
+
+
+def teste_caso_telemetria_no_relatorio(proc_root):
+    instance = Process(telemetry_window=0.02, telemetry_interval=0.01)
+    instance.process_snapshot = ProcessSnapshot(proc_root)
+    report = Report()
+    processes = [ProcessInfo(4242, "routinator", "/usr/bin/routinator",
+                             [], 998)]
+
+    with patch.object(ProcessSnapshot, "processes",
+                      return_value=iter(processes)):
+        instance.extract_routinator_telemetry(report)
+
+    telemetry = report.get_report_dict().get("routinatorTelemetry")
+    assert telemetry["pid"] == 4242
+    assert telemetry["threads"]["max"] == 12
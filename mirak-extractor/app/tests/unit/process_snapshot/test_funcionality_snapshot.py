@@ -0,0 +1,66 @@
+import os
+import pytest
+from mock import patch
+from app.process_snapshot import ProcessInfo, ProcessSnapshot
+
+
+def make_process(root, pid, comm, cmdline, uid, inodes=(), exe=None):
+    directory = os.path.join(root, str(pid))
+    os.makedirs(os.path.join(directory, "fd"))
+    with open(os.path.join(directory, "comm"), "w") as file:
+        file.write(comm + "\n")
+    with open(os.path.join(directory, "cmdline"), "w") as file:
+        file.write("".join(argument + "\0" for argument in cmdline))
+    with open(os.path.join(directory, "status"), "w") as file:
+        file.write(f"Name:\t{comm}\nUmask:\t0022\nUid:\t{uid}\t{uid}\t" +
+                   f"{uid}\t{uid}\nGid:\t{uid}\t{uid}\t{uid}\t{uid}\n")
+    if exe:
+        os.symlink(exe, os.path.join(directory, "exe"))
+    for descriptor, inode in enumerate(inodes, start=3):
+        os.symlink(f"socket:[{inode}]",
+                   os.path.join(directory, "fd", str(descriptor)))
+    os.symlink("/dev/null", os.path.join(directory, "fd", "0"))
+
+
+@pytest.fixture
+def proc_root(tmp_path):
+    make_process(tmp_path, 4242, "routinator",
+                 ["/usr/bin/routinator", "server"], 998, (1001, 1004),
+                 exe="/usr/bin/routinator")
+    make_process(tmp_path, 4250, "routinator", ["/usr/bin/routinator"], 998,
+                 (1001,))
+    make_process(tmp_path, 512, "systemd-resolve",
+                 ["/lib/systemd/systemd-resolved"], 101, (1005,))
+    os.makedirs(os.path.join(tmp_path, "net"))
+    return str(tmp_path)
+
+
+def teste_caso_snapshot_dos_processos(proc_root):
+    instance = ProcessSnapshot(proc_root)
+
+    assert instance.socket_owner(1001) == 4242
+    assert instance.socket_owner(1005) == 512
+    assert instance.socket_owner(9999) is None
+    assert instance.process(4242) == ProcessInfo(
+        4242, "routinator", "/usr/bin/routinator",
+        ["/usr/bin/routinator", "server"], 998
+    )
+    assert instance.process_name(512) == "systemd-resolved"
+    assert instance.process_name(None) == "N/A"
+    assert [info.pid for info in instance.processes()] == [512, 4242, 4250]
+
+
+def teste_caso_snapshot_lido_uma_vez(proc_root):
+    instance = ProcessSnapshot(proc_root)
+
+    with patch("os.listdir", wraps=os.listdir) as mock_listdir:
+        for inode in (1001, 1004, 1005, 9999):
+            instance.socket_owner(inode)
+        instance.process_name(4242)
+        # Uma leitura de "/proc" e uma de cada "fd"
+        assert mock_listdir.call_count == 4
+
+    instance.refresh()
+    with patch("os.listdir", wraps=os.listdir) as mock_listdir:
+        instance.socket_owner(1001)
+        assert mock_listdir.call_count == 4
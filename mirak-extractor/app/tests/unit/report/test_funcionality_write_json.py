@@ -0,0 +1,41 @@
+import io
+import json
+from app.report import Report
+
+
+def teste_caso_escrever_json_igual_ao_json_dump():
+    instance = Report()
+    instance.add_apps("o", "debian", "debian", "12",
+                      "cpe:2.3:o:debian:debian_linux:12:*:*:*:*:*:*:*")
+    instance.add_apps("a", "debian-tag_rec-app", "libc6", "2.36-9+deb12u4",
+                      "cpe:2.3:a:debian-tag_rec-app:libc6:2.36-9+deb12u4"
+                      ":*:*:*:amd64:*:*:*")
+    instance.add_apps("a", "debian-tag_rec-app", "routinator", None,
+                      "cpe:2.3:a:debian-tag_rec-app:routinator:0.14.0"
+                      ":*:*:*:amd64:*:*:*")
+    instance.add_apps("a", "ação \"especial\"", "ferramenta", "1.0", None)
+    instance.add_rede_external("10.0.0.1", [3323, 8323],
+                               {3323: "routinator", 8323: "routinator"})
+    instance.add_strategic_files([
+        {"type": "file", "fileName": "/etc/routinator/routinator.conf",
+         "permission": {"group": 4, "owner": 6, "others": 4},
+         "owner": {"user": "routinator", "group": "routinator"}}
+    ])
+    output = io.StringIO()
+
+    instance.write_json(output, indent=4)
+    assert output.getvalue() == json.dumps(
+        instance.get_report_dict(), indent=4, ensure_ascii=False
+    )
+    assert json.loads(output.getvalue())["appsFound"][2]["vendor"] == \
+        "nlnetlabs"
+
+
+def teste_caso_escrever_json_relatorio_vazio():
+    instance = Report()
+    output = io.StringIO()
+
+    instance.write_json(output)
+    assert output.getvalue() == json.dumps(
+        instance.get_report_dict(), indent=4, ensure_ascii=False
+    )
@@ -0,0 +1,87 @@
+import os
+from app.main_process import Process
+from app.report import Report
+from app.repository_cache import RepositoryCache
+
+
+def write(path, size, mtime):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as file:
+        file.write(b"0" * size)
+    os.utime(path, (mtime, mtime))
+
+
+def build_cache(root):
+    ripe = os.path.join(root, "rrdp", "rrdp.ripe.net", "3f2a")
+    write(os.path.join(ripe, "ca", "a.roa"), 100, 1_700_000_000)
+    write(os.path.join(ripe, "ca", "a.mft"), 200, 1_700_000_100)
+    write(os.path.join(ripe, "ca", "a.crl"), 50, 1_700_000_200)
+    write(os.path.join(ripe, "ca", "b.cer"), 300, 1_700_000_300)
+    write(os.path.join(ripe, "ca", "notes.txt"), 7, 1_700_000_300)
+    arin = os.path.join(root, "rsync", "rpki.arin.net", "repository")
+    write(os.path.join(arin, "x.ROA"), 10, 1_600_000_000)
+    write(os.path.join(arin, "y.gbr"), 20, 1_600_000_000)
+    write(os.path.join(arin, "z.asa"), 30, 1_600_000_500)
+    # The stored copy of an object shares its inode
+    stored = os.path.join(root, "stored", "rrdp", "rrdp.ripe.net", "a.roa")
+    os.makedirs(os.path.dirname(stored))
+    os.link(os.path.join(ripe, "ca", "a.roa"), stored)
+    os.makedirs(os.path.join(root, "tmp"))
+
+
+def teste_caso_estatisticas_por_repositorio(tmp_path):
+    build_cache(str(tmp_path))
+
+    statistics = RepositoryCache(max_workers=2).scan(str(tmp_path))
+    assert [(repository["repository"], repository["type"],
+             repository["host"], repository["stored"])
+            for repository in statistics["repositories"]] == [
+        ("rrdp/rrdp.ripe.net", "rrdp", "rrdp.ripe.net", False),
+        ("rsync/rpki.arin.net", "rsync", "rpki.arin.net", False),
+        ("stored/rrdp/rrdp.ripe.net", "rrdp", "rrdp.ripe.net", True),
+        ("tmp", "other", "", False),
+    ]
+    ripe, arin, stored, other = statistics["repositories"]
+    assert ripe["objects"] == {"cer": 1, "roa": 1, "mft": 1, "crl": 1,
+                               "gbr": 0, "asa": 0}
+    assert ripe["bytes"]["roa"] == 100
+    assert ripe["otherFiles"] == 1
+    assert ripe["totalBytes"] == 657
+    assert ripe["oldestMtime"] == "2023-11-14T22:13:20+00:00"
+    assert ripe["newestMtime"] == "2023-11-14T22:18:20+00:00"
+    assert arin["objects"]["roa"] == 1
+    assert arin["objects"]["gbr"] == arin["objects"]["asa"] == 1
+    # The hardlink is counted as an object but not as bytes
+    assert stored["objects"]["roa"] == 1
+    assert stored["totalBytes"] == 0
+    assert other["totalBytes"] == 0
+    assert other["oldestMtime"] is None
+    assert statistics["objects"]["roa"] == 3
+    assert statistics["totalBytes"] == 657 + 60
+    assert statistics["errors"] == 0
+
+    assert RepositoryCache(max_workers=1).scan(str(tmp_path)) == statistics
+
+
+def teste_caso_diretorio_inexistente(tmp_path):
+    missing = os.path.join(tmp_path, "missing")
+
+    assert RepositoryCache().scan(missing) == \
+        {"path": missing, "error": "not a directory"}
+    assert RepositoryCache.repositories(str(tmp_path)) == []
+
+
+def teste_caso_estagio_do_cache(tmp_path):
+    build_cache(str(tmp_path))
+    instance = Process(repository_stats=True, repository_workers=1)
+    report = Report()
+
+    instance.extract_repository_cache(report,
+                                      {"repository-dir": str(tmp_path)})
+    instance.extract_repository_cache(Report(), {})
+
+    statistics = report.get_report_dict()["repositoryCache"]
+    assert len(statistics["repositories"]) == 4
+    assert instance.metrics.stage("repositories").items == \
+        {"repositories": 4, "objects": 8}
+    assert instance.metrics.stage("repositories").errors == 0
@@ -0,0 +1,158 @@
+import pytest
+from app.local_http import LocalHttpClient
+from app.main_process import Process
+from app.report import Report
+from app.routinator_metrics import RoutinatorMetrics, Sample
+from app.tests.http_stub import StubHttpServer
+
+METRICS = b"""\
+# HELP routinator_last_update_duration duration in seconds of last update
+# TYPE routinator_last_update_duration gauge
+routinator_last_update_duration 183.25
+routinator_last_update_done 1700000000
+routinator_serial 1234
+# TYPE routinator_vrps_total gauge
+routinator_vrps_total{tal="apnic"} 150000
+routinator_vrps_total{tal="ripe"} 220000
+routinator_rrdp_status{uri="https://rrdp.ripe.net/notification.xml"} 200
+routinator_rrdp_status{uri="https://rrdp.example.net/notification.xml"} -1
+routinator_rrdp_status{uri="https://rrdp.arin.net/notification.xml"} 304
+routinator_rsync_status{uri="rsync://rpki.example.org/repo/"} 10
+routinator_rsync_status{uri="rsync://rpki.ripe.net/repository/"} 0
+routinator_rtr_current_connections 12
+routinator_http_requests{path="/a\\"b,c}"} 3 1700000000000
+"""
+
+# Part of the "/metrics" of Routinator, with the metrics of one TAL, one
+# RRDP and one rsync repository and one RTR client
+ROUTINATOR = b"""\
+# HELP routinator_last_update_start seconds since last update started
+# TYPE routinator_last_update_start gauge
+routinator_last_update_start 37
+# HELP routinator_last_update_duration duration in seconds of last update
+# TYPE routinator_last_update_duration gauge
+routinator_last_update_duration 29
+# HELP routinator_last_update_done seconds since last update finished
+# TYPE routinator_last_update_done gauge
+routinator_last_update_done 8
+# HELP routinator_serial current RTR serial number
+# TYPE routinator_serial gauge
+routinator_serial 1802
+# HELP routinator_valid_roas number of valid ROAs
+# TYPE routinator_valid_roas gauge
+routinator_valid_roas{tal="ripe"} 31482
+# HELP routinator_stale_manifests number of stale manifests
+# TYPE routinator_stale_manifests gauge
+routinator_stale_manifests{tal="ripe"} 3
+# HELP routinator_stale_crls number of stale CRLs
+# TYPE routinator_stale_crls gauge
+routinator_stale_crls{tal="ripe"} 2
+# HELP routinator_vrps_total total number of VRPs seen
+# TYPE routinator_vrps_total gauge
+routinator_vrps_total{tal="ripe"} 84413
+# HELP routinator_vrps_unsafe number of VRPs overlapping rejected CAs
+# TYPE routinator_vrps_unsafe gauge
+routinator_vrps_unsafe{tal="ripe"} 0
+# HELP routinator_vrps_duplicate number of duplicate VRPs
+# TYPE routinator_vrps_duplicate gauge
+routinator_vrps_duplicate{tal="ripe"} 1046
+# HELP routinator_vrps_final final number of VRPs
+# TYPE routinator_vrps_final gauge
+routinator_vrps_final 83367
+# HELP routinator_rrdp_status status code for getting notification file
+# TYPE routinator_rrdp_status gauge
+routinator_rrdp_status{uri="https://rrdp.ripe.net/notification.xml"} 200
+# HELP routinator_rrdp_duration duration of the last RRDP update
+# TYPE routinator_rrdp_duration gauge
+routinator_rrdp_duration{uri="https://rrdp.ripe.net/notification.xml"} 2.1
+# HELP routinator_rsync_status exit status of rsync command
+# TYPE routinator_rsync_status gauge
+routinator_rsync_status{uri="rsync://rpki.ripe.net/repository/"} 0
+# HELP routinator_rtr_current_connections number of current RTR connections
+# TYPE routinator_rtr_current_connections gauge
+routinator_rtr_current_connections 2
+# HELP routinator_rtr_connections total number of RTR connections
+# TYPE routinator_rtr_connections counter
+routinator_rtr_connections 17
+# HELP routinator_rtr_client_connections number of RTR connections per \
+client
+# TYPE routinator_rtr_client_connections gauge
+routinator_rtr_client_connections{addr="192.0.2.1"} 1
+"""
+
+
+@pytest.mark.parametrize("line, sample", [
+    ('routinator_serial 12', Sample("routinator_serial", {}, 12.0)),
+    ('up{job="a",path="x\\"y,}"} 1 123',
+     Sample("up", {"job": "a", "path": 'x"y,}'}, 1.0)),
+    ('up{job="a"} abc', None),
+    ('# TYPE up gauge', None),
+    ('up{job="a"', None),
+    ('up', None),
+])
+def teste_caso_analisando_linhas(line, sample):
+    assert RoutinatorMetrics.parse_line(line) == sample
+
+
+def teste_caso_resumo_das_metricas():
+    with StubHttpServer({"/metrics": METRICS}) as server:
+        client = LocalHttpClient.from_endpoint(server.address, timeout=2)
+        summary = RoutinatorMetrics().scrape(client).summary()
+        client.close()
+
+    assert summary["lastUpdateDurationSeconds"] == 183.25
+    assert summary["serial"] == 1234
+    assert summary["vrpsTotal"] == 370000
+    assert summary["vrpsPerTal"] == {"apnic": 150000, "ripe": 220000}
+    assert summary["rtrCurrentConnections"] == 12
+    assert summary["vrpsUnsafe"] is None
+    assert summary["staleObjects"] is None
+    assert summary["repositories"] == 5
+    assert summary["failedRepositories"] == 2
+    assert summary["failedRepositoryList"] == [
+        {"uri": "https://rrdp.example.net/notification.xml",
+         "type": "rrdp", "status": -1},
+        {"uri": "rsync://rpki.example.org/repo/", "type": "rsync",
+         "status": 10},
+    ]
+    assert summary["samples"] == 12
+
+
+def teste_caso_tokenizando_em_partes():
+    chunks = [METRICS[start:start + 5] for start in range(0, len(METRICS), 5)]
+
+    assert list(RoutinatorMetrics.iter_samples(chunks)) == \
+        list(RoutinatorMetrics.iter_samples([METRICS]))
+
+
+def teste_caso_estagio_de_coleta():
+    instance = Process(scrape_metrics=True, http_timeout=2)
+    report = Report()
+
+    with StubHttpServer({"/metrics": METRICS}) as server:
+        instance.extract_routinator_metrics(
+            report, {"http-listen": [server.address]})
+
+    summary = report.get_report_dict()["routinatorMetrics"]
+    assert summary["serial"] == 1234
+    assert instance.metrics.stage("scrape").items == {"samples": 12}
+
+
+def teste_caso_metricas_do_routinator():
+    instance = RoutinatorMetrics()
+    for sample in RoutinatorMetrics.iter_samples([ROUTINATOR]):
+        instance.add(sample)
+
+    summary = instance.summary()
+    assert summary["lastUpdateDurationSeconds"] == 29
+    assert summary["serial"] == 1802
+    assert summary["vrpsTotal"] == 84413
+    assert summary["vrpsFinal"] == 83367
+    assert summary["vrpsDuplicate"] == 1046
+    assert summary["rtrCurrentConnections"] == 2
+    assert summary["rtrConnections"] == 17
+    assert summary["staleObjects"] == 5
+    assert summary["stalePerTal"] == {"ripe": 5}
+    assert summary["repositories"] == 2
+    assert summary["failedRepositories"] == 0
+    assert summary["samples"] == 17
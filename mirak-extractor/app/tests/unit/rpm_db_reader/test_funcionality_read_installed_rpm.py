@@ -0,0 +1,164 @@
+import sqlite3
+import struct
+from mock import MagicMock, patch
+from app.apps_found import AppsFound
+from app.rpm_db_reader import RpmDbReader
+
+
+def make_header(name, version, arch, vendor=None):
+    """Builds an RPM header blob with the given string tags"""
+    tags = [(1000, name), (1001, version), (1022, arch)]
+    if vendor is not None:
+        tags.append((1011, vendor))
+    index = b""
+    data = b""
+    for tag, value in tags:
+        index += struct.pack(">iIiI", tag, 6, len(data), 1)
+        data += value.encode() + b"\0"
+    return struct.pack(">II", len(tags), len(data)) + index + data
+
+
+HEADERS = [
+    make_header("dnf", "4.14.0", "noarch", "Red Hat, Inc."),
+    make_header("gpg-pubkey", "08c4cc43", "(none)"),
+    make_header("routinator", "0.14.0", "x86_64"),
+]
+
+
+def write_ndb(path):
+    page = bytearray(4096)
+    page[0:4] = b"RpmP"
+    struct.pack_into("<III", page, 4, 0, 1, 1)
+    blobs = bytearray()
+    for position, header in enumerate(HEADERS, start=1):
+        block = (4096 + len(blobs)) // 16
+        struct.pack_into("<4sIII", page, 16 + position * 16,
+                         b"Slot", position, block, 0)
+        blob = struct.pack("<4sIII", b"BlbS", position, 0, len(header))
+        blob += header + b"\0" * 12
+        blob += b"\0" * (-len(blob) % 16)
+        blobs += blob
+    path.write_bytes(bytes(page + blobs))
+
+
+def write_bdb(path):
+    page_size = 512
+    meta = bytearray(page_size)
+    struct.pack_into("<III", meta, 12, 0x061561, 9, page_size)
+    # Page 1 holds two inline headers, page 2 a header stored off page
+    hash_page = bytearray(page_size)
+    hash_page[25] = 13
+    items = [b"\x01" + struct.pack("<I", 0), b"\x01" + struct.pack("<I", 4)]
+    for record, header in enumerate(HEADERS[:2], start=1):
+        items.append(b"\x01" + struct.pack("<I", record))
+        items.append(b"\x01" + header)
+    items.append(b"\x01" + struct.pack("<I", 3))
+    items.append(b"\x03\0\0\0" + struct.pack("<II", 2, len(HEADERS[2])))
+    struct.pack_into("<H", hash_page, 20, len(items))
+    end = page_size
+    for position, item in enumerate(items):
+        end -= len(item)
+        hash_page[end:end + len(item)] = item
+        struct.pack_into("<H", hash_page, 26 + position * 2, end)
+    overflow = bytearray(page_size)
+    overflow[25] = 7
+    struct.pack_into("<H", overflow, 22, len(HEADERS[2]))
+    overflow[26:26 + len(HEADERS[2])] = HEADERS[2]
+    path.write_bytes(bytes(meta + hash_page + overflow))
+
+
+def teste_caso_ler_pacotes_sqlite(tmp_path):
+    connection = sqlite3.connect(str(tmp_path / "rpmdb.sqlite"))
+    connection.execute(
+        "CREATE TABLE Packages (hnum INTEGER PRIMARY KEY, blob BLOB NOT NULL)"
+    )
+    connection.executemany(
+        "INSERT INTO Packages (blob) VALUES (?)", [(h,) for h in HEADERS]
+    )
+    connection.commit()
+    connection.close()
+    instance = RpmDbReader((str(tmp_path),))
+
+    softwares = list(instance.read_installed())
+    assert instance.locate_database()[0] == "sqlite"
+    assert softwares == [
+        ["dnf", "Red Hat, Inc.", "4.14.0", "noarch"],
+        ["gpg-pubkey", "(none)", "08c4cc43", "(none)"],
+        ["routinator", "(none)", "0.14.0", "x86_64"],
+    ]
+
+
+def teste_caso_ler_pacotes_ndb(tmp_path):
+    write_ndb(tmp_path / "Packages.db")
+    instance = RpmDbReader((str(tmp_path),))
+
+    softwares = list(instance.read_installed())
+    assert instance.locate_database()[0] == "ndb"
+    assert [software[0] for software in softwares] == [
+        "dnf", "gpg-pubkey", "routinator"
+    ]
+
+
+def teste_caso_ler_pacotes_bdb(tmp_path):
+    write_bdb(tmp_path / "Packages")
+    instance = RpmDbReader((str(tmp_path),))
+
+    softwares = list(instance.read_installed())
+    assert instance.locate_database()[0] == "bdb"
+    assert [software[0] for software in softwares] == [
+        "dnf", "gpg-pubkey", "routinator"
+    ]
+
+
+def teste_caso_localizar_apps_pelo_banco_rpm(tmp_path):
+    write_ndb(tmp_path / "Packages.db")
+    instance = AppsFound(rpm_db_dirs=(str(tmp_path),))
+
+    softwares = instance.locate_apps("enterprise")
+    assert softwares[0] == ["dnf", "enterprise-tag_rec-app", "4.14.0",
+                            "noarch"]
+    assert softwares[2][1] == "nlnetlabs"
+
+
+def teste_caso_sem_banco_rpm(tmp_path):
+    instance = RpmDbReader((str(tmp_path),))
+
+    assert not instance.is_available()
+    assert list(instance.read_installed()) == []
+
+
+def teste_caso_ler_pacotes_sqlite_wal(tmp_path):
+    path = str(tmp_path / "rpmdb.sqlite")
+    writer = sqlite3.connect(path)
+    writer.execute("PRAGMA journal_mode=WAL")
+    writer.execute("PRAGMA wal_autocheckpoint=0")
+    writer.execute(
+        "CREATE TABLE Packages (hnum INTEGER PRIMARY KEY, blob BLOB NOT NULL)"
+    )
+    writer.executemany(
+        "INSERT INTO Packages (blob) VALUES (?)", [(h,) for h in HEADERS]
+    )
+    writer.commit()
+    instance = RpmDbReader((str(tmp_path),))
+
+    # The committed transaction is still only in the "-wal" file
+    assert (tmp_path / "rpmdb.sqlite-wal").stat().st_size > 0
+    softwares = list(instance.read_installed())
+    writer.close()
+    assert [software[0] for software in softwares] == [
+        "dnf", "gpg-pubkey", "routinator"
+    ]
+
+
+def teste_caso_banco_sqlite_danificado(tmp_path):
+    (tmp_path / "rpmdb.sqlite").write_bytes(b"SQLite format 3\0" + b"x" * 84)
+    instance = AppsFound(rpm_db_dirs=(str(tmp_path),))
+    process = MagicMock()
+    process.__enter__.return_value.stdout = iter([
+        "routinator|NLnet Labs|0.14.0|x86_64\n",
+    ])
+
+    with patch("subprocess.Popen", return_value=process) as popen:
+        softwares = instance.locate_apps("enterprise")
+    assert popen.call_args[0][0][:2] == ["rpm", "-qa"]
+    assert softwares == [["routinator", "nlnetlabs", "0.14.0", "x86_64"]]
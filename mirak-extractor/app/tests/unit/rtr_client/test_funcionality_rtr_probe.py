@@ -0,0 +1,50 @@
+import socket
+from app.rtr_client import RtrClient
+from app.tests.rtr_stub import StubRtrServer
+
+
+def teste_caso_reset_query_versao_1():
+    with StubRtrServer(ipv4_prefixes=1000, ipv6_prefixes=200) as server:
+        result = RtrClient(timeout=2).probe_endpoint(server.address)
+
+    assert result["endpoint"] == server.address
+    assert result["version"] == 1
+    assert result["error"] is None
+    assert result["sessionId"] == 7
+    assert result["serial"] == 42
+    assert result["refreshInterval"] == 3600
+    assert result["pdus"] == {"cacheResponse": 1, "ipv4Prefix": 1000,
+                              "ipv6Prefix": 200, "endOfData": 1}
+    assert result["bytes"] == 8 + 1000 * 20 + 200 * 32 + 24
+    assert 0 <= result["timeToFirstPduMs"] <= result["timeToEndOfDataMs"]
+
+
+def teste_caso_negociando_versao_0():
+    with StubRtrServer(versions=(0,)) as server:
+        result = RtrClient(timeout=2).probe_endpoint(server.address)
+
+    assert server.queries == [1, 0]
+    assert result["version"] == 0
+    assert result["serial"] == 42
+    assert "refreshInterval" not in result
+    assert result["pdus"]["ipv4Prefix"] == 10
+
+
+def teste_caso_relatorio_de_erro():
+    with StubRtrServer(versions=(2,)) as server:
+        result = RtrClient(timeout=2).probe_endpoint(server.address)
+
+    assert result["version"] == 0
+    assert result["error"] == \
+        "error report 4: Unsupported Protocol Version"
+    assert "errorCode" not in result
+
+
+def teste_caso_cache_indisponivel():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+
+    result = RtrClient(timeout=1).probe_endpoint(f"[::]:{port}")
+    assert result["error"]
+    assert RtrClient().probe_endpoint("3323")["error"] == "invalid address"
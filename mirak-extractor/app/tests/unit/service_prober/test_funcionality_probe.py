@@ -0,0 +1,101 @@
+import asyncio
+import socket
+import struct
+import time
+from app.service_prober import ServiceProber
+
+
+async def ssh_server(reader, writer):
+    writer.write(b"SSH-2.0-OpenSSH_9.6\r\n")
+    await writer.drain()
+    writer.close()
+
+
+async def http_server(reader, writer):
+    await reader.readuntil(b"\r\n\r\n")
+    writer.write(b"HTTP/1.0 200 OK\r\nServer: routinator\r\n\r\n")
+    await writer.drain()
+    writer.close()
+
+
+async def rtr_server(reader, writer):
+    await reader.read(8)
+    # Error Report PDU: "Unsupported Protocol Version"
+    writer.write(struct.pack("!BBHI", 1, 10, 4, 16) + b"\0" * 8)
+    await writer.drain()
+    writer.close()
+
+
+async def silent_server(reader, writer):
+    await asyncio.sleep(5)
+    writer.close()
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def probe_servers(handlers, prober):
+    servers = [await asyncio.start_server(handler, "127.0.0.1", 0)
+               for handler in handlers]
+    listeners = [("0.0.0.0", server.sockets[0].getsockname()[1])
+                 for server in servers]
+    try:
+        return await prober.probe_all(listeners)
+    finally:
+        for server in servers:
+            server.close()
+
+
+def teste_caso_identificando_servicos():
+    prober = ServiceProber(timeout=0.5)
+
+    ssh, http, rtr = asyncio.run(probe_servers(
+        [ssh_server, http_server, rtr_server], prober))
+    assert ssh["protocol"] == "ssh"
+    assert ssh["banner"] == "SSH-2.0-OpenSSH_9.6"
+    assert ssh["tls"] is False and ssh["connectMs"] is not None
+    assert http["protocol"] == "http"
+    assert http["banner"] == "HTTP/1.0 200 OK"
+    assert rtr["protocol"] == "rtr"
+    assert rtr["error"] is None
+
+
+def teste_caso_porta_fechada():
+    prober = ServiceProber(timeout=0.5)
+
+    result = asyncio.run(prober.probe("127.0.0.1", free_port()))
+    assert result["error"] is not None
+    assert result["connectMs"] is None
+
+
+def teste_caso_sondagem_concorrente():
+    prober = ServiceProber(concurrency=64, timeout=0.3)
+
+    started = time.perf_counter()
+    results = asyncio.run(probe_servers([silent_server] * 40, prober))
+    elapsed = time.perf_counter() - started
+    assert len(results) == 40
+    assert all(result["protocol"] is None for result in results)
+    # Each probe waits for its timeouts, but they all wait together
+    assert elapsed < 40 * 0.3 / 4
+
+
+def teste_caso_sondagem_limitada_ao_timeout():
+    prober = ServiceProber(timeout=0.3)
+
+    started = time.perf_counter()
+    result, = asyncio.run(probe_servers([silent_server], prober))
+    elapsed = time.perf_counter() - started
+    assert result["tls"] is False
+    # Connection, read, request and TLS handshake share one deadline
+    assert elapsed < 0.3 * 2
+
+
+def teste_caso_impressao_digital():
+    assert ServiceProber.fingerprint(b"\x15\x03\x01\x00\x02\x02\x46") == \
+        (None, None)
+    assert ServiceProber.fingerprint(b"") == (None, None)
+    assert ServiceProber.target_address("::") == "::1"
@@ -0,0 +1,105 @@
+import socket
+import struct
+from mock import patch
+from app.extract_rede_info import ExtractRedeInfo
+from app.proc_net_reader import Listener
+from app.sock_diag import SockDiagReader
+
+
+def message(family, state, port, address, inode):
+    body = struct.pack("=BBBB", family, state, 0, 0) + \
+        struct.pack("!HH", port, 0) + address.ljust(16, b"\0") + \
+        b"\0" * 16 + struct.pack("=I", 0) + b"\0" * 8 + \
+        struct.pack("=IIIII", 0, 0, 0, 998, inode)
+    return struct.pack("=IHHII", 16 + len(body), 20, 2, 1, 0) + body
+
+
+def done():
+    return struct.pack("=IHHII", 20, 3, 2, 1, 0) + struct.pack("=i", 0)
+
+
+def error(code):
+    return struct.pack("=IHHII", 36, 2, 0, 1, 0) + \
+        struct.pack("=i", -code) + b"\0" * 16
+
+
+class FakeNetlink:
+    replies = {}
+
+    def __init__(self, *args):
+        self.buffers = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+    def settimeout(self, timeout):
+        pass
+
+    def sendall(self, data):
+        assert len(data) == 72
+        family = data[16]
+        self.buffers = list(self.replies[family])
+
+    def recv(self, size):
+        return self.buffers.pop(0)
+
+
+def teste_caso_requisicao_sock_diag():
+    data = SockDiagReader().build_request(socket.AF_INET, 1)
+
+    length, kind, flags, _, _ = struct.unpack_from("=IHHII", data)
+    assert length == len(data) == 72
+    assert kind == 20
+    assert flags == 0x301
+    assert data[16:18] == bytes([socket.AF_INET, socket.IPPROTO_TCP])
+    assert struct.unpack_from("=I", data, 20)[0] == 1 << 10
+
+
+def teste_caso_listando_sockets_sock_diag():
+    FakeNetlink.replies = {
+        socket.AF_INET: [
+            message(socket.AF_INET, 10, 3323, bytes([0, 0, 0, 0]), 1001) +
+            message(socket.AF_INET, 10, 8080, bytes([127, 0, 0, 1]), 1003),
+            done(),
+        ],
+        socket.AF_INET6: [
+            message(socket.AF_INET6, 10, 8323, b"", 1004) + done(),
+        ],
+    }
+
+    with patch("socket.socket", FakeNetlink):
+        listeners = list(SockDiagReader().iter_listeners())
+
+    assert listeners == [
+        Listener("tcp", "0.0.0.0", 3323, 1001),
+        Listener("tcp", "127.0.0.1", 8080, 1003),
+        Listener("tcp6", "::", 8323, 1004),
+    ]
+
+
+def teste_caso_sock_diag_sem_ipv6():
+    FakeNetlink.replies = {
+        socket.AF_INET: [message(socket.AF_INET, 10, 3323, b"", 1001) +
+                         done()],
+        socket.AF_INET6: [error(2)],
+    }
+
+    with patch("socket.socket", FakeNetlink):
+        listeners = list(SockDiagReader().iter_listeners())
+
+    assert [listener.port for listener in listeners] == [3323]
+
+
+def teste_caso_extract_ports_sem_netlink():
+    instance = ExtractRedeInfo(proc_root="/nonexistent")
+
+    with patch.object(SockDiagReader, "iter_listeners",
+                      side_effect=OSError(93, "Protocol not supported")), \
+         patch("app.extract_rede_info.ExtractRedeInfo" +
+               "._ExtractRedeInfo__extract_ports_psutil",
+               return_value=([3323], {3323: "routinator"})) as mock_psutil:
+        assert instance.extract_ports() == ([3323], {3323: "routinator"})
+        mock_psutil.assert_called_once()
@@ -0,0 +1,121 @@
+import json
+import os
+import time
+import pytest
+from app.apps_found import AppsFound
+from app.software_collectors import (
+    CargoCollector,
+    FlatpakCollector,
+    PythonCollector,
+    SnapCollector,
+    SoftwareCollector,
+    SoftwareCollectors,
+)
+
+
+class SlowCollector(SoftwareCollector):
+    def __init__(self, name, rows, delay=0.0, error=None, required=False):
+        self.name = name
+        self.rows = rows
+        self.delay = delay
+        self.error = error
+        self.required = required
+
+    def collect(self):
+        time.sleep(self.delay)
+        if self.error:
+            raise self.error
+        yield from self.rows
+
+
+def teste_caso_coletores_concorrentes_em_ordem():
+    collectors = [
+        SlowCollector("dpkg", [["curl", "", "7.88.1", "amd64"]], 0.3),
+        SlowCollector("pip", [["requests", "", "2.31.0"]], 0.3),
+        SlowCollector("cargo", [["routinator", "", "0.14.0"]], 0.3),
+    ]
+    instance = SoftwareCollectors(AppsFound(), "debian", collectors=collectors)
+
+    start = time.perf_counter()
+    softwares = list(instance.iter_apps())
+    elapsed = time.perf_counter() - start
+    assert elapsed < 0.8
+    assert softwares == [
+        ["curl", "dpkg-tag_rec-app", "7.88.1", "amd64"],
+        ["requests", "pip-tag_rec-app", "2.31.0"],
+        ["routinator", "nlnetlabs", "0.14.0"],
+    ]
+    assert list(instance.timings) == ["dpkg", "pip", "cargo"]
+    assert instance.timings["pip"]["items"] == 1
+    assert instance.timings["cargo"]["seconds"] >= 0.3
+
+
+def teste_caso_falha_de_coletor_opcional():
+    collectors = [
+        SlowCollector("dpkg", [["curl", "", "7.88.1", "amd64"]]),
+        SlowCollector("snap", [], error=OSError("sem acesso")),
+    ]
+    instance = SoftwareCollectors(AppsFound(), "debian", collectors=collectors)
+
+    assert len(list(instance.iter_apps())) == 1
+    assert instance.errors == {"snap": "sem acesso"}
+
+
+def teste_caso_falha_de_coletor_obrigatorio():
+    collectors = [SlowCollector("dpkg", [], error=OSError("falha"),
+                                required=True)]
+    instance = SoftwareCollectors(AppsFound(), "debian", collectors=collectors)
+
+    with pytest.raises(OSError, match="falha"):
+        list(instance.iter_apps())
+
+
+def teste_caso_coletores_de_ecossistemas(tmp_path):
+    snap = tmp_path / "snap" / "core22" / "current" / "meta"
+    snap.mkdir(parents=True)
+    (snap / "snap.yaml").write_text(
+        "name: core22\nversion: '20240111'\narchitectures:\n  - amd64\n"
+    )
+    flatpak = tmp_path / "flatpak" / "org.example.App"
+    metainfo = flatpak / "x86_64" / "stable" / "active" / "files" / "share" \
+        / "metainfo"
+    metainfo.mkdir(parents=True)
+    (metainfo / "org.example.App.metainfo.xml").write_text(
+        '<component><releases><release version="1.2.3" date="2024-01-01"/>'
+        '</releases></component>'
+    )
+    os.symlink("x86_64/stable", str(flatpak / "current"))
+    site = tmp_path / "site-packages" / "requests-2.31.0.dist-info"
+    site.mkdir(parents=True)
+    (site / "METADATA").write_text(
+        "Metadata-Version: 2.1\nName: Requests\nVersion: 2.31.0\n\nName: x\n"
+    )
+    cargo = tmp_path / "cargo"
+    cargo.mkdir()
+    (cargo / ".crates2.json").write_text(json.dumps({"installs": {
+        "routinator 0.14.0 (registry+https://github.com/rust-lang/"
+        "crates.io-index)": {"bins": ["routinator"]}
+    }}))
+
+    assert list(SnapCollector(str(tmp_path / "snap")).collect()) == [
+        ["core22", "", "20240111", "amd64"]
+    ]
+    assert list(FlatpakCollector(str(tmp_path / "flatpak")).collect()) == [
+        ["org.example.App", "", "1.2.3", "x86_64"]
+    ]
+    assert list(PythonCollector(
+        (str(tmp_path / "site-packages"),)).collect()) == [
+        ["requests", "", "2.31.0"]
+    ]
+    assert list(CargoCollector((str(cargo),)).collect()) == [
+        ["routinator", "", "0.14.0"]
+    ]
+
+
+def teste_caso_coletores_opcionais_sob_demanda():
+    default = SoftwareCollectors(AppsFound(), "debian")
+    extra = SoftwareCollectors(AppsFound(), "debian", optional=True)
+
+    assert [collector.name for collector in default.collectors] == ["dpkg"]
+    assert [collector.name for collector in extra.collectors] == \
+        ["dpkg", "snap", "flatpak", "pip", "cargo"]
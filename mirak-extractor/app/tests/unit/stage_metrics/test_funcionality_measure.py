@@ -0,0 +1,55 @@
+import os
+import time
+import pytest
+from app.stage_metrics import StageMetrics
+
+
+def teste_caso_medindo_estagio():
+    instance = StageMetrics()
+
+    with instance.measure("apps") as record:
+        sum(range(200000))
+        time.sleep(0.05)
+        record.count("packages", 3)
+        record.count("packages")
+
+    data = instance.as_dict()["stages"]["apps"]
+    assert data["wallSeconds"] >= 0.05
+    assert 0 < data["cpuSeconds"] < data["wallSeconds"]
+    assert data["peakRssDeltaBytes"] >= 0
+    assert data["items"] == {"packages": 4}
+    assert data["errors"] == 0
+
+
+def teste_caso_erro_no_estagio():
+    instance = StageMetrics()
+
+    with pytest.raises(ValueError):
+        with instance.measure("rede"):
+            raise ValueError("falha")
+
+    assert instance.as_dict()["stages"]["rede"]["errors"] == 1
+
+
+def teste_caso_exportando_openmetrics(tmp_path):
+    instance = StageMetrics()
+    instance.stage("os")
+    instance.stage("apps").count("packages", 2)
+    instance.add_collectors({"dpkg": {"seconds": 0.5, "cpu_seconds": 0.25,
+                                      "items": 2}})
+    path = os.path.join(tmp_path, "mirak.prom")
+
+    instance.write_textfile(path)
+
+    with open(path, "r", encoding="utf8") as file:
+        text = file.read()
+    lines = text.splitlines()
+    assert lines[0] == "# TYPE mirak_extractor_stage_duration_seconds gauge"
+    assert lines[1] == "# UNIT mirak_extractor_stage_duration_seconds seconds"
+    assert 'mirak_extractor_stage_duration_seconds{stage="os"} 0.0' in lines
+    assert 'mirak_extractor_stage_items{stage="apps",kind="packages"} 2' \
+        in lines
+    assert 'mirak_extractor_collector_items{collector="dpkg"} 2' in lines
+    assert lines[-1] == "# EOF"
+    assert text.endswith("# EOF\n")
+    assert os.listdir(tmp_path) == ["mirak.prom"]
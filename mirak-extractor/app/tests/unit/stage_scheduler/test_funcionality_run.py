@@ -0,0 +1,95 @@
+import threading
+import pytest
+from app.stage_scheduler import StageScheduler
+
+
+def teste_caso_etapas_independentes_em_paralelo():
+    instance = StageScheduler()
+    events = []
+    lock = threading.Lock()
+    # "files" and "rede" only finish if they run at the same time
+    overlap = threading.Barrier(2, timeout=10)
+
+    def stage(name, barrier=None):
+        def _inner():
+            if barrier is not None:
+                barrier.wait()
+            with lock:
+                events.append(name)
+            return name.upper()
+        return _inner
+
+    instance.add_stage("os", stage("os"))
+    instance.add_stage("apps", stage("apps"), depends=("os",))
+    instance.add_stage("files", stage("files", overlap))
+    instance.add_stage("rede", stage("rede", overlap))
+
+    results = instance.run()
+    assert results == {"os": "OS", "apps": "APPS", "files": "FILES",
+                       "rede": "REDE"}
+    assert events.index("os") < events.index("apps")
+
+
+def teste_caso_etapas_sequenciais_com_um_trabalhador():
+    instance = StageScheduler(max_workers=1)
+    events = []
+    instance.add_stage("apps", lambda: events.append("apps"), depends=("os",))
+    instance.add_stage("os", lambda: events.append("os"))
+    instance.add_stage("rede", lambda: events.append("rede"))
+
+    assert instance.order() == ["os", "apps", "rede"]
+    instance.run()
+    assert events == ["os", "apps", "rede"]
+
+
+def teste_caso_etapas_com_ciclo_ou_dependencia_desconhecida():
+    instance = StageScheduler()
+    instance.add_stage("a", lambda: None, depends=("b",))
+    instance.add_stage("b", lambda: None, depends=("a",))
+    with pytest.raises(ValueError, match="cycle"):
+        instance.run()
+
+    instance = StageScheduler()
+    instance.add_stage("a", lambda: None, depends=("x",))
+    with pytest.raises(ValueError, match="unknown stage 'x'"):
+        instance.run()
+
+
+def teste_caso_falha_interrompe_dependentes():
+    instance = StageScheduler()
+    events = []
+
+    def fail():
+        raise RuntimeError("falha na etapa")
+
+    instance.add_stage("os", fail)
+    instance.add_stage("apps", lambda: events.append("apps"), depends=("os",))
+    with pytest.raises(RuntimeError, match="falha na etapa"):
+        instance.run()
+    assert events == []
+
+
+def teste_caso_etapa_exclusiva_executa_sozinha():
+    instance = StageScheduler()
+    running = set()
+    overlaps = []
+    lock = threading.Lock()
+
+    def stage(name):
+        def _inner():
+            with lock:
+                overlaps.append((name, set(running)))
+                running.add(name)
+            with lock:
+                running.discard(name)
+        return _inner
+
+    instance.add_stage("files", stage("files"))
+    instance.add_stage("os", stage("os"), exclusive=True)
+    instance.add_stage("apps", stage("apps"), depends=("os",))
+    instance.add_stage("rede", stage("rede"))
+
+    instance.run()
+    started = dict(overlaps)
+    assert started["os"] == set()
+    assert "os" not in started["rede"] and "os" not in started["apps"]
@@ -0,0 +1,88 @@
+import os
+import pwd
+import stat
+from app.main_process import Process
+from app.report import Report
+from app.tree_audit import TreeAudit
+
+
+def build_tree(root, directories=5, files=20):
+    for number in range(directories):
+        directory = os.path.join(root, f"rrdp-{number}", "objects")
+        os.makedirs(directory)
+        for file_number in range(files):
+            with open(os.path.join(directory, f"{file_number}.roa"),
+                      "wb") as file:
+                file.write(b"x" * 10)
+    os.symlink("rrdp-0", os.path.join(root, "current"))
+
+
+def teste_caso_arvore_sem_anomalias(tmp_path):
+    build_tree(str(tmp_path))
+
+    audit = TreeAudit(max_workers=4).audit(str(tmp_path))
+    assert audit["counts"]["files"] == 100
+    assert audit["counts"]["directories"] == 10
+    assert audit["counts"]["symlinks"] == 1
+    assert audit["counts"]["bytes"] == 1000
+    assert audit["counts"]["anomalous"] == 0
+    assert audit["anomalies"] == []
+    assert audit["truncated"] is False
+
+
+def teste_caso_arvore_com_anomalias(tmp_path):
+    build_tree(str(tmp_path))
+    writable = os.path.join(tmp_path, "rrdp-1", "objects", "3.roa")
+    os.chmod(writable, 0o666)
+    setuid = os.path.join(tmp_path, "rrdp-2", "objects", "4.roa")
+    os.chmod(setuid, stat.S_ISUID | 0o755)
+
+    audit = TreeAudit(max_workers=3).audit(str(tmp_path))
+    assert audit["counts"]["worldWritable"] == 1
+    assert audit["counts"]["setuid"] == 1
+    user = pwd.getpwuid(os.getuid()).pw_name
+    assert audit["anomalies"] == [
+        {"path": writable, "mode": "0666", "uid": os.getuid(),
+         "user": user, "issues": ["world-writable"]},
+        {"path": setuid, "mode": "4755", "uid": os.getuid(),
+         "user": user, "issues": ["setuid"]},
+    ]
+
+    # Owned by nobody that is trusted, every entry is foreign
+    audit = TreeAudit(max_workers=2, max_anomalies=5).audit(
+        str(tmp_path), trusted_uids=[os.getuid() + 1])
+    assert audit["counts"]["foreignOwner"] == 112
+    assert len(audit["anomalies"]) == 5
+    assert audit["truncated"] is True
+
+
+def teste_caso_problemas_por_modo():
+    trusted = {0}
+
+    assert TreeAudit.issues(stat.S_IFDIR | 0o2777, 0, trusted) == \
+        ["world-writable"]
+    assert TreeAudit.issues(stat.S_IFLNK | 0o777, 0, trusted) == []
+    assert TreeAudit.issues(stat.S_IFREG | 0o2755, 5, trusted) == \
+        ["foreign-owner", "setgid"]
+
+
+def teste_caso_estagio_de_auditoria(tmp_path):
+    build_tree(str(tmp_path), directories=2, files=3)
+    instance = Process(audit_trees=True, audit_workers=2,
+                       cache_dir=os.path.join(tmp_path, "cache"))
+    report = Report()
+
+    instance.extract_tree_audit(report, {
+        "repository-dir": str(tmp_path),
+        "tal-dir": str(tmp_path),
+        "working-dir": os.path.join(tmp_path, "missing"),
+    })
+
+    audits = report.get_report_dict()["treeAudit"]
+    assert [audit["key"] for audit in audits] == \
+        ["repository-dir", "working-dir"]
+    assert audits[0]["counts"]["files"] == 6
+    assert "error" in audits[1]
+    assert instance.metrics.stage("audit").items == \
+        {"entries": 11, "anomalies": 0, "rescanned": 5, "changes": 0}
+    assert instance.metrics.stage("audit").errors == 1
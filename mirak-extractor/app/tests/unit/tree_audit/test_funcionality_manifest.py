@@ -0,0 +1,143 @@
+import os
+import time
+from unittest import mock
+from app.tree_audit import TreeAudit
+from app.tree_manifest import TreeManifest
+
+
+def later_scan():
+    # Directories whose ctime is close to the previous scan are always read
+    # again and the ctime cannot be set, so the scan is dated in the future
+    return mock.patch("app.tree_audit.time.time_ns",
+                      return_value=time.time_ns() + 3600 * 10**9)
+
+
+def build_old_tree(root, directories=4, files=10):
+    past = time.time() - 3600
+    for number in range(directories):
+        directory = os.path.join(root, f"rrdp-{number}", "objects")
+        os.makedirs(directory)
+        for file_number in range(files):
+            with open(os.path.join(directory, f"{file_number}.roa"),
+                      "wb") as file:
+                file.write(b"x" * 10)
+                os.chmod(file.fileno(), 0o644)
+    for path, _, _ in os.walk(root):
+        os.utime(path, (past, past))
+
+
+def teste_caso_auditoria_incremental_sem_mudancas(tmp_path):
+    tree = os.path.join(tmp_path, "repository")
+    build_old_tree(tree)
+    manifest_path = os.path.join(tmp_path, TreeManifest.file_name(tree))
+    auditor = TreeAudit(max_workers=2)
+
+    with later_scan():
+        first = auditor.audit(tree, manifest_path=manifest_path)
+    assert first["incremental"] is False
+    assert first["directoriesRescanned"] == 9
+    assert first["changeCount"] is None
+    assert os.path.exists(manifest_path)
+
+    second = auditor.audit(tree, manifest_path=manifest_path)
+    assert second["incremental"] is True
+    assert second["directoriesRescanned"] == 0
+    assert second["changeCount"] == 0
+    assert second["digest"] == first["digest"]
+    assert second["counts"] == first["counts"]
+
+    rebuilt = auditor.audit(tree, manifest_path=manifest_path, rebuild=True)
+    assert rebuilt["incremental"] is False
+    assert rebuilt["digest"] == first["digest"]
+
+
+def teste_caso_auditoria_incremental_com_mudancas(tmp_path):
+    tree = os.path.join(tmp_path, "repository")
+    build_old_tree(tree)
+    manifest_path = os.path.join(tmp_path, "manifest.idx")
+    auditor = TreeAudit(max_workers=3)
+    with later_scan():
+        first = auditor.audit(tree, manifest_path=manifest_path)
+
+    objects = os.path.join(tree, "rrdp-1", "objects")
+    added = os.path.join(objects, "new.roa")
+    with open(added, "wb") as file:
+        file.write(b"y")
+    # Replaced through a rename, as the validators write their objects
+    replaced = os.path.join(objects, "3.roa")
+    with open(f"{replaced}.tmp", "wb") as file:
+        file.write(b"z")
+    os.chmod(f"{replaced}.tmp", 0o666)
+    os.replace(f"{replaced}.tmp", replaced)
+    os.remove(os.path.join(tree, "rrdp-2", "objects", "5.roa"))
+
+    second = auditor.audit(tree, manifest_path=manifest_path)
+    assert second["incremental"] is True
+    assert second["directoriesRescanned"] == 2
+    assert second["changeCount"] == 3
+    assert second["digest"] != first["digest"]
+    assert second["counts"]["files"] == 40
+    assert second["counts"]["worldWritable"] == 1
+    changes = second["changes"]
+    assert [change["change"] for change in changes] == \
+        ["modified", "added", "removed"]
+    assert changes[0]["path"] == replaced
+    assert changes[0]["mode"] == "0666"
+    assert changes[0]["issues"] == ["world-writable"]
+    assert changes[0]["previous"]["mode"] == "0644"
+    assert changes[1]["path"] == added
+    assert changes[2] == {"path": os.path.join(tree, "rrdp-2", "objects"),
+                          "change": "removed", "entries": 1}
+
+
+def teste_caso_manifesto_de_outra_auditoria(tmp_path):
+    tree = os.path.join(tmp_path, "repository")
+    build_old_tree(tree, directories=1, files=1)
+    manifest_path = os.path.join(tmp_path, "manifest.idx")
+    TreeAudit().audit(tree, manifest_path=manifest_path)
+
+    # Trusting other users changes the anomalies, so the manifest is not
+    # used
+    audit = TreeAudit().audit(tree, trusted_uids=[0, 4242],
+                              manifest_path=manifest_path)
+    assert audit["incremental"] is False
+
+    with open(manifest_path, "wb") as file:
+        file.write(b"garbage")
+    assert TreeManifest().load(manifest_path, b"") is False
+
+
+def teste_caso_permissao_de_diretorio_alterada(tmp_path):
+    tree = os.path.join(tmp_path, "repository")
+    build_old_tree(tree, directories=2, files=1)
+    manifest_path = os.path.join(tmp_path, "manifest.idx")
+    objects = os.path.join(tree, "rrdp-1", "objects")
+    os.chmod(objects, 0o755)
+    auditor = TreeAudit()
+    with later_scan():
+        first = auditor.audit(tree, manifest_path=manifest_path)
+
+    # Only the directory itself changes, its parent does not
+    os.chmod(objects, 0o777)
+    second = auditor.audit(tree, manifest_path=manifest_path)
+    assert second["incremental"] is True
+    assert second["directoriesRescanned"] == 1
+    assert second["counts"]["worldWritable"] == 1
+    assert [anomaly["path"] for anomaly in second["anomalies"]] == [objects]
+    assert second["changes"] == [{
+        "path": objects, "change": "modified", "mode": "0777",
+        "uid": os.getuid(), "user": second["anomalies"][0]["user"],
+        "gid": os.getgid(), "issues": ["world-writable"],
+        "previous": {"mode": "0755", "uid": os.getuid(),
+                     "gid": os.getgid()},
+    }]
+    assert second["digest"] != first["digest"]
+    assert second["counts"] == \
+        TreeAudit().audit(tree, manifest_path=None)["counts"]
+
+    os.chmod(objects, 0o755)
+    third = auditor.audit(tree, manifest_path=manifest_path)
+    assert third["counts"]["worldWritable"] == 0
+    assert third["anomalies"] == []
+    assert third["changes"][0]["previous"]["mode"] == "0777"
+    assert third["digest"] == first["digest"]
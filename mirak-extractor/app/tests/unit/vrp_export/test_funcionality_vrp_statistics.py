@@ -0,0 +1,119 @@
+import http.client
+import json
+import tracemalloc
+import pytest
+from mock import MagicMock, patch
+from app.local_http import LocalHttpClient
+from app.main_process import Process
+from app.report import Report
+from app.tests.http_stub import StubHttpServer
+from app.vrp_export import BloomFilter, VrpExport, VrpStatistics
+
+ROAS = [
+    ("AS13335", "1.0.0.0/24", 24, "apnic"),
+    ("AS13335", "1.0.0.0/24", 24, "ripe"),
+    ("AS3333", "193.0.0.0/21", 24, "ripe"),
+    ("AS64512", "4.0.0.0/6", 6, "arin"),
+    ("AS3333", "2001:67c:2e8::/48", 48, "ripe"),
+]
+CSV = ("ASN,IP Prefix,Max Length,Trust Anchor\r\n" + "".join(
+    f"{asn},{prefix},{length},{ta}\r\n" for asn, prefix, length, ta in ROAS
+)).encode()
+JSON = json.dumps({
+    "metadata": {"generated": 1700000000},
+    "roas": [{"asn": asn, "prefix": prefix, "maxLength": length, "ta": ta}
+             for asn, prefix, length, ta in ROAS],
+    "routerKeys": [{"asn": "AS1"}],
+}, indent=2).encode()
+
+
+def chunked(data, size):
+    for start in range(0, len(data), size):
+        yield data[start:start + size]
+
+
+@pytest.mark.parametrize("size", [1, 7, 4096])
+def teste_caso_lendo_exportacoes_em_partes(size):
+    assert list(VrpExport.iter_csv(chunked(CSV, size))) == ROAS
+    assert list(VrpExport.iter_json(chunked(JSON, size))) == ROAS
+
+
+def teste_caso_estatisticas_do_servidor():
+    with StubHttpServer({"/csv": CSV, "/json": JSON}) as server:
+        client = LocalHttpClient.from_endpoint(server.address, timeout=2)
+        from_csv = VrpExport(client, "csv").analyse(VrpStatistics(1000))
+        from_json = VrpExport(client, "json").analyse(VrpStatistics(1000))
+        client.close()
+        # The connection is kept between the requests
+        assert server.connections == 1
+
+    summary = from_csv.summary()
+    assert summary == from_json.summary()
+    assert summary["vrps"] == 5
+    assert summary["perTrustAnchor"] == {"apnic": 1, "arin": 1, "ripe": 3}
+    assert summary["maxLengthDistribution"] == {
+        "ipv4": {"6": 1, "24": 3}, "ipv6": {"48": 1}}
+    assert summary["looseMaxLength"] == 1
+    assert summary["broadPrefixes"] == 1
+    assert summary["duplicates"] == 1
+
+
+def teste_caso_memoria_limitada():
+    def generate(count):
+        yield b"ASN,IP Prefix,Max Length,Trust Anchor\n"
+        for start in range(0, count, 1000):
+            yield "".join(
+                f"AS{number},10.{number >> 16 & 255}.{number >> 8 & 255}."
+                f"{number & 255}/32,32,ripe\n"
+                for number in range(start, start + 1000)
+            ).encode()
+
+    statistics = VrpStatistics(capacity=50_000)
+    tracemalloc.start()
+    for vrp in VrpExport.iter_csv(generate(50_000)):
+        statistics.add(*vrp)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    assert statistics.total == 50_000
+    assert statistics.duplicates <= 50_000 * 0.01
+    assert peak < 1024 * 1024
+
+
+def teste_caso_filtro_de_bloom():
+    bloom = BloomFilter(100)
+
+    assert bloom.add(b"AS1 10.0.0.0/8 8") is False
+    assert bloom.add(b"AS1 10.0.0.0/8 8") is True
+
+
+def teste_caso_estagio_sem_servidor():
+    instance = Process(analyze_vrps=True, http_timeout=1)
+    report = Report()
+
+    with StubHttpServer({}) as server:
+        instance.extract_vrp_statistics(
+            report, {"http-listen": [server.address]})
+
+    statistics = report.get_report_dict()["vrpStatistics"]
+    assert "404" in statistics["error"]
+    assert instance.metrics.stage("vrps").errors == 1
+
+
+def teste_caso_vrp_incompleto():
+    data = b'{"roas": [{"asn": "AS1", "prefix": "10.0.0.0/8"}]}'
+
+    with pytest.raises(ValueError):
+        list(VrpExport.iter_json(chunked(data, 7)))
+
+
+def teste_caso_erro_com_corpo_truncado():
+    response = MagicMock(status=500, reason="Internal Server Error")
+    response.read.side_effect = http.client.IncompleteRead(b"")
+    client = LocalHttpClient("127.0.0.1", 8323)
+
+    with patch("http.client.HTTPConnection.request"), \
+            patch("http.client.HTTPConnection.getresponse",
+                  return_value=response):
+        with pytest.raises(OSError, match="500"):
+            list(client.stream("/csv"))
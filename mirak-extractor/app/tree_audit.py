@@ -0,0 +1,443 @@
+# ####################################################
+
+# This code is part of the "Mirak-extractor" software and, consequently, is
+# part of the "Mirak" project. It is expressly forbidden to copy, reproduce,
+# distribute or make available this code or parts thereof in isolation, except
+# under the terms expressly authorized by the rights holder.
+
+# The provision of the complete software must strictly follow the guidelines
+# established in the applicable license, as detailed in the license file
+# included in this repository. Any unauthorized use may result in sanctions
+# provided for in Brazilian law, including, but not limited to,
+# Law No. 9.610/1998 (Copyright Law).
+
+# For more information or specific requests, please contact the holder through
+# the contact details present in the license file.
+
+# ####################################################
+
+"""
+This module contains the "TreeAudit" class, which audits the permissions of
+every entry of the directory trees used by Routinator (repository, TALs,
+working directory), so that a tampered RPKI cache can be noticed.
+"""
+
+import hashlib
+import json
+import os
+import stat
+import struct
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+from app.identity_resolver import IdentityResolver
+from app.tree_manifest import DirectoryRecord, TreeManifest
+
+
+class DirectoryState:
+    """A directory visited by the audit, with the counts, entries and
+    anomalies of its own entries"""
+
+    __slots__ = ("path", "name", "previous", "inode", "mtime_ns", "ctime_ns",
+                 "owner", "counts", "entries", "anomalies", "children",
+                 "first_child", "digest", "rescanned", "changes",
+                 "change_count", "status")
+
+    def __init__(self, path: str, name: bytes,
+                 previous: Optional[int]) -> None:
+        self.path = path
+        self.name = name
+        # Index of the directory in the previous manifest
+        self.previous = previous
+        self.inode = self.mtime_ns = self.ctime_ns = 0
+        self.owner = b""
+        self.counts: "List[int]" = [0] * len(TreeAudit.FIELDS)
+        self.entries = b""
+        self.anomalies: "List[Tuple[bytes, int, int, int]]" = []
+        self.children: "List[DirectoryState]" = []
+        self.first_child = 0
+        self.digest = b""
+        self.rescanned = False
+        self.changes: "List[dict]" = []
+        self.change_count = 0
+        # Status of the directory, when its parent already read it
+        self.status: "Optional[os.stat_result]" = None
+
+
+class TreeAudit:
+    """Walks a directory tree with "os.scandir", one level at a time, the
+    directories of each level being read by a bounded pool of threads. The
+    status of each entry comes from its "DirEntry". Only aggregate counts
+    and the anomalous entries (world-writable, owned by a foreign user,
+    setuid or setgid) are reported, so trees of millions of files can be
+    audited.
+
+    With a manifest, the state of the tree is kept between executions and
+    a directory whose inode, mtime and ctime did not change is not read
+    again: its counts and anomalies come from the manifest. The changes of
+    the entries of the directories read again (added, removed, or with a
+    new mode or owner) are reported. An entry changed in place (chmod,
+    chown or a write that is not a rename) does not change its directory,
+    so it is only seen by a full audit, except for the directories: the
+    status of each one is compared with the entry recorded by its parent."""
+
+    # Keys of the Routinator configuration whose trees are audited
+    CONFIG_KEYS = ("repository-dir", "tal-dir", "extra-tals-dir",
+                   "working-dir", "chroot")
+    FIELDS = ("files", "directories", "symlinks", "others", "bytes",
+              "errors", "anomalous", "worldWritable", "foreignOwner",
+              "setuid", "setgid")
+    ISSUES = ("world-writable", "foreign-owner", "setuid", "setgid")
+    DEFAULT_WORKERS = 8
+    MAX_ANOMALIES = 100
+    __ERRORS = FIELDS.index("errors")
+    __ANOMALOUS = FIELDS.index("anomalous")
+    __OWNER = struct.Struct("<III")
+    # Timestamps have the granularity of the kernel clock, so a directory
+    # changed shortly before the previous scan may have changed again
+    # without a new timestamp
+    __RACY_NS = 1_000_000_000
+
+    def __init__(self, max_workers: Optional[int] = None,
+                 max_anomalies: int = MAX_ANOMALIES,
+                 identities: Optional[IdentityResolver] = None) -> None:
+        self.max_workers = max_workers or min(self.DEFAULT_WORKERS,
+                                              os.cpu_count() or 1)
+        self.max_anomalies = max_anomalies
+        # Only the reported entries have their owner named
+        self.identities = identities or IdentityResolver()
+
+    @staticmethod
+    def issue_mask(mode: int, uid: int, trusted_uids: "Set[int]") -> int:
+        """Returns the problems of an entry with the given status, one bit
+        for each of "ISSUES" """
+        mask = 0
+        if mode & stat.S_IWOTH and not stat.S_ISLNK(mode):
+            mask |= 1
+        if uid not in trusted_uids:
+            mask |= 2
+        if mode & stat.S_ISUID:
+            mask |= 4
+        # The setgid bit of a directory only sets the group of new files
+        if mode & stat.S_ISGID and not stat.S_ISDIR(mode):
+            mask |= 8
+        return mask
+
+    @classmethod
+    def issues(cls, mode: int, uid: int,
+               trusted_uids: "Set[int]") -> "List[str]":
+        """Returns the names of the problems of an entry"""
+        mask = cls.issue_mask(mode, uid, trusted_uids)
+        return [issue for bit, issue in enumerate(cls.ISSUES)
+                if mask & 1 << bit]
+
+    @classmethod
+    def __count(cls, counts: "List[int]", mask: int, step: int = 1) -> None:
+        counts[cls.__ANOMALOUS] += step
+        for bit in range(len(cls.ISSUES)):
+            if mask & 1 << bit:
+                counts[cls.__ANOMALOUS + 1 + bit] += step
+
+    @staticmethod
+    def __mode(mode: int) -> str:
+        return oct(stat.S_IMODE(mode))[2:].zfill(4)
+
+    def __change(self, state: DirectoryState, change: dict) -> None:
+        state.change_count += 1
+        if len(state.changes) < self.max_anomalies:
+            state.changes.append(change)
+
+    def __entry_change(self, path: str,
+                       before: "Optional[Tuple[int, int, int]]",
+                       current: "Tuple[int, int, int]",
+                       trusted_uids: "Set[int]") -> dict:
+        """Returns the change of an entry added or modified since the
+        previous scan, in the MIRAK format"""
+        mode, uid, gid = current
+        change = {
+            "path": path,
+            "change": "added" if before is None else "modified",
+            "mode": self.__mode(mode),
+            "uid": uid,
+            "user": self.identities.user(uid),
+            "gid": gid,
+            "issues": self.issues(mode, uid, trusted_uids),
+        }
+        if before is not None:
+            change["previous"] = {"mode": self.__mode(before[0]),
+                                  "uid": before[1],
+                                  "gid": before[2]}
+        return change
+
+    def __check_children(self, state: DirectoryState,
+                         trusted_uids: "Set[int]") -> None:
+        """Compares the status of the children of a directory taken from
+        the manifest with their entries in it. A chmod or chown of a
+        directory does not change its parent, so the entry, counts and
+        anomalies of the parent are updated here. The status read is kept
+        for the visit of the child."""
+        recorded: "Optional[Dict[int, Tuple[int, int, int]]]" = None
+        for child in state.children:
+            try:
+                status = os.lstat(child.path)
+            except OSError:
+                # The visit of the child counts the error
+                continue
+            child.status = status
+            current = (status.st_mode, status.st_uid, status.st_gid)
+            if recorded is None:
+                recorded = {
+                    name_hash: (mode, uid, gid)
+                    for name_hash, mode, uid, gid
+                    in TreeManifest.ENTRY.iter_unpack(state.entries)
+                }
+            name_hash = TreeManifest.name_hash(child.name)
+            before = recorded.get(name_hash)
+            if before is None or before == current or \
+                    not stat.S_ISDIR(status.st_mode):
+                continue
+            recorded[name_hash] = current
+            mask = self.issue_mask(before[0], before[1], trusted_uids)
+            if mask:
+                self.__count(state.counts, mask, -1)
+                state.anomalies = [anomaly for anomaly in state.anomalies
+                                   if anomaly[0] != child.name]
+            mask = self.issue_mask(current[0], current[1], trusted_uids)
+            if mask:
+                self.__count(state.counts, mask)
+                state.anomalies.append((child.name, current[0], current[1],
+                                        mask))
+            self.__change(state, self.__entry_change(child.path, before,
+                                                     current, trusted_uids))
+            state.entries = b"".join(
+                TreeManifest.ENTRY.pack(name_hash, *entry)
+                for name_hash, entry in sorted(recorded.items())
+            )
+
+    def __unchanged(self, record: "Optional[DirectoryRecord]",
+                    status: os.stat_result, manifest: TreeManifest) -> bool:
+        """Checks whether a directory is as recorded in the manifest. A
+        directory changed during the previous scan, or that had errors,
+        is read again."""
+        return record is not None and \
+            record.inode == status.st_ino and \
+            record.mtime_ns == status.st_mtime_ns and \
+            record.ctime_ns == status.st_ctime_ns and \
+            record.ctime_ns < manifest.started_ns - self.__RACY_NS and \
+            record.counts[self.__ERRORS] == 0
+
+    def __visit(self, state: DirectoryState, trusted_uids: "Set[int]",
+                manifest: "Optional[TreeManifest]", keep: bool) -> None:
+        """Audits the entries of one directory, or takes them from the
+        manifest if the directory did not change, and finds its children"""
+        status = state.status
+        state.status = None
+        if status is None:
+            try:
+                status = os.lstat(state.path)
+            except OSError:
+                state.counts[self.__ERRORS] += 1
+                return
+        state.inode = status.st_ino
+        state.mtime_ns = status.st_mtime_ns
+        state.ctime_ns = status.st_ctime_ns
+        state.owner = self.__OWNER.pack(status.st_mode, status.st_uid,
+                                        status.st_gid)
+        record = manifest.directory(state.previous) \
+            if manifest is not None and state.previous is not None else None
+        if manifest is not None and \
+                self.__unchanged(record, status, manifest):
+            state.counts = list(record.counts)  # type: ignore
+            state.entries = manifest.entries(record)  # type: ignore
+            state.anomalies = manifest.anomalies(record)  # type: ignore
+            state.children = [
+                DirectoryState(os.path.join(state.path, os.fsdecode(name)),
+                               name, index)
+                for name, index in manifest.children(record)  # type: ignore
+            ]
+            self.__check_children(state, trusted_uids)
+            return
+
+        state.rescanned = True
+        previous: "Dict[int, Tuple[int, int, int]]" = {}
+        children: "Dict[bytes, int]" = {}
+        if record is not None:
+            previous = {
+                name_hash: (mode, uid, gid) for name_hash, mode, uid, gid
+                in TreeManifest.ENTRY.iter_unpack(manifest.entries(record))
+            }
+            children = dict(manifest.children(record))
+        counts = state.counts
+        entries: "List[Tuple[int, int, int, int]]" = []
+        try:
+            scanner = os.scandir(state.path)
+        except OSError:
+            counts[self.__ERRORS] += 1
+            return
+        with scanner:
+            for entry in scanner:
+                try:
+                    entry_status = entry.stat(follow_symlinks=False)
+                except OSError:
+                    counts[self.__ERRORS] += 1
+                    continue
+                mode = entry_status.st_mode
+                uid = entry_status.st_uid
+                name = os.fsencode(entry.name)
+                if stat.S_ISDIR(mode):
+                    counts[1] += 1
+                    state.children.append(DirectoryState(
+                        entry.path, name, children.get(name)))
+                elif stat.S_ISREG(mode):
+                    counts[0] += 1
+                    counts[4] += entry_status.st_size
+                elif stat.S_ISLNK(mode):
+                    counts[2] += 1
+                else:
+                    counts[3] += 1
+                mask = self.issue_mask(mode, uid, trusted_uids)
+                if mask:
+                    self.__count(counts, mask)
+                    state.anomalies.append((name, mode, uid, mask))
+                if not keep:
+                    continue
+                current = (mode, uid, entry_status.st_gid)
+                name_hash = TreeManifest.name_hash(name)
+                entries.append((name_hash,) + current)
+                if manifest is None:
+                    continue
+                before = previous.pop(name_hash, None)
+                if before == current:
+                    continue
+                self.__change(state, self.__entry_change(
+                    entry.path, before, current, trusted_uids))
+        if previous:
+            self.__change(state, {"path": state.path, "change": "removed",
+                                  "entries": len(previous)})
+        entries.sort()
+        state.entries = b"".join(TreeManifest.ENTRY.pack(*item)
+                                 for item in entries)
+
+    def __walk(self, root: DirectoryState, trusted_uids: "Set[int]",
+               manifest: "Optional[TreeManifest]",
+               keep: bool) -> "Iterator[DirectoryState]":
+        """Visits the tree one level at a time and yields its directories
+        in breadth-first order, the children of each one being contiguous"""
+        visited = 0
+        level = [root]
+        with ThreadPoolExecutor(max_workers=self.max_workers,
+                                thread_name_prefix="audit") as executor:
+            while level:
+                list(executor.map(
+                    lambda state: self.__visit(state, trusted_uids,
+                                               manifest, keep),
+                    level
+                ))
+                following: "List[DirectoryState]" = []
+                visited += len(level)
+                for state in level:
+                    state.first_child = visited + len(following)
+                    following.extend(state.children)
+                    if not keep:
+                        # Without a manifest the directories are not
+                        # needed after their level
+                        state.children = []
+                    yield state
+                level = following
+
+    @staticmethod
+    def __digest(directories: "List[DirectoryState]") -> None:
+        """Computes the digest of each subtree (mode, uid and gid of every
+        entry), from the leaves up"""
+        for state in reversed(directories):
+            digest = hashlib.blake2b(state.owner, digest_size=16)
+            digest.update(state.entries)
+            for child in state.children:
+                digest.update(child.digest)
+            state.digest = digest.digest()
+
+    def audit(self, root: str,
+              trusted_uids: "Optional[Iterable[int]]" = None,
+              manifest_path: Optional[str] = None,
+              rebuild: bool = False) -> dict:
+        """Audits a tree and returns its counts and anomalies in the MIRAK
+        format. The entries may belong to root or to the owner of the tree
+        (e.g. the "routinator" user); any other owner is foreign. With a
+        manifest path, the previous manifest (unless "rebuild" is set) is
+        used to skip the directories that did not change, the changes
+        since then are reported and the manifest is written again."""
+        try:
+            status = os.lstat(root)
+        except OSError as ex:
+            return {"path": root, "error": ex.strerror or str(ex)}
+        trusted = set(trusted_uids) if trusted_uids is not None \
+            else {0, status.st_uid}
+        started_ns = time.time_ns()
+        signature = json.dumps({"root": os.path.abspath(root),
+                                "trusted": sorted(trusted)}).encode("utf8")
+        manifest: "Optional[TreeManifest]" = None
+        if manifest_path is not None and not rebuild:
+            manifest = TreeManifest()
+            if not manifest.load(manifest_path, signature) or not manifest:
+                manifest.close()
+                manifest = None
+
+        totals = [0] * len(self.FIELDS)
+        anomalies: "List[Tuple[str, int, int, int]]" = []
+        mask = self.issue_mask(status.st_mode, status.st_uid, trusted)
+        if mask:
+            self.__count(totals, mask)
+            anomalies.append((root, status.st_mode, status.st_uid, mask))
+        directories: "List[DirectoryState]" = []
+        if stat.S_ISDIR(status.st_mode):
+            try:
+                for state in self.__walk(
+                    DirectoryState(root, b"", 0 if manifest else None),
+                    trusted, manifest, manifest_path is not None
+                ):
+                    for position, value in enumerate(state.counts):
+                        totals[position] += value
+                    for name, mode, uid, found in state.anomalies:
+                        anomalies.append((os.path.join(
+                            state.path, os.fsdecode(name)), mode, uid, found))
+                    if len(anomalies) > 2 * self.max_anomalies:
+                        anomalies = sorted(anomalies)[:self.max_anomalies]
+                    if manifest_path is not None:
+                        directories.append(state)
+            finally:
+                if manifest is not None:
+                    manifest.close()
+        anomalies = sorted(anomalies)[:self.max_anomalies]
+        result = {
+            "path": root,
+            "trustedUids": sorted(trusted),
+            "counts": dict(zip(self.FIELDS, totals)),
+            "anomalies": [
+                {"path": path, "mode": self.__mode(mode), "uid": uid,
+                 "user": self.identities.user(uid),
+                 "issues": [issue for bit, issue in enumerate(self.ISSUES)
+                            if found & 1 << bit]}
+                for path, mode, uid, found in anomalies
+            ],
+            "truncated": totals[self.__ANOMALOUS] > len(anomalies),
+        }
+        if manifest_path is not None and directories:
+            self.__digest(directories)
+            changes = [change for state in directories
+                       for change in state.changes]
+            change_count = sum(state.change_count for state in directories)
+            result.update({
+                "incremental": manifest is not None,
+                "directoriesRescanned": sum(state.rescanned
+                                            for state in directories),
+                "digest": directories[0].digest.hex(),
+                "changeCount": change_count if manifest is not None else None,
+                "changes": sorted(changes, key=lambda change:
+                                  change["path"])[:self.max_anomalies],
+            })
+            try:
+                TreeManifest.write(manifest_path, signature, started_ns,
+                                   directories)
+            except OSError as ex:
+                print(f"Error: unable to write the tree manifest: {ex}")
+        return result
@@ -0,0 +1,222 @@
+# ####################################################
+
+# This code is part of the "Mirak-extractor" software and, consequently, is
+# part of the "Mirak" project. It is expressly forbidden to copy, reproduce,
+# distribute or make available this code or parts thereof in isolation, except
+# under the terms expressly authorized by the rights holder.
+
+# The provision of the complete software must strictly follow the guidelines
+# established in the applicable license, as detailed in the license file
+# included in this repository. Any unauthorized use may result in sanctions
+# provided for in Brazilian law, including, but not limited to,
+# Law No. 9.610/1998 (Copyright Law).
+
+# For more information or specific requests, please contact the holder through
+# the contact details present in the license file.
+
+# ####################################################
+
+"""
+This module contains the "TreeManifest" class, the record of a directory
+tree kept between executions so that the audit of the tree only reads the
+directories that changed.
+"""
+
+import hashlib
+import mmap
+import os
+import struct
+from typing import List, NamedTuple, Optional, Tuple, Union
+
+
+class DirectoryRecord(NamedTuple):
+    """A directory of the manifest. Its children, entries and anomalous
+    entries are ranges of the other tables; "counts" are the counts of its
+    own entries, in the order of "TreeAudit.FIELDS"."""
+
+    name: bytes
+    inode: int
+    mtime_ns: int
+    ctime_ns: int
+    first_child: int
+    children: int
+    first_entry: int
+    entries: int
+    first_anomaly: int
+    anomalies: int
+    counts: "Tuple[int, ...]"
+    digest: bytes
+
+
+class TreeManifest:
+    """Memory-mapped manifest of a tree. The file holds a header, the
+    signature of the audit, a table of directories in breadth-first order
+    (so the children of a directory are contiguous), a table of entries
+    (hash of the name, mode, uid and gid) sorted by hash within each
+    directory, a table of anomalous entries and the names. Loading it
+    only maps the file; the records are decoded when they are read."""
+
+    MAGIC = b"MKTM"
+    VERSION = 1
+    # magic, version, start of the scan, signature length and the number
+    # of directories, entries and anomalous entries
+    __HEADER = struct.Struct("<4sIqIIII")
+    # name offset and length, inode, mtime, ctime, children, entries and
+    # anomalies (first and count), the counts of "TreeAudit" and the
+    # digest of the subtree
+    DIRECTORY = struct.Struct("<IIQqqIIIIII" + "IIIIQIIIIII" + "16s")
+    ENTRY = struct.Struct("<QIII")
+    # name offset and length, mode, uid and issues
+    ANOMALY = struct.Struct("<IIIII")
+
+    def __init__(self) -> None:
+        self.started_ns = 0
+        self.__data: "Optional[Union[bytes, mmap.mmap]]" = None
+        self.__directories = 0
+        self.__directories_at = 0
+        self.__entries_at = 0
+        self.__anomalies_at = 0
+
+    @staticmethod
+    def file_name(root: str) -> str:
+        """Returns the name of the manifest of a tree in the cache"""
+        digest = hashlib.sha1(os.path.abspath(root).encode(
+            "utf8", "surrogateescape")).hexdigest()[:16]
+        return f"tree-manifest-{digest}.idx"
+
+    @staticmethod
+    def name_hash(name: bytes) -> int:
+        """Returns the 64-bit hash of an entry name"""
+        return int.from_bytes(hashlib.blake2b(name, digest_size=8).digest(),
+                              "little")
+
+    def __len__(self) -> int:
+        return self.__directories
+
+    def load(self, path: str, signature: bytes) -> bool:
+        """Maps a manifest written with the same signature"""
+        self.close()
+        try:
+            with open(path, "rb") as file:
+                if os.fstat(file.fileno()).st_size < self.__HEADER.size:
+                    return False
+                data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        except OSError:
+            return False
+        magic, version, started, length, directories, entries, _ = \
+            self.__HEADER.unpack_from(data)
+        start = self.__HEADER.size
+        if magic != self.MAGIC or version != self.VERSION or \
+                data[start:start + length] != signature:
+            data.close()
+            return False
+        self.__data = data
+        self.started_ns = started
+        self.__directories = directories
+        self.__directories_at = start + length
+        self.__entries_at = self.__directories_at + \
+            directories * self.DIRECTORY.size
+        self.__anomalies_at = self.__entries_at + entries * self.ENTRY.size
+        return True
+
+    def close(self) -> None:
+        """Releases the mapped manifest"""
+        if isinstance(self.__data, mmap.mmap):
+            self.__data.close()
+        self.__data = None
+        self.__directories = 0
+
+    def __name(self, offset: int, length: int) -> bytes:
+        return self.__data[offset:offset + length]  # type: ignore
+
+    def directory(self, index: int) -> DirectoryRecord:
+        """Returns a directory of the manifest"""
+        fields = self.DIRECTORY.unpack_from(
+            self.__data, self.__directories_at + index * self.DIRECTORY.size
+        )
+        return DirectoryRecord(self.__name(fields[0], fields[1]),
+                               *fields[2:11], fields[11:22], fields[22])
+
+    def children(self, record: DirectoryRecord) -> "List[Tuple[bytes, int]]":
+        """Returns the names and indexes of the children of a directory"""
+        return [(self.directory(index).name, index) for index in
+                range(record.first_child,
+                      record.first_child + record.children)]
+
+    def entries(self, record: DirectoryRecord) -> bytes:
+        """Returns the packed entries of a directory"""
+        start = self.__entries_at + record.first_entry * self.ENTRY.size
+        return self.__data[start:start +  # type: ignore
+                           record.entries * self.ENTRY.size]
+
+    def anomalies(
+        self, record: DirectoryRecord
+    ) -> "List[Tuple[bytes, int, int, int]]":
+        """Returns the name, mode, uid and issues of the anomalous entries
+        of a directory"""
+        anomalies = []
+        for index in range(record.first_anomaly,
+                           record.first_anomaly + record.anomalies):
+            offset, length, mode, uid, issues = self.ANOMALY.unpack_from(
+                self.__data, self.__anomalies_at + index * self.ANOMALY.size
+            )
+            anomalies.append((self.__name(offset, length), mode, uid, issues))
+        return anomalies
+
+    @classmethod
+    def write(cls, path: str, signature: bytes, started_ns: int,
+              directories: list) -> None:
+        """Writes a manifest, atomically. "directories" are in breadth-first
+        order and have the attributes of "DirectoryRecord", with "children"
+        holding the child directories, "entries" the packed entries and
+        "anomalies" the anomalous ones."""
+        names = bytearray()
+        name_offsets = []
+        for directory in directories:
+            name_offsets.append(len(names))
+            names += directory.name
+        anomaly_names = []
+        for directory in directories:
+            for name, _, _, _ in directory.anomalies:
+                anomaly_names.append(len(names))
+                names += name
+        entry_count = sum(len(directory.entries) // cls.ENTRY.size
+                          for directory in directories)
+        anomaly_count = len(anomaly_names)
+        names_at = cls.__HEADER.size + len(signature) + \
+            len(directories) * cls.DIRECTORY.size + \
+            entry_count * cls.ENTRY.size + anomaly_count * cls.ANOMALY.size
+
+        temporary = f"{path}.{os.getpid()}.tmp"
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(temporary, "wb") as file:
+            file.write(cls.__HEADER.pack(
+                cls.MAGIC, cls.VERSION, started_ns, len(signature),
+                len(directories), entry_count, anomaly_count
+            ))
+            file.write(signature)
+            first_entry = first_anomaly = 0
+            for directory, offset in zip(directories, name_offsets):
+                entries = len(directory.entries) // cls.ENTRY.size
+                file.write(cls.DIRECTORY.pack(
+                    names_at + offset, len(directory.name), directory.inode,
+                    directory.mtime_ns, directory.ctime_ns,
+                    directory.first_child, len(directory.children),
+                    first_entry, entries,
+                    first_anomaly, len(directory.anomalies),
+                    *directory.counts, directory.digest
+                ))
+                first_entry += entries
+                first_anomaly += len(directory.anomalies)
+            for directory in directories:
+                file.write(directory.entries)
+            position = 0
+            for directory in directories:
+                for name, mode, uid, issues in directory.anomalies:
+                    file.write(cls.ANOMALY.pack(
+                        names_at + anomaly_names[position], len(name), mode,
+                        uid, issues
+                    ))
+                    position += 1
+            file.write(names)
+        os.replace(temporary, path)
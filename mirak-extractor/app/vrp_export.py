@@ -0,0 +1,211 @@
+# ####################################################
+
+# This code is part of the "Mirak-extractor" software and, consequently, is
+# part of the "Mirak" project. It is expressly forbidden to copy, reproduce,
+# distribute or make available this code or parts thereof in isolation, except
+# under the terms expressly authorized by the rights holder.
+
+# The provision of the complete software must strictly follow the guidelines
+# established in the applicable license, as detailed in the license file
+# included in this repository. Any unauthorized use may result in sanctions
+# provided for in Brazilian law, including, but not limited to,
+# Law No. 9.610/1998 (Copyright Law).
+
+# For more information or specific requests, please contact the holder through
+# the contact details present in the license file.
+
+# ####################################################
+
+"""
+This module contains the classes that analyse the validated ROA payloads
+(VRPs) exported by Routinator, reading the export as a stream.
+"""
+
+import hashlib
+import json
+import math
+from typing import Dict, Iterable, Iterator, Tuple
+from app.local_http import LocalHttpClient
+
+# ASN, prefix, maximum length and trust anchor of a VRP
+Vrp = Tuple[str, str, int, str]
+
+
+class BloomFilter:
+    """Set of fixed size that tells whether an item was probably seen
+    before. False positives happen at the configured rate; false negatives
+    never do."""
+
+    def __init__(self, capacity: int, error_rate: float = 0.001) -> None:
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.size = max(8, int(-capacity * math.log(error_rate) /
+                               math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.__bits = bytearray((self.size + 7) // 8)
+
+    def add(self, item: bytes) -> bool:
+        """Adds an item and returns whether it was probably already in the
+        set. The positions come from one digest (double hashing)."""
+        digest = hashlib.blake2b(item, digest_size=16).digest()
+        first = int.from_bytes(digest[:8], "little")
+        second = int.from_bytes(digest[8:], "little") | 1
+        bits = self.__bits
+        seen = True
+        for number in range(self.hashes):
+            position = (first + number * second) % self.size
+            mask = 1 << (position & 7)
+            if not bits[position >> 3] & mask:
+                seen = False
+                bits[position >> 3] |= mask
+        return seen
+
+
+class VrpStatistics:
+    """Aggregates VRPs one at a time: counts per trust anchor, distribution
+    of the maximum lengths and counts of loose, overly broad and duplicate
+    VRPs. The memory used does not depend on the number of VRPs, except for
+    the duplicate filter, whose size is fixed by its capacity."""
+
+    # A VRP shorter than these prefixes covers an unusually large block
+    BROAD_IPV4_LENGTH = 8
+    BROAD_IPV6_LENGTH = 19
+
+    def __init__(self, capacity: int = 2_000_000,
+                 error_rate: float = 0.001) -> None:
+        self.total = 0
+        self.invalid = 0
+        self.per_trust_anchor: "Dict[str, int]" = {}
+        self.max_lengths: "Dict[str, Dict[int, int]]" = {"ipv4": {},
+                                                         "ipv6": {}}
+        # maxLength greater than the prefix length (RFC 9319)
+        self.loose = 0
+        self.broad = 0
+        self.duplicates = 0
+        self.__seen = BloomFilter(capacity, error_rate)
+
+    def add(self, asn: str, prefix: str, max_length: int,
+            trust_anchor: str) -> None:
+        """Counts one VRP"""
+        address, _, length_text = prefix.partition("/")
+        if not length_text.isdigit():
+            self.invalid += 1
+            return
+        length = int(length_text)
+        family = "ipv6" if ":" in address else "ipv4"
+        self.total += 1
+        self.per_trust_anchor[trust_anchor] = \
+            self.per_trust_anchor.get(trust_anchor, 0) + 1
+        lengths = self.max_lengths[family]
+        lengths[max_length] = lengths.get(max_length, 0) + 1
+        if max_length > length:
+            self.loose += 1
+        if length < (self.BROAD_IPV6_LENGTH if family == "ipv6"
+                     else self.BROAD_IPV4_LENGTH):
+            self.broad += 1
+        # The same payload published under more than one trust anchor, or
+        # more than once, is a duplicate
+        if self.__seen.add(f"{asn} {prefix} {max_length}".encode()):
+            self.duplicates += 1
+
+    def summary(self) -> dict:
+        """Returns the statistics in the MIRAK format"""
+        return {
+            "vrps": self.total,
+            "invalidEntries": self.invalid,
+            "perTrustAnchor": dict(sorted(self.per_trust_anchor.items())),
+            "maxLengthDistribution": {
+                family: {str(length): count
+                         for length, count in sorted(lengths.items())}
+                for family, lengths in self.max_lengths.items()
+            },
+            "looseMaxLength": self.loose,
+            "broadPrefixes": self.broad,
+            "duplicates": self.duplicates,
+            # The duplicates are counted with a Bloom filter
+            "duplicatesErrorRate": self.__seen.error_rate,
+        }
+
+
+class VrpExport:
+    """Reads the VRP export of Routinator ("/csv" or "/json") from its HTTP
+    endpoint and parses it incrementally, chunk by chunk."""
+
+    PATHS = {"csv": "/csv", "json": "/json"}
+
+    def __init__(self, client: LocalHttpClient, export_format: str = "csv"
+                 ) -> None:
+        if export_format not in self.PATHS:
+            raise ValueError(f"unknown VRP export format {export_format}")
+        self.client = client
+        self.export_format = export_format
+
+    @staticmethod
+    def iter_csv(chunks: "Iterable[bytes]") -> "Iterator[Vrp]":
+        """Yields the VRPs of the CSV export
+        ("ASN,IP Prefix,Max Length,Trust Anchor")"""
+        pending = b""
+        header = True
+        for chunk in chunks:
+            lines = (pending + chunk).split(b"\n")
+            pending = lines.pop()
+            for line in lines:
+                if header:
+                    header = False
+                    continue
+                fields = line.rstrip(b"\r").split(b",")
+                if len(fields) >= 4 and fields[2].isdigit():
+                    yield (fields[0].decode(), fields[1].decode(),
+                           int(fields[2]), fields[3].decode())
+        fields = pending.rstrip(b"\r").split(b",")
+        if not header and len(fields) >= 4 and fields[2].isdigit():
+            yield (fields[0].decode(), fields[1].decode(), int(fields[2]),
+                   fields[3].decode())
+
+    @staticmethod
+    def iter_json(chunks: "Iterable[bytes]") -> "Iterator[Vrp]":
+        """Yields the VRPs of the "roas" array of the JSON export. The
+        objects of the array are flat, so each one is delimited by its
+        braces and decoded alone; only the unread part of the stream is
+        kept in the buffer. An object without the fields of a VRP raises
+        ValueError."""
+        buffer = bytearray()
+        inside = False
+        for chunk in chunks:
+            buffer += chunk
+            if not inside:
+                start = buffer.find(b'"roas"')
+                if start == -1:
+                    continue
+                bracket = buffer.find(b"[", start)
+                if bracket == -1:
+                    continue
+                del buffer[:bracket + 1]
+                inside = True
+            while True:
+                start = buffer.find(b"{")
+                close = buffer.find(b"]")
+                if close != -1 and (start == -1 or close < start):
+                    return
+                if start == -1:
+                    break
+                end = buffer.find(b"}", start)
+                if end == -1:
+                    break
+                roa = json.loads(buffer[start:end + 1])
+                del buffer[:end + 1]
+                try:
+                    yield (roa["asn"], roa["prefix"], int(roa["maxLength"]),
+                           roa.get("ta", ""))
+                except (KeyError, TypeError) as ex:
+                    raise ValueError(f"invalid VRP {roa}") from ex
+
+    def analyse(self, statistics: "VrpStatistics") -> "VrpStatistics":
+        """Streams the export into the statistics"""
+        path = self.PATHS[self.export_format]
+        chunks = self.client.stream(path)
+        parser = self.iter_csv if self.export_format == "csv" \
+            else self.iter_json
+        for asn, prefix, max_length, trust_anchor in parser(chunks):
+            statistics.add(asn, prefix, max_length, trust_anchor)
+        return statistics